@@ -0,0 +1,43 @@
+"""
+Compara dos corridas de benchmarks/suite.py: muestra la razón de medianas (nueva / base) de cada
+medición común y marca las regresiones mayores al umbral.
+
+Uso:
+    python benchmarks/comparar.py base.json nueva.json --umbral 1.10
+"""
+import sys
+import json
+import argparse
+
+
+def _llave(r):
+    return r['grupo'], r['funcion'], tuple(sorted(r['parametros'].items()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compara dos archivos de resultados de la suite.')
+    parser.add_argument('base')
+    parser.add_argument('nueva')
+    parser.add_argument('--umbral', type=float, default=1.10, help='Razón a partir de la cual hay regresión.')
+    args = parser.parse_args(argv)
+
+    with open(args.base) as f:
+        base = {_llave(r): r for r in json.load(f)['resultados']}
+    with open(args.nueva) as f:
+        nueva = {_llave(r): r for r in json.load(f)['resultados']}
+
+    regresiones = 0
+    for llave in (l for l in nueva if l in base):
+        grupo, funcion, parametros = llave
+        razon = nueva[llave]['mediana_ms'] / max(base[llave]['mediana_ms'], 1e-12)
+        marca = ' <-- regresión' if razon > args.umbral else ''
+        regresiones += razon > args.umbral
+        descripcion = ', '.join(f'{k}={v}' for k, v in parametros)
+        print(f'{grupo:>7} {funcion:<32} {descripcion:<56} {base[llave]["mediana_ms"]:10.3f} -> '
+              f'{nueva[llave]["mediana_ms"]:10.3f} ms  x{razon:5.2f}{marca}')
+
+    return 1 if regresiones else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
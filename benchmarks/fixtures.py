@@ -0,0 +1,185 @@
+"""
+Datos sintéticos para los benchmarks: MIDIs como los del corpus (una pista, set_tempo,
+note_on/note_off) y tarareos .wav generados a partir de las mismas notas.
+
+Uso desde la terminal (genera un corpus con nombres como los de datos/):
+    python benchmarks/fixtures.py salida/ --n 50 --notas 40 --duracion-silencio 0.5
+"""
+import os
+import sys
+import copy
+import argparse
+import numpy as np
+import mido
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import midi as midi_utils
+
+
+FIGURAS = np.array([0.25, 0.5, 1, 2]) # Duraciones en negras
+
+
+def notas_sinteticas(n_notas, ticks_per_beat=480, seed=0, silencios=0.3, rango=(55, 76)):
+    """
+    Tabla de notas aleatoria y monofónica.
+
+    Parámetros:
+        n_notas (int): Número de notas.
+        ticks_per_beat (int): Resolución del MIDI.
+        seed (int): Semilla.
+        silencios (float): Probabilidad de un silencio antes de cada nota.
+        rango (tuple): Tonos MIDI [min, max).
+
+    Retorna:
+        notas (np.ndarray): Tabla de notas NOTAS_DTYPE (ver utils.midi).
+    """
+    rng = np.random.default_rng(seed)
+    duraciones = (rng.choice(FIGURAS, n_notas) * ticks_per_beat).astype(np.int64)
+    pausas = np.where(rng.random(n_notas) < silencios, rng.choice(FIGURAS[:2], n_notas) * ticks_per_beat, 0)
+    inicios = np.cumsum(pausas.astype(np.int64)) + np.concatenate(([0], np.cumsum(duraciones)[:-1]))
+
+    notas = np.zeros(n_notas, dtype=midi_utils.NOTAS_DTYPE)
+    notas['nota'] = rng.integers(*rango, n_notas)
+    notas['inicio'] = inicios
+    notas['fin'] = inicios + duraciones
+    notas['velocity'] = rng.integers(60, 100, n_notas)
+    return notas
+
+
+def midi_sintetico(n_notas, tempo=500000, ticks_per_beat=480, violaciones=0.0, seed=0, silencio_inicial=0,
+                   note_on_cero=False):
+    """
+    MIDI de una pista como los del corpus. Con `violaciones` > 0, esa fracción de notas comienza
+    antes de que termine la anterior (polifonía en un corpus monofónico). Con `note_on_cero`, las
+    notas terminan con 'note_on' de velocity 0 en lugar de 'note_off', el formato no estándar
+    que detecta `utils.midi.detect_note_on_consecutives`.
+
+    Parámetros:
+        n_notas (int): Número de notas.
+        tempo (int): Tempo en microsegundos por negra.
+        ticks_per_beat (int): Resolución del MIDI.
+        violaciones (float): Fracción de notas traslapadas con la anterior.
+        seed (int): Semilla.
+        silencio_inicial (int): Ticks de silencio antes de la primera nota.
+        note_on_cero (bool): Terminar las notas con 'note_on' de velocity 0.
+
+    Retorna:
+        midi (MidiFile): Archivo MIDI.
+    """
+    notas = notas_sinteticas(n_notas, ticks_per_beat, seed)
+    notas['inicio'] += silencio_inicial
+    notas['fin'] += silencio_inicial
+
+    rng = np.random.default_rng(seed + 1)
+    traslapadas = np.flatnonzero(rng.random(n_notas) < violaciones)
+    traslapadas = traslapadas[traslapadas > 0]
+    # La nota anterior termina después de que comienza la siguiente
+    notas['fin'][traslapadas - 1] = notas['inicio'][traslapadas] + ticks_per_beat // 8
+    # Sin repetir tono, para que el traslape no sea un reinicio de la misma nota
+    iguales = notas['nota'][traslapadas] == notas['nota'][traslapadas - 1]
+    notas['nota'][traslapadas[iguales]] += 1
+
+    midi = midi_utils.notas2midi(notas, ticks_per_beat, tempo)
+    if note_on_cero:
+        track = midi.tracks[0]
+        for i, msg in enumerate(track):
+            if msg.type == 'note_off':
+                track[i] = mido.Message('note_on', note=msg.note, velocity=0, time=msg.time)
+    midi.tracks[0].append(mido.MetaMessage('end_of_track', time=0))
+    return midi
+
+
+def copiar_midi(midi):
+    """Copia independiente de un MidiFile, para funciones que lo modifican "in place"."""
+    return copy.deepcopy(midi)
+
+
+def tarareo_sintetico(notas, tempo, ticks_per_beat, sr=22050, silencio_inicial=0.5, ruido_db=-40.0, seed=0):
+    """
+    Tarareo sintético de una tabla de notas: tono con 3 armónicos, vibrato leve y
+    ataques/caídas cortas, más ruido blanco y silencio (con ruido) al inicio.
+
+    Parámetros:
+        notas (np.ndarray): Tabla de notas NOTAS_DTYPE.
+        tempo (int): Tempo en microsegundos por negra.
+        ticks_per_beat (int): Resolución del MIDI.
+        sr (int): Frecuencia de muestreo.
+        silencio_inicial (float): Segundos de silencio antes de la primera nota.
+        ruido_db (float): Nivel del ruido en dB respecto a la amplitud máxima del tono.
+        seed (int): Semilla.
+
+    Retorna:
+        audio (np.ndarray): Audio float32 mono.
+    """
+    rng = np.random.default_rng(seed)
+    eventos = midi_utils.notas2eventos(notas, tempo, ticks_per_beat) + silencio_inicial
+    n = int(np.ceil((eventos[:, 1].max() if len(eventos) else silencio_inicial) * sr)) + sr // 4
+
+    # Frecuencia fundamental y envolvente por muestra
+    f0 = np.zeros(n)
+    envolvente = np.zeros(n)
+    rampa = int(0.01 * sr)
+    for (inicio, fin), nota in zip((eventos * sr).astype(np.int64), notas['nota']):
+        f0[inicio:fin] = 440.0 * 2 ** ((int(nota) - 69) / 12)
+        largo = fin - inicio
+        env = np.ones(largo)
+        r = min(rampa, largo // 2)
+        if r:
+            env[:r] = np.linspace(0, 1, r)
+            env[-r:] = np.linspace(1, 0, r)
+        envolvente[inicio:fin] = np.maximum(envolvente[inicio:fin], env)
+
+    t = np.arange(n) / sr
+    f0 = f0 * (1 + 0.005 * np.sin(2 * np.pi * 5 * t))
+    fase = 2 * np.pi * np.cumsum(f0) / sr
+    tono = sum(np.sin(k * fase) / k for k in (1, 2, 3)) * envolvente
+    tono *= 0.5 / max(np.abs(tono).max(), 1e-9)
+    ruido = rng.normal(0, 0.5 * 10 ** (ruido_db / 20), n)
+
+    return (tono + ruido).astype(np.float32)
+
+
+def generar_corpus(directorio, n=20, n_notas=40, tempo=500000, violaciones=0.0, silencio_inicial=0.5, sr=22050,
+                   seed=0, note_on_cero=0.0):
+    """
+    Guarda `n` pares .mid/.wav con nombres del corpus (Genero_PersonID_MusicID_SegmentID_...).
+    Una fracción `note_on_cero` de los MIDIs usa el formato no estándar (ver `midi_sintetico`).
+
+    Retorna:
+        nombres (list): Nombres de los archivos sin extensión.
+    """
+    import soundfile
+
+    os.makedirs(directorio, exist_ok=True)
+    nombres = []
+    for i in range(n):
+        nombre = f'F{i % 10:02d}_{i:04d}_0001_1'
+        midi = midi_sintetico(n_notas, tempo, violaciones=violaciones, seed=seed + i,
+                              note_on_cero=i < round(note_on_cero * n))
+        midi.save(os.path.join(directorio, nombre + '.mid'))
+        notas, ticks_per_beat, tempo_midi = midi_utils.midi2notas(midi)
+        audio = tarareo_sintetico(notas, tempo_midi, ticks_per_beat, sr, silencio_inicial, seed=seed + i)
+        soundfile.write(os.path.join(directorio, nombre + '.wav'), audio, sr)
+        nombres.append(nombre)
+    return nombres
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Genera un corpus sintético de MIDIs y tarareos.')
+    parser.add_argument('directorio')
+    parser.add_argument('--n', type=int, default=20, help='Número de pares .mid/.wav.')
+    parser.add_argument('--notas', type=int, default=40, help='Notas por archivo.')
+    parser.add_argument('--tempo', type=int, default=500000, help='Microsegundos por negra.')
+    parser.add_argument('--violaciones', type=float, default=0.0, help='Fracción de notas traslapadas.')
+    parser.add_argument('--note-on-cero', type=float, default=0.0, help='Fracción de MIDIs no estándar.')
+    parser.add_argument('--duracion-silencio', type=float, default=0.5, help='Segundos de silencio inicial.')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    nombres = generar_corpus(args.directorio, args.n, args.notas, args.tempo, args.violaciones,
+                             args.duracion_silencio, seed=args.seed, note_on_cero=args.note_on_cero)
+    print(f'{len(nombres)} pares en {args.directorio}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark del tiempo de importación en frío de la ruta sólo-MIDI (`utils.midi.midi2vec`).
+
+Cada medición corre en un proceso nuevo de Python. Falla (código de salida 1) si:
+    - la ruta MIDI carga alguna dependencia pesada (librosa, pandas, matplotlib, torch, ...), o
+    - la mediana excede el tiempo de importar sólo sus dependencias (mido y numpy)
+      más `--margen-ms`, o el presupuesto absoluto `--presupuesto-ms` si se indica.
+
+Uso:
+    python benchmarks/importacion.py --repeticiones 15 --salida importacion.json
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+import statistics
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PESADAS = ['librosa', 'soundfile', 'scipy', 'pandas', 'matplotlib', 'torch', 'sklearn']
+
+MEDIR = '''
+import sys, time, json
+inicio = time.perf_counter()
+{codigo}
+duracion = time.perf_counter() - inicio
+print(json.dumps({{'ms': duracion * 1000, 'modulos': sorted(m for m in sys.modules if '.' not in m)}}))
+'''
+
+CASOS = {
+    'base': 'import mido, numpy',
+    'utils.midi': 'import utils\nutils.midi.midi2vec',
+}
+
+
+def medir(codigo, repeticiones):
+    tiempos, modulos = [], set()
+    entorno = dict(os.environ, PYTHONPATH=RAIZ + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    for _ in range(repeticiones):
+        salida = subprocess.run([sys.executable, '-c', MEDIR.format(codigo=codigo)], cwd=RAIZ, env=entorno,
+                                capture_output=True, text=True, check=True)
+        resultado = json.loads(salida.stdout.strip().splitlines()[-1])
+        tiempos.append(resultado['ms'])
+        modulos.update(resultado['modulos'])
+    return tiempos, modulos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Tiempo de importación en frío de la ruta sólo-MIDI de utils.')
+    parser.add_argument('--repeticiones', type=int, default=11)
+    parser.add_argument('--margen-ms', type=float, default=100.0,
+                        help='Tiempo permitido sobre importar sólo mido y numpy.')
+    parser.add_argument('--presupuesto-ms', type=float, default=None, help='Presupuesto absoluto de la mediana.')
+    parser.add_argument('--salida', default=None, help='Archivo JSON donde guardar los resultados.')
+    args = parser.parse_args(argv)
+
+    resultados = {}
+    for nombre, codigo in CASOS.items():
+        tiempos, modulos = medir(codigo, args.repeticiones)
+        resultados[nombre] = {'mediana_ms': statistics.median(tiempos), 'min_ms': min(tiempos),
+                              'max_ms': max(tiempos), 'pesadas': sorted(set(PESADAS) & modulos)}
+        print(f"{nombre:>12}: mediana {resultados[nombre]['mediana_ms']:8.1f} ms "
+              f"(min {resultados[nombre]['min_ms']:.1f}, max {resultados[nombre]['max_ms']:.1f})")
+
+    midi = resultados['utils.midi']
+    presupuesto = args.presupuesto_ms or resultados['base']['mediana_ms'] + args.margen_ms
+    resultados['presupuesto_ms'] = presupuesto
+
+    errores = []
+    if midi['pesadas']:
+        errores.append(f"la ruta MIDI importa dependencias pesadas: {', '.join(midi['pesadas'])}")
+    if midi['mediana_ms'] > presupuesto:
+        errores.append(f"mediana de {midi['mediana_ms']:.1f} ms excede el presupuesto de {presupuesto:.1f} ms")
+
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            json.dump(resultados, f, indent=2)
+
+    for error in errores:
+        print('ERROR:', error)
+    return 1 if errores else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
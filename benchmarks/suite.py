@@ -0,0 +1,196 @@
+"""
+Suite de benchmarks sobre datos sintéticos (ver benchmarks/fixtures.py). Mide las funciones de
+preprocesamiento de MIDI y audio, el collate y el forward del Seq2Seq para varios tamaños de
+entrada y guarda los resultados en JSON para comparar corridas (ver benchmarks/comparar.py).
+
+Uso:
+    python benchmarks/suite.py --salida resultados.json
+    python benchmarks/suite.py --grupos midi,audio --rapido
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import datetime
+import statistics
+import subprocess
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import fixtures
+from utils import midi as midi_utils
+
+
+def cronometrar(funcion, repeticiones=5, minimo_s=0.05):
+    """
+    Mide `funcion()` como timeit: se elige el número de llamadas por repetición para que cada
+    repetición dure al menos `minimo_s` y se reporta el tiempo por llamada.
+
+    Retorna:
+        tiempos (dict): mediana, mínimo y máximo en ms por llamada y llamadas por repetición.
+    """
+    funcion() # Calentamiento
+    numero = 1
+    while True:
+        inicio = time.perf_counter()
+        for _ in range(numero):
+            funcion()
+        duracion = time.perf_counter() - inicio
+        if duracion >= minimo_s or numero >= 2**16:
+            break
+        numero *= 2 if duracion == 0 else max(2, int(np.ceil(minimo_s / duracion)))
+
+    tiempos = [duracion / numero]
+    for _ in range(repeticiones - 1):
+        inicio = time.perf_counter()
+        for _ in range(numero):
+            funcion()
+        tiempos.append((time.perf_counter() - inicio) / numero)
+
+    tiempos = np.array(tiempos) * 1000
+    return {'mediana_ms': float(statistics.median(tiempos)), 'min_ms': float(tiempos.min()),
+            'max_ms': float(tiempos.max()), 'llamadas': numero}
+
+
+def _registrar(resultados, grupo, funcion, parametros, tiempos):
+    resultados.append({'grupo': grupo, 'funcion': funcion, 'parametros': parametros, **tiempos})
+    descripcion = ', '.join(f'{k}={v}' for k, v in parametros.items())
+    print(f"{grupo:>7} {funcion:<32} {descripcion:<56} {tiempos['mediana_ms']:10.3f} ms")
+
+
+##### Grupos
+def bench_midi(resultados, rapido, repeticiones):
+    from utils import preprocess
+
+    N, T = 160, 10
+    for n_notas in ([50, 400] if rapido else [50, 200, 800, 3200]):
+        for violaciones, note_on_cero in ((0.0, False), (0.2, False), (0.0, True)):
+            p = {'n_notas': n_notas, 'violaciones': violaciones, 'note_on_cero': note_on_cero}
+            midi = fixtures.midi_sintetico(n_notas, violaciones=violaciones, silencio_inicial=480,
+                                           note_on_cero=note_on_cero)
+            # Largo total en segundos para que el vector cubra todo el MIDI
+            T_total = midi.length
+
+            _registrar(resultados, 'midi', 'midi.midi2vec', p,
+                       cronometrar(lambda: midi_utils.midi2vec(midi, N, T), repeticiones))
+            _registrar(resultados, 'midi', 'midi.eventos2vec(midi2eventos)', p,
+                       cronometrar(lambda: midi_utils.eventos2vec(midi_utils.midi2eventos(midi), N, T), repeticiones))
+            # lstrip modifica el MIDI: se mide sobre una copia
+            _registrar(resultados, 'midi', 'midi.lstrip (con copia)', p,
+                       cronometrar(lambda: midi_utils.lstrip(fixtures.copiar_midi(midi)), repeticiones))
+            _registrar(resultados, 'midi', 'midi.trim', p,
+                       cronometrar(lambda: midi_utils.trim(midi, 500000, T_total / 2), repeticiones))
+            _registrar(resultados, 'midi', 'midi.trim_notas(midi2notas)', p,
+                       cronometrar(lambda: midi_utils.trim_notas(*_notas_tempo(midi), T_total / 2), repeticiones))
+            _registrar(resultados, 'midi', 'preprocess.analizar_archivo', p,
+                       cronometrar(lambda: preprocess.analizar_archivo(midi), repeticiones))
+
+
+def _notas_tempo(midi):
+    notas, ticks_per_beat, tempo = midi_utils.midi2notas(midi)
+    return notas, tempo, ticks_per_beat
+
+
+def bench_audio(resultados, rapido, repeticiones):
+    from utils import tarareos
+
+    sr = 22050
+    L = int(sr * 0.0625)
+    freq_range = (80.0, 1100.0)
+    for segundos in ([5, 30] if rapido else [2, 10, 30, 60]):
+        n_notas = max(1, int(segundos * 1.5))
+        notas = fixtures.notas_sinteticas(n_notas)
+        audio = fixtures.tarareo_sintetico(notas, 500000, 480, sr, silencio_inicial=0.5)
+        audio = audio[:int(segundos * sr)]
+        p = {'segundos': segundos}
+
+        _registrar(resultados, 'audio', 'tarareos.trim', p,
+                   cronometrar(lambda: tarareos.trim(audio, sr, segundos, top_db=55), repeticiones))
+        _registrar(resultados, 'audio', 'tarareos.espectrograma', p,
+                   cronometrar(lambda: tarareos.espectrograma(audio, sr, L, freq_range), repeticiones))
+        _registrar(resultados, 'audio', 'tarareos.dividir_en_ventanas', p,
+                   cronometrar(lambda: tarareos.dividir_en_ventanas(audio, sr, 0.0625), repeticiones))
+
+
+def _lote_sintetico(B, L, N, K, seed=0):
+    import torch
+
+    rng = np.random.default_rng(seed)
+    batch = []
+    for _ in range(B):
+        n = int(rng.integers(N // 2, N + 1))
+        k = int(rng.integers(K // 2, K + 1))
+        batch.append((torch.from_numpy(rng.random((L, n), dtype=np.float32)),
+                      torch.from_numpy(rng.integers(0, 3, k).astype(np.int8))))
+    return batch
+
+
+def bench_modelo(resultados, rapido, repeticiones):
+    import torch
+    from utils import dataset
+    from utils.convseq2seq import Encoder, Decoder, Seq2Seq
+
+    L, N, K = 1378, 162, 162
+    colador = dataset.ColadorPrealocado(pin_memory=False)
+    torch.manual_seed(0)
+    model = Seq2Seq(Encoder(input_dim=L, hidden_dim=30),
+                    Decoder(labels_dim=3, embedding_dim=3, hidden_dim=30), 'cpu').eval()
+
+    for B in ([8, 32] if rapido else [1, 8, 32, 128]):
+        batch = _lote_sintetico(B, L, N, K)
+        p = {'batch_size': B}
+        _registrar(resultados, 'modelo', 'dataset.ColadorPrealocado', p,
+                   cronometrar(lambda: colador(batch), repeticiones))
+
+        src, trg = (t.clone() for t in colador(batch))
+        with torch.no_grad():
+            for ratio in (0.0, 1.0):
+                _registrar(resultados, 'modelo', f'Seq2Seq.forward(tf={ratio})', p,
+                           cronometrar(lambda: model(src, trg, ratio), repeticiones))
+
+
+GRUPOS = {'midi': bench_midi, 'audio': bench_audio, 'modelo': bench_modelo}
+
+
+def _entorno():
+    entorno = {'python': platform.python_version(), 'plataforma': platform.platform(),
+               'procesador': platform.processor(), 'cpus': os.cpu_count(), 'numpy': np.__version__,
+               'fecha': datetime.datetime.now().isoformat(timespec='seconds')}
+    try:
+        entorno['commit'] = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=RAIZ, capture_output=True,
+                                           text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        entorno['commit'] = None
+    try:
+        import torch
+        entorno['torch'] = torch.__version__
+        entorno['torch_threads'] = torch.get_num_threads()
+    except ImportError:
+        pass
+    return entorno
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks de preprocesamiento y modelo con datos sintéticos.')
+    parser.add_argument('--grupos', default=','.join(GRUPOS), help=f"Grupos separados por comas: {', '.join(GRUPOS)}.")
+    parser.add_argument('--rapido', action='store_true', help='Menos tamaños de entrada.')
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--salida', default=None, help='Archivo JSON de resultados.')
+    args = parser.parse_args(argv)
+
+    resultados = []
+    for grupo in args.grupos.split(','):
+        GRUPOS[grupo](resultados, args.rapido, args.repeticiones)
+
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            json.dump({'entorno': _entorno(), 'resultados': resultados}, f, indent=2)
+        print(f'Resultados en {args.salida}')
+
+
+if __name__ == '__main__':
+    main()
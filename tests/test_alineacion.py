@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from utils import alineacion
+from utils import midi as midi_utils
+from benchmarks import fixtures
+
+
+def _tabla(seed=0):
+    # Tabla de notas con su tempo, como las de midi.midi2notas
+    return fixtures.notas_sinteticas(25, seed=seed), 480, 500000
+
+
+@pytest.mark.parametrize('desfase', [5, -7])
+def test_signo_del_desfase(desfase):
+    # Tren de pulsos del MIDI corrido `desfase` cuadros: positivo si el audio va después
+    n = 600
+    tablas = [_tabla(seed) for seed in range(3)]
+    env_midi = alineacion.envolventes_midi(tablas, n)
+    env_audio = np.roll(env_midi, desfase, axis=1)
+    if desfase > 0:
+        env_audio[:, :desfase] = 0
+    else:
+        env_audio[:, desfase:] = 0
+
+    desfases, correlaciones = alineacion.estimar_desfases(env_audio, env_midi, max_desfase=20)
+    assert np.allclose(desfases, desfase, atol=0.5)
+    assert (correlaciones > 0.9).all()
+
+
+def test_alinear_en_segundos_y_desplazar():
+    sr, hop_length = alineacion.SR, alineacion.HOP_LENGTH
+    notas, ticks_per_beat, tempo = _tabla()
+    n = 800
+    env_midi = alineacion.envolventes_midi([(notas, ticks_per_beat, tempo)], n)[0]
+    env_audio = np.concatenate((np.zeros(9, np.float32), env_midi[:-9]))
+
+    desfases, _ = alineacion.alinear([env_audio], [(notas, ticks_per_beat, tempo)])
+    assert desfases[0] == pytest.approx(9 * hop_length / sr, abs=0.5 * hop_length / sr)
+
+    # Aplicar el desfase retrasa las notas hasta coincidir con el audio
+    alineadas = alineacion.desplazar_notas(notas, desfases[0], tempo, ticks_per_beat)
+    env_alineada = alineacion.envolventes_midi([(alineadas, ticks_per_beat, tempo)], n)[0]
+    assert alineacion.estimar_desfases(env_audio[np.newaxis], env_alineada[np.newaxis])[0][0] == pytest.approx(0, abs=0.5)
+
+
+def test_desplazar_notas_antes_del_inicio():
+    notas = np.zeros(3, dtype=midi_utils.NOTAS_DTYPE)
+    notas['nota'] = [60, 62, 64]
+    notas['inicio'] = [0, 480, 1440]
+    notas['fin'] = [480, 960, 1920]
+    notas['velocity'] = 80
+
+    # -1000 ticks (500000 us por negra, 480 ticks por negra)
+    desfase = -1000 * 500000 / 480 * 1e-6
+    desplazadas = alineacion.desplazar_notas(notas, desfase, 500000, 480)
+    # La primera nota termina antes del tick 0 y se elimina
+    assert desplazadas['nota'].tolist() == [64]
+    assert desplazadas['inicio'].tolist() == [440]
+    assert desplazadas['fin'].tolist() == [920]
+
+    # Una nota que comienza antes del tick 0 y termina después se recorta al 0
+    desplazadas = alineacion.desplazar_notas(notas, -700 * 500000 / 480 * 1e-6, 500000, 480)
+    assert desplazadas['nota'].tolist() == [62, 64]
+    assert desplazadas['inicio'].tolist() == [0, 740]
+    assert desplazadas['fin'].tolist() == [260, 1220]
+
+    # La tabla original no se modifica
+    assert notas['inicio'].tolist() == [0, 480, 1440]
@@ -0,0 +1,82 @@
+import os
+import numpy as np
+import pytest
+import soundfile
+
+from utils import cache_audio
+
+
+def _wav(tmp_path):
+    path = tmp_path / 'tarareo.wav'
+    soundfile.write(path, np.zeros(1600, dtype=np.float32), 16000)
+    return str(path)
+
+
+def test_fallo_al_guardar_no_deja_temporales(tmp_path, monkeypatch):
+    cache = tmp_path / 'cache'
+
+    def save(*args, **kwargs):
+        raise OSError('disco lleno')
+    monkeypatch.setattr(cache_audio.np, 'save', save)
+    with pytest.raises(OSError):
+        cache_audio.cargar(_wav(tmp_path), sr=None, directorio=str(cache))
+    assert os.listdir(cache) == []
+
+
+def test_acierto_tolera_utime(tmp_path, monkeypatch):
+    cache, wav = str(tmp_path / 'cache'), _wav(tmp_path)
+    y, _ = cache_audio.cargar(wav, sr=None, directorio=cache)
+
+    def utime(*args, **kwargs):
+        raise PermissionError('sólo lectura')
+    monkeypatch.setattr(cache_audio.os, 'utime', utime)
+    y_cache, _ = cache_audio.cargar(wav, sr=None, directorio=cache)
+    assert np.array_equal(y, y_cache)
+
+
+def test_desalojar_omite_archivos_desaparecidos(tmp_path, monkeypatch):
+    for i in range(3):
+        np.save(tmp_path / f'{i}.npy', np.zeros(100, dtype=np.float32))
+
+    # Un archivo que otro proceso borra entre el listado y el stat
+    scandir = os.scandir
+    def scandir_con_carrera(directorio):
+        entradas = list(scandir(directorio))
+        os.remove(entradas[0].path)
+        return iter(entradas)
+    monkeypatch.setattr(cache_audio.os, 'scandir', scandir_con_carrera)
+
+    cache_audio.desalojar(str(tmp_path), max_bytes=0)
+    assert os.listdir(tmp_path) == []
+
+
+def _wavs(tmp_path, n):
+    paths = []
+    for i in range(n):
+        path = tmp_path / f'tarareo_{i}.wav'
+        soundfile.write(path, np.full(1600, i / n, dtype=np.float32), 16000)
+        paths.append(str(path))
+    return paths
+
+
+def test_llenado_no_recorre_la_carpeta_en_cada_escritura(tmp_path, monkeypatch):
+    cache = str(tmp_path / 'cache')
+    recorridos = []
+    scandir = os.scandir
+    monkeypatch.setattr(cache_audio.os, 'scandir', lambda d: recorridos.append(d) or scandir(d))
+
+    for path in _wavs(tmp_path, 40):
+        cache_audio.cargar(path, sr=None, directorio=cache, max_bytes=2**30)
+    assert len(recorridos) == 1
+
+
+def test_llenado_respeta_max_bytes(tmp_path):
+    cache = str(tmp_path / 'cache')
+    max_bytes = 10 * (1600 * 4 + 128)
+    for path in _wavs(tmp_path, 40):
+        cache_audio.cargar(path, sr=None, directorio=cache, max_bytes=max_bytes)
+        assert sum(e.stat().st_size for e in os.scandir(cache)) <= max_bytes
+
+
+def test_huellas_acotadas():
+    assert cache_audio._sha1.cache_info().maxsize is not None
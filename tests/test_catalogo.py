@@ -0,0 +1,134 @@
+import os
+import numpy as np
+import pytest
+
+from utils import catalogo as catalogo_utils
+from utils import preprocess
+from benchmarks import fixtures
+
+
+NOMBRES = ['F01_0001_0001_1', 'F01_0002_0001_1_D', 'M02_0003_0002_2']
+
+
+@pytest.fixture
+def carpeta(tmp_path):
+    carpeta = tmp_path / 'midis'
+    carpeta.mkdir()
+    for seed, nombre in enumerate(NOMBRES):
+        # El primero con note_on de velocity 0: sin note_off, su min_figure queda en 0
+        fixtures.midi_sintetico(20, seed=seed, note_on_cero=seed == 0).save(str(carpeta / f'{nombre}.mid'))
+    return carpeta
+
+
+@pytest.fixture
+def analizados(monkeypatch):
+    # Archivos que pasan por el análisis de MIDI
+    nombres = []
+    analizar = catalogo_utils.ANALIZADORES['midi']
+    def contar(paths):
+        nombres.extend(os.path.basename(p) for p in paths)
+        return analizar(paths)
+    monkeypatch.setitem(catalogo_utils.ANALIZADORES, 'midi', contar)
+    return nombres
+
+
+def _mtime(catalogo, archivo):
+    tabla = catalogo.tablas['midi']
+    return tabla['mtime_ns'][list(tabla['archivo']).index(archivo)]
+
+
+def test_touch_no_vuelve_a_analizar(tmp_path, carpeta, analizados):
+    catalogo = catalogo_utils.Catalogo(str(tmp_path / 'catalogo.npz'))
+    assert catalogo.actualizar(midis=str(carpeta))['midi']['nuevos'] == 3
+    analizados.clear()
+
+    path = carpeta / f'{NOMBRES[1]}.mid'
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    cambios = catalogo.actualizar(midis=str(carpeta))['midi']
+    assert cambios == {'nuevos': 0, 'modificados': 0, 'eliminados': 0, 'sin_cambios': 3}
+    assert analizados == []
+    # El mtime nuevo queda registrado, así que la siguiente vez ni siquiera se calcula el hash
+    assert _mtime(catalogo, f'{NOMBRES[1]}.mid') == stat.st_mtime_ns + 10**9
+
+
+def test_contenido_modificado_y_eliminado(tmp_path, carpeta, analizados):
+    catalogo = catalogo_utils.Catalogo(str(tmp_path / 'catalogo.npz'))
+    catalogo.actualizar(midis=str(carpeta))
+    analizados.clear()
+
+    fixtures.midi_sintetico(35, seed=9).save(str(carpeta / f'{NOMBRES[2]}.mid'))
+    os.remove(carpeta / f'{NOMBRES[0]}.mid')
+    cambios = catalogo.actualizar(midis=str(carpeta))['midi']
+    assert cambios == {'nuevos': 0, 'modificados': 1, 'eliminados': 1, 'sin_cambios': 1}
+    assert analizados == [f'{NOMBRES[2]}.mid']
+
+    esperado = preprocess.escanear_midis([str(carpeta / f'{NOMBRES[2]}.mid')])
+    tabla = catalogo.tablas['midi']
+    assert tabla['archivo'].tolist() == [f'{NOMBRES[1]}.mid', f'{NOMBRES[2]}.mid']
+    assert np.array_equal(tabla['notas_conteo'][1], esperado['notas_conteo'][0])
+
+
+def test_otra_carpeta_reconstruye(tmp_path, carpeta, analizados):
+    catalogo = catalogo_utils.Catalogo(str(tmp_path / 'catalogo.npz'))
+    catalogo.actualizar(midis=str(carpeta))
+    analizados.clear()
+
+    # Mismos archivos en otra carpeta: las huellas anteriores no se usan
+    otra = tmp_path / 'otra'
+    otra.mkdir()
+    for nombre in NOMBRES[:2]:
+        os.link(carpeta / f'{nombre}.mid', otra / f'{nombre}.mid')
+    cambios = catalogo.actualizar(midis=str(otra))['midi']
+    assert cambios == {'nuevos': 2, 'modificados': 0, 'eliminados': 0, 'sin_cambios': 0}
+    assert sorted(analizados) == [f'{nombre}.mid' for nombre in NOMBRES[:2]]
+    assert catalogo.carpetas['midi'] == str(otra)
+
+
+def test_guardar_y_cargar(tmp_path, carpeta, analizados):
+    path = str(tmp_path / 'catalogo.npz')
+    catalogo = catalogo_utils.Catalogo(path)
+    catalogo.actualizar(midis=str(carpeta))
+    analizados.clear()
+
+    cargado = catalogo_utils.Catalogo(path)
+    assert cargado.carpetas == catalogo.carpetas
+    assert cargado.tablas['midi'].keys() == catalogo.tablas['midi'].keys()
+    for columna, valores in catalogo.tablas['midi'].items():
+        assert cargado.tablas['midi'][columna].dtype == valores.dtype
+        assert np.array_equal(cargado.tablas['midi'][columna], valores, equal_nan=valores.dtype.kind == 'f')
+
+    assert cargado.actualizar(midis=str(carpeta))['midi']['sin_cambios'] == 3
+    assert analizados == []
+
+
+def test_version_anterior_se_descarta(tmp_path, carpeta):
+    path = str(tmp_path / 'catalogo.npz')
+    catalogo = catalogo_utils.Catalogo(path)
+    catalogo.actualizar(midis=str(carpeta))
+    with np.load(path) as datos:
+        arreglos = dict(datos)
+    arreglos['version'] = np.array(catalogo_utils.VERSION - 1)
+    np.savez(path, **arreglos)
+
+    assert catalogo_utils.Catalogo(path).tablas['midi'] == {}
+
+
+def test_midis_restaura_tipos_de_escanear_midis(tmp_path, carpeta):
+    catalogo = catalogo_utils.Catalogo(str(tmp_path / 'catalogo.npz'))
+    catalogo.actualizar(midis=str(carpeta))
+    columnas = catalogo.midis()
+    esperado = preprocess.escanear_midis([str(carpeta / f'{nombre}.mid') for nombre in NOMBRES])
+
+    assert columnas['MetaID'].tolist() == [None, 'D', None]
+    assert columnas['min_figure'][0] == 0
+    for nombre, valores in esperado.items():
+        if valores.dtype == object:
+            assert columnas[nombre].tolist() == valores.tolist(), nombre
+        else:
+            assert np.array_equal(columnas[nombre], valores, equal_nan=valores.dtype.kind == 'f'), nombre
+
+    # Las tablas de los CSV salen igual desde el catálogo que desde los archivos
+    df_catalogo, _ = preprocess.tablas_midis(columnas)
+    df_archivos, _ = preprocess.tablas_midis(esperado)
+    assert df_catalogo.equals(df_archivos)
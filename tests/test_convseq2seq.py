@@ -0,0 +1,21 @@
+import torch
+import pytest
+
+from utils import convseq2seq
+from utils.convseq2seq import Encoder, Decoder, Seq2Seq
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 8, 50])
+def test_bloques_equivalen_a_paso_a_paso(chunk_size, monkeypatch):
+    torch.manual_seed(0)
+    model = Seq2Seq(Encoder(input_dim=1378, hidden_dim=8), Decoder(labels_dim=3, embedding_dim=3, hidden_dim=8),
+                    'cpu', chunk_size=chunk_size).eval()
+    src, trg = torch.rand(4, 1378, 20), torch.randint(0, 3, (4, 20))
+
+    with torch.no_grad():
+        # Todas las monedas en teacher forcing: igual a la llamada única del decoder
+        monkeypatch.setattr(convseq2seq.random, 'random', lambda: 0.0)
+        torch.testing.assert_close(model(src, trg, 0.5), model(src, trg, 1.0))
+        # Ninguna: igual a la decodificación libre
+        monkeypatch.setattr(convseq2seq.random, 'random', lambda: 1.0)
+        torch.testing.assert_close(model(src, trg, 0.5), model(src, trg, 0.0))
@@ -0,0 +1,25 @@
+import numpy as np
+import torch
+
+from utils import cuantizacion, inferencia
+from benchmarks import fixtures
+
+
+def test_exportar_y_cargar_con_weights_only(tmp_path):
+    salida = cuantizacion.exportar(salida=str(tmp_path / 'modelo_int8.pt'))
+    torch.load(salida, weights_only=True)
+    model_int8 = inferencia.cargar_modelo(salida, cuantizado=True)
+    model = inferencia.cargar_modelo()
+
+    notas = fixtures.notas_sinteticas(12, seed=2)
+    audio = fixtures.tarareo_sintetico(notas, 500000, 480, sr=inferencia.SR)
+    frames = inferencia.preparar(audio, inferencia.SR)
+    src = torch.from_numpy(frames).unsqueeze(0)
+    pasos = frames.shape[1]
+
+    with torch.inference_mode():
+        preds_int8 = inferencia.decodificar_greedy(model_int8, src, pasos)
+        # Los mismos pesos que el modelo cuantizado en memoria
+        assert torch.equal(preds_int8, inferencia.decodificar_greedy(cuantizacion.cuantizar(model), src, pasos))
+        preds = inferencia.decodificar_greedy(model, src, pasos)
+    assert np.mean((preds_int8 == preds).numpy()) >= 0.9
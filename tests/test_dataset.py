@@ -0,0 +1,53 @@
+import torch
+
+from utils import dataset
+
+
+class _Marcadas(torch.utils.data.Dataset):
+    # Cada muestra está llena con su propio índice para identificarla dentro del lote
+    def __len__(self):
+        return 64
+
+    def __getitem__(self, idx):
+        return torch.full((6, 5), float(idx)), torch.full((5,), idx % 3, dtype=torch.int8)
+
+
+def _revisar(loader, batch_size):
+    for b, (audios, labels) in enumerate(loader):
+        esperado = torch.arange(b * batch_size, (b + 1) * batch_size, dtype=torch.float32)
+        assert torch.equal(audios[:, :6, :5].amax(dim=(1, 2)), esperado), f'lote {b}'
+        assert torch.equal(labels[:, :5], (esperado.long() % 3)[:, None].expand(-1, 5)), f'lote {b}'
+
+
+def test_colador_con_workers_no_mezcla_lotes():
+    loader = torch.utils.data.DataLoader(_Marcadas(), batch_size=4, num_workers=1, prefetch_factor=4,
+                                         collate_fn=dataset.ColadorPrealocado(pin_memory=False))
+    _revisar(loader, 4)
+
+
+def test_colador_en_proceso_principal():
+    loader = torch.utils.data.DataLoader(_Marcadas(), batch_size=4, num_workers=0,
+                                         collate_fn=dataset.ColadorPrealocado(pin_memory=False))
+    _revisar(loader, 4)
+
+
+def test_etiquetas_sin_columnas_de_relleno():
+    colador = dataset.ColadorPrealocado(multiplo=8, pin_memory=False)
+    batch = [(torch.ones(6, 5), torch.ones(5, dtype=torch.int8)), (torch.ones(6, 3), torch.ones(11, dtype=torch.int8))]
+    audios, labels = colador(batch)
+    assert audios.shape == (2, 6, 8)
+    assert labels.shape == (2, 11)
+    assert labels[0, 5:].eq(0).all() and labels[1].eq(1).all()
+
+
+def test_lote_se_reutiliza_tras_n_buffers():
+    colador = dataset.ColadorPrealocado(n_buffers=2, pin_memory=False)
+    muestras = _Marcadas()
+    copia = colador([muestras[i] for i in range(4)])[0].clone()
+    lotes = [colador([muestras[i] for i in range(b * 4, (b + 1) * 4)]) for b in range(1, 4)]
+
+    # El tercer lote escribió sobre el primero; el segundo y la copia siguen intactos
+    assert lotes[2][0].data_ptr() == lotes[0][0].data_ptr()
+    assert torch.equal(lotes[0][0][:, :6, :5].amax(dim=(1, 2)), torch.arange(12, 16, dtype=torch.float32))
+    assert torch.equal(lotes[1][0][:, :6, :5].amax(dim=(1, 2)), torch.arange(8, 12, dtype=torch.float32))
+    assert torch.equal(copia[:, :6, :5].amax(dim=(1, 2)), torch.arange(0, 4, dtype=torch.float32))
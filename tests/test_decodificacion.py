@@ -0,0 +1,53 @@
+import torch
+import pytest
+
+from utils import decodificacion, inferencia
+from utils.convseq2seq import Encoder, Decoder, Seq2Seq
+
+
+def _modelo(seed, sesgo_2=0.0):
+    torch.manual_seed(seed)
+    model = Seq2Seq(Encoder(input_dim=1378, hidden_dim=8), Decoder(labels_dim=3, embedding_dim=3, hidden_dim=8),
+                    'cpu').eval()
+    with torch.no_grad():
+        model.decoder.fc.bias[2] += sesgo_2
+    return model
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_haz_de_uno_igual_a_greedy(seed):
+    model = _modelo(seed)
+    src = torch.rand(5, 1378, 20)
+    ventanas = torch.tensor([20, 7, 12, 20, 3])
+
+    with torch.inference_mode():
+        greedy = inferencia.decodificar_greedy(model, src, 20, ventanas)
+    preds, _ = decodificacion.beam_search(model, src, 20, k=1, gramatica=False, ventanas=ventanas)
+    assert torch.equal(preds, greedy)
+
+
+@pytest.mark.parametrize('k', [1, 4])
+def test_gramatica_sin_2_despues_de_silencio(k):
+    # Decoder sesgado hacia "2": sin la máscara aparece justo después de <SOS> o de un silencio
+    model = _modelo(0, sesgo_2=2.0)
+    src = torch.rand(6, 1378, 20)
+
+    sin_gramatica, _ = decodificacion.beam_search(model, src, 30, k=k, gramatica=False)
+    assert ((sin_gramatica[:, :-1] == 0) & (sin_gramatica[:, 1:] == 2)).any()
+
+    preds, _ = decodificacion.beam_search(model, src, 30, k=k)
+    assert (preds[:, 1] != 2).all()
+    assert not ((preds[:, :-1] == 0) & (preds[:, 1:] == 2)).any()
+
+
+def test_puntaje_es_log_probabilidad():
+    model = _modelo(1)
+    src = torch.rand(3, 1378, 20)
+    preds, puntajes = decodificacion.beam_search(model, src, 12, k=3, gramatica=False)
+
+    # Log-probabilidad de la hipótesis con teacher forcing sobre sus propios códigos
+    with torch.inference_mode():
+        hidden, cell = decodificacion.codificar(model, src)
+        logits, _, _ = model.decoder.forward_secuencia(preds[:, :-1], hidden, cell)
+        logp = torch.log_softmax(logits, dim=-1).gather(2, preds[:, 1:].unsqueeze(-1)).sum(dim=(1, 2))
+    torch.testing.assert_close(puntajes, logp)
@@ -0,0 +1,75 @@
+import random
+import numpy as np
+import torch
+
+from utils import dataset, entrenamiento
+from utils.convseq2seq import Encoder, Decoder, Seq2Seq
+
+
+def _muestras(n=12, L=1378, seed=0):
+    rng = np.random.default_rng(seed)
+    return [(torch.from_numpy(rng.random((L, int(rng.integers(12, 20))), dtype=np.float32)),
+             torch.from_numpy(rng.integers(0, 3, int(rng.integers(12, 20))).astype(np.int8))) for _ in range(n)]
+
+
+def _entrenar(directorio, muestras, hasta, seed):
+    # Modelo y generadores distintos en cada "sesión": todo lo necesario viene del checkpoint
+    torch.manual_seed(seed)
+    random.seed(seed)
+    model = Seq2Seq(Encoder(input_dim=1378, hidden_dim=8), Decoder(labels_dim=3, embedding_dim=3, hidden_dim=8), 'cpu')
+    optimizer = torch.optim.Adam(model.parameters())
+    longitudes = [(a.shape[1], b.shape[0]) for a, b in muestras]
+    muestreador = dataset.MuestreadorPorLongitud(longitudes, batch_size=4, lotes_por_grupo=1)
+    loader = torch.utils.data.DataLoader(muestras, batch_sampler=muestreador,
+                                         collate_fn=dataset.ColadorPrealocado(pin_memory=False))
+    criterion = torch.nn.CrossEntropyLoss()
+
+    with entrenamiento.GestorCheckpoints(directorio, k=2) as gestor:
+        estado = gestor.reanudar(model, optimizer, muestreador=muestreador)
+        inicio = estado['epoca'] if estado else 0
+        for epoch in range(inicio, hasta):
+            muestreador.set_epoch(epoch)
+            entrenamiento.train_fn(model, loader, optimizer, criterion, 1.0, 0.5, 'cpu')
+            valid_loss = entrenamiento.evaluate_fn(model, loader, criterion, 'cpu')
+            gestor.guardar(epoch + 1, model, optimizer, valid_loss, muestreador=muestreador)
+    return model
+
+
+def test_reanudar_es_exacto(tmp_path):
+    muestras = _muestras()
+    continuo = _entrenar(tmp_path / 'continuo', muestras, 3, seed=0)
+    _entrenar(tmp_path / 'reanudado', muestras, 1, seed=0)
+    reanudado = _entrenar(tmp_path / 'reanudado', muestras, 3, seed=123)
+
+    for (nombre, a), b in zip(continuo.state_dict().items(), reanudado.state_dict().values()):
+        assert torch.equal(a, b), nombre
+
+
+def test_perdida_omite_sos_de_cada_muestra():
+    output, trg = torch.randn(4, 6, 3), torch.randint(0, 3, (4, 6))
+    criterion = torch.nn.CrossEntropyLoss()
+    esperada = criterion(output[:, 1:].permute(0, 2, 1), trg[:, 1:])
+    torch.testing.assert_close(entrenamiento._perdida(output, trg, criterion), esperada)
+
+
+def test_guardar_no_espera_con_una_escritura_en_curso(tmp_path, monkeypatch):
+    import time
+    import threading
+
+    model = torch.nn.Linear(2, 2)
+    optimizer = torch.optim.SGD(model.parameters(), lr=0.1)
+    liberar = threading.Event()
+    escribir = entrenamiento._escribir_atomico
+    monkeypatch.setattr(entrenamiento, '_escribir_atomico', lambda *a: liberar.wait(10) and escribir(*a))
+
+    with entrenamiento.GestorCheckpoints(tmp_path, k=2) as gestor:
+        temporizador = threading.Timer(2.0, liberar.set)
+        temporizador.start()
+        inicio = time.perf_counter()
+        gestor.guardar(1, model, optimizer, 1.0) # En curso
+        gestor.guardar(2, model, optimizer, 0.5) # En cola
+        assert time.perf_counter() - inicio < 1.0
+        gestor.guardar(3, model, optimizer, 0.7) # Espera a la primera
+        assert time.perf_counter() - inicio >= 1.5
+    temporizador.join()
+    assert gestor.reanudar(model, optimizer)['epoca'] == 3
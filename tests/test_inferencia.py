@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from utils import inferencia
+
+
+@pytest.fixture(scope='module')
+def transcriptor():
+    return inferencia.Transcriptor(batch_size=8)
+
+
+def _tarareo(segundos, seed):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(segundos * inferencia.SR)) / inferencia.SR
+    f0 = 220 * 2 ** (rng.integers(0, 12, 8) / 12)
+    return (0.5 * np.sin(2 * np.pi * f0[(t * 8 / segundos).astype(int) % 8] * t)).astype(np.float32)
+
+
+@pytest.mark.parametrize('haz', [1, 3])
+def test_transcripcion_no_depende_del_lote(transcriptor, haz, monkeypatch):
+    monkeypatch.setattr(transcriptor, 'haz', haz)
+    a, b = _tarareo(2.0, 0), _tarareo(4.0, 1)
+    solo = transcriptor.transcribir([a])[0]
+    en_lote = transcriptor.transcribir([a, b])
+    assert np.array_equal(solo, en_lote[0])
+    assert np.array_equal(transcriptor.transcribir([b])[0], en_lote[1])
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from sklearn import metrics
+
+from utils.metricas import MatrizConfusion, levenshtein_lote, mascara_longitudes
+
+
+def _levenshtein(a, b):
+    # Programación dinámica directa
+    D = np.zeros((len(a) + 1, len(b) + 1), dtype=np.int64)
+    D[:, 0] = np.arange(len(a) + 1)
+    D[0, :] = np.arange(len(b) + 1)
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            D[i, j] = min(D[i - 1, j] + 1, D[i, j - 1] + 1, D[i - 1, j - 1] + (a[i - 1] != b[j - 1]))
+    return D[-1, -1]
+
+
+def _lote(rng, B, K):
+    # Lote con padding y longitudes irregulares, incluidas secuencias vacías
+    longitudes = rng.integers(0, K + 1, B)
+    longitudes[0] = 0
+    longitudes[1] = K
+    return rng.integers(0, 3, (B, K)), longitudes
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_matriz_confusion_como_sklearn(seed):
+    rng = np.random.default_rng(seed)
+    confusion = MatrizConfusion(3)
+    todos_targets, todas_preds = [], []
+    for _ in range(4):
+        targets, longitudes = _lote(rng, 8, 12)
+        preds = rng.integers(0, 3, targets.shape)
+        mascara = mascara_longitudes(longitudes, targets.shape[1])
+        confusion.actualizar(targets, preds, mascara)
+        todos_targets.append(targets[mascara])
+        todas_preds.append(preds[mascara])
+
+    y_true, y_pred = np.concatenate(todos_targets), np.concatenate(todas_preds)
+    assert np.array_equal(confusion.matriz, metrics.confusion_matrix(y_true, y_pred, labels=[0, 1, 2]))
+    assert confusion.accuracy() == pytest.approx(metrics.accuracy_score(y_true, y_pred))
+    esperado = metrics.precision_recall_fscore_support(y_true, y_pred, labels=[0, 1, 2],
+                                                       average='weighted', zero_division=0)[:3]
+    assert confusion.ponderadas() == pytest.approx(esperado)
+
+
+def test_matriz_confusion_clase_ausente():
+    # Sin predicciones de la clase 2: precision 0 en lugar de división entre cero
+    confusion = MatrizConfusion(3)
+    y_true, y_pred = np.array([0, 1, 2, 2]), np.array([0, 1, 1, 0])
+    confusion.actualizar(y_true, y_pred)
+    esperado = metrics.precision_recall_fscore_support(y_true, y_pred, labels=[0, 1, 2],
+                                                       average='weighted', zero_division=0)[:3]
+    assert confusion.ponderadas() == pytest.approx(esperado)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_levenshtein_lote_como_dp(seed):
+    rng = np.random.default_rng(seed)
+    a, longitudes_a = _lote(rng, 16, 10)
+    b, longitudes_b = _lote(rng, 16, 7)
+    longitudes_b[2] = 0 # Ambas vacías en la fila 0; sólo `b` vacía en la fila 2
+
+    distancias = levenshtein_lote(a, b, longitudes_a, longitudes_b)
+    esperadas = [_levenshtein(a[i, :longitudes_a[i]], b[i, :longitudes_b[i]]) for i in range(len(a))]
+    assert distancias.tolist() == esperadas
+
+
+def test_levenshtein_lote_sin_longitudes():
+    rng = np.random.default_rng(0)
+    a, b = rng.integers(0, 3, (5, 6)), rng.integers(0, 3, (5, 9))
+    assert levenshtein_lote(a, b).tolist() == [_levenshtein(x, y) for x, y in zip(a, b)]
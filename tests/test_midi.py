@@ -0,0 +1,86 @@
+import mido
+import numpy as np
+import pytest
+
+from utils import midi
+from benchmarks import fixtures
+
+
+def _ambos(m, N, T):
+    anterior = np.array(midi.midi2vec(m, N, T), dtype=np.int8)[:N]
+    return anterior, midi.eventos2vec(midi.midi2eventos(m), N, T)
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_eventos2vec_igual_a_midi2vec_en_reticula_alineada(seed):
+    # Figuras múltiplos de 1/16 de negra (0.125 s a 120 bpm) y T/N = 0.125 s
+    anterior, nuevo = _ambos(fixtures.midi_sintetico(30, seed=seed), 160, 20.0)
+    assert np.array_equal(nuevo[:len(anterior)], anterior)
+    assert not nuevo[len(anterior):].any()
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_eventos2vec_no_acumula_redondeos(seed):
+    # T/N = 0.1 s no divide a las figuras: midi2vec se recorre hacia el inicio, eventos2vec no
+    N, T = 200, 20.0
+    m = fixtures.midi_sintetico(30, seed=seed)
+    anterior, nuevo = _ambos(m, N, T)
+
+    inicios = np.floor(midi.midi2eventos(m)[:, 0] / (T / N) + 1e-6).astype(np.int64)
+    inicios = inicios[inicios < N]
+    assert np.array_equal(np.flatnonzero(nuevo == 1), inicios)
+
+    inicios_anterior = np.flatnonzero(anterior == 1)
+    assert np.all(inicios_anterior <= inicios[:len(inicios_anterior)])
+    assert not np.array_equal(anterior, nuevo[:len(anterior)])
+
+
+def test_midi2notas_cierra_nota_reiniciada():
+    # note_on repetido del mismo tono sin note_off intermedio
+    track = mido.MidiTrack([mido.Message('note_on', note=60, velocity=80, time=0),
+                            mido.Message('note_on', note=60, velocity=90, time=240),
+                            mido.Message('note_off', note=60, velocity=0, time=480)])
+    m = mido.MidiFile(ticks_per_beat=480)
+    m.tracks.append(track)
+
+    notas, _, _ = midi.midi2notas(m)
+    assert notas[['inicio', 'fin', 'velocity']].tolist() == [(0, 240, 80), (240, 720, 90)]
+
+
+def _vectores(N=60, seed=0):
+    # Vectores 0,1,2 válidos: aleatorios, todo silencio y una nota que llega hasta el final
+    rng = np.random.default_rng(seed)
+    vecs = []
+    for _ in range(4):
+        vec = np.zeros(N, dtype=np.int64)
+        i = int(rng.integers(0, 3))
+        while i < N:
+            largo = int(rng.integers(1, 8))
+            vec[i] = 1
+            vec[i + 1:i + largo] = 2
+            i += largo + int(rng.integers(0, 4))
+        vecs.append(vec)
+    vecs.append(np.zeros(N, dtype=np.int64))
+    hasta_el_final = np.zeros(N, dtype=np.int64)
+    hasta_el_final[N - 10] = 1
+    hasta_el_final[N - 9:] = 2
+    vecs.append(hasta_el_final)
+    vecs.append(np.concatenate(([1], np.full(N - 1, 2))))
+    return np.stack(vecs)
+
+
+@pytest.mark.parametrize('tempo', [midi.TEMPO_DEFAULT, 731234])
+def test_vec2midi_lote_igual_a_vec2midi(tmp_path, tempo):
+    vecs, L_segs = _vectores(), 0.0232
+    paths = [str(tmp_path / f'lote_{i}.mid') for i in range(len(vecs))]
+    midi.vec2midi_lote(vecs, L_segs, paths, tempo=tempo, n_hilos=2)
+
+    for vec, path in zip(vecs, paths):
+        esperado = str(tmp_path / 'esperado.mid')
+        midi.vec2midi(vec, L_segs, tempo=tempo).save(esperado)
+        with open(path, 'rb') as f, open(esperado, 'rb') as g:
+            assert f.read() == g.read()
+
+        notas = midi.vec2notas(vec, L_segs, tempo=tempo)
+        with open(esperado, 'rb') as g:
+            assert midi.notas2bytes(notas, 480, tempo) == g.read()
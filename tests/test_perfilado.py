@@ -0,0 +1,35 @@
+import time
+import pytest
+
+from utils import perfilado
+
+
+@pytest.fixture
+def directorio(tmp_path):
+    perfilado.activar(str(tmp_path / 'activo'))
+    yield tmp_path
+    perfilado.desactivar()
+
+
+def test_resumen_separa_tiempo_propio(directorio):
+    with perfilado.etapa('modelo.forward'):
+        time.sleep(0.01)
+        with perfilado.etapa('modelo.encoder'):
+            time.sleep(0.02)
+        with perfilado.etapa('modelo.decoder'):
+            time.sleep(0.03)
+
+    datos = perfilado.resumen(str(directorio / 'activo'))
+    forward = datos['modelo.forward']
+    hijas = datos['modelo.encoder']['total_s'] + datos['modelo.decoder']['total_s']
+    assert forward['propio_s'] == pytest.approx(forward['total_s'] - hijas, abs=1e-5)
+    assert 0.005 < forward['propio_s'] < 0.05
+    assert datos['modelo.encoder']['propio_s'] == datos['modelo.encoder']['total_s']
+
+
+def test_resumen_de_otro_directorio_incluye_pendientes(directorio):
+    with perfilado.etapa('audio.cargar', 100):
+        pass
+    datos = perfilado.resumen(str(directorio / 'otro'))
+    assert datos['audio.cargar']['llamadas'] == 1
+    assert datos['audio.cargar']['bytes'] == 100
@@ -0,0 +1,44 @@
+import mido
+import numpy as np
+import pytest
+import soundfile
+
+from utils import midi, pipeline, tarareos, cache_audio
+from benchmarks import fixtures
+
+
+def _tarea(nombre, divisor):
+    # Falla con los nombres impares
+    if nombre % 2:
+        raise ValueError(f'archivo {nombre} dañado')
+    return nombre // divisor
+
+
+@pytest.mark.parametrize('n_workers', [1, 2])
+def test_ejecutar_reporta_fallas_sin_abortar(n_workers):
+    resultados, fallas = pipeline.ejecutar(_tarea, range(10), n_workers=n_workers, chunksize=3, divisor=2)
+    assert resultados == {n: n // 2 for n in range(0, 10, 2)}
+    assert sorted(fallas) == list(range(1, 10, 2))
+    assert all('Traceback' in tb and f'archivo {n} dañado' in tb for n, tb in fallas.items())
+
+
+@pytest.mark.parametrize('recortar_ventanas', [False, True])
+def test_procesar_tarareo(tmp_path, monkeypatch, recortar_ventanas):
+    monkeypatch.setattr(cache_audio, 'DIRECTORIO', str(tmp_path / 'cache'))
+    notas = fixtures.notas_sinteticas(8)
+    midi.notas2midi(notas, 480, 500000).save(tmp_path / 'a.mid')
+    y = fixtures.tarareo_sintetico(notas, 500000, 480, silencio_inicial=0.5)
+    soundfile.write(tmp_path / 'a.wav', y, 22050)
+
+    for carpeta in ('frames', 'espectros'):
+        (tmp_path / carpeta).mkdir()
+    pipeline.procesar_tarareo('a', str(tmp_path), str(tmp_path), str(tmp_path / 'frames'),
+                              str(tmp_path / 'espectros'), 0.0625, (80, 1000), recortar_ventanas=recortar_ventanas)
+
+    # Por omisión, como el preprocesamiento original: ventanas del audio completo
+    y, sr = tarareos.cargar_audio(str(tmp_path / 'a.wav'))
+    y_recortado = tarareos.trim(y, sr, mido.MidiFile(tmp_path / 'a.mid').length, top_db=55)
+    y_abs = np.abs(y_recortado)
+    fuente = y_recortado if recortar_ventanas else y
+    esperadas, _ = tarareos.dividir_en_ventanas((fuente - y_abs.min()) / (y_abs.max() - y_abs.min()), sr, 0.0625)
+    np.testing.assert_array_equal(np.load(tmp_path / 'frames' / 'a_frames.npy'), esperadas)
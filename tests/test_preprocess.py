@@ -0,0 +1,75 @@
+import math
+import mido
+import numpy as np
+import pytest
+
+from benchmarks import fixtures
+from utils import preprocess
+from utils import midi as midi_utils
+
+
+def _dos_pistas(path):
+    # Pista de tempo separada y un cambio de tempo a mitad de la pieza (MIDI tipo 1)
+    original = fixtures.midi_sintetico(20, seed=3, silencio_inicial=300)
+    notas = mido.MidiTrack(msg for msg in original.tracks[0] if msg.type != 'set_tempo')
+    tempos = mido.MidiTrack([mido.MetaMessage('set_tempo', tempo=600000, time=0),
+                             mido.MetaMessage('set_tempo', tempo=400000, time=2000),
+                             mido.MetaMessage('end_of_track', time=0)])
+    midi = mido.MidiFile(type=1, ticks_per_beat=original.ticks_per_beat)
+    midi.tracks.extend([tempos, notas])
+    midi.save(path)
+
+
+@pytest.mark.parametrize('kwargs', [{}, {'silencio_inicial': 700, 'tempo': 650000},
+                                    {'note_on_cero': True, 'seed': 4}, None])
+def test_paridad_con_analizar_archivo(tmp_path, kwargs):
+    path = str(tmp_path / 'H001_Pop_01_01.mid')
+    if kwargs is None:
+        _dos_pistas(path)
+    else:
+        fixtures.midi_sintetico(30, **kwargs).save(path)
+    columnas = preprocess.escanear_midis([path])
+
+    midi = mido.MidiFile(path)
+    info, conteo = preprocess.analizar_archivo(midi)
+    duration, tempo_ms, _, _, nota_min, nota_max = info[:6]
+    assert columnas['duration'][0] == pytest.approx(duration)
+    assert columnas['tempo_ms'][0] == tempo_ms
+    assert columnas['min_nota'][0] == nota_min
+    assert columnas['max_nota'][0] == nota_max
+    assert np.array_equal(columnas['notas_conteo'][0], conteo)
+
+    # Tablas de tipo como las construía el notebook 1a
+    _, tempo, velocity, offset_sec = midi_utils.first_note_data(midi)
+    assert columnas['problem?'][0] == midi_utils.detect_note_on_consecutives(midi)
+    assert columnas['velocity'][0] == velocity
+    assert columnas['offset_sec'][0] == pytest.approx(offset_sec)
+    assert columnas['offset_tick'][0] == round(mido.second2tick(offset_sec, midi.ticks_per_beat, tempo))
+
+
+def test_min_time_es_el_minimo(tmp_path):
+    # analizar_archivo comparaba ticks contra segundos; escanear_midis toma el mínimo real
+    path = str(tmp_path / 'H001_Pop_01_01.mid')
+    fixtures.midi_sintetico(30).save(path)
+    columnas = preprocess.escanear_midis([path])
+
+    midi = mido.MidiFile(path)
+    ticks = min(msg.time for msg in midi.tracks[0] if msg.type == 'note_off' and msg.velocity == 0)
+    assert columnas['min_time'][0] == pytest.approx(mido.tick2second(ticks, midi.ticks_per_beat, 500000))
+
+
+def test_archivo_sin_notas(tmp_path):
+    path = str(tmp_path / 'H001_Pop_01_01.mid')
+    midi = mido.MidiFile(ticks_per_beat=480)
+    midi.tracks.append(mido.MidiTrack([mido.MetaMessage('end_of_track', time=960)]))
+    midi.save(path)
+
+    columnas = preprocess.escanear_midis([path])
+    assert math.isnan(columnas['min_nota'][0]) and math.isnan(columnas['max_nota'][0])
+    assert columnas['tempo_ms'][0] == 500000
+    assert columnas['duration'][0] == pytest.approx(midi.length)
+
+    df_archivo, _ = preprocess.tablas_midis(columnas)
+    assert df_archivo['min_nota'].isna().all()
+    assert df_archivo['max_freq'].isna().all()
+    assert df_archivo['min_cifrado'][0] is None and df_archivo['max_cifrado'][0] is None
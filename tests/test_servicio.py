@@ -0,0 +1,88 @@
+import io
+import asyncio
+import numpy as np
+import soundfile
+
+from utils import servicio
+
+
+class _Fallido:
+    # Transcriptor cuyo modelo siempre falla
+    def transcribir_frames(self, frames):
+        raise RuntimeError('sin memoria')
+
+
+def _wav():
+    buffer = io.BytesIO()
+    t = np.arange(16000) / 16000
+    soundfile.write(buffer, 0.5 * np.sin(2 * np.pi * 220 * t), 16000, format='WAV')
+    return buffer.getvalue()
+
+
+async def _solicitud(reader, writer, crudo):
+    writer.write(crudo)
+    await writer.drain()
+    estado = int((await reader.readline()).split()[1])
+    largo = 0
+    while (linea := await reader.readline()) not in (b'\r\n', b''):
+        nombre, _, valor = linea.decode('latin-1').partition(':')
+        if nombre.lower() == 'content-length':
+            largo = int(valor)
+    await reader.readexactly(largo)
+    return estado
+
+
+def test_errores_y_cierre():
+    async def prueba():
+        s = servicio.Servicio(_Fallido(), n_workers=1)
+        puerto = await s.iniciar(puerto=0)
+
+        reader, writer = await asyncio.open_connection('127.0.0.1', puerto)
+        assert await _solicitud(reader, writer, b'POST /transcribir HTTP/1.1\r\nContent-Length: abc\r\n\r\n') == 400
+        writer.close()
+
+        cuerpo = _wav()
+        reader, writer = await asyncio.open_connection('127.0.0.1', puerto)
+        crudo = f'POST /transcribir HTTP/1.1\r\nContent-Length: {len(cuerpo)}\r\n\r\n'.encode() + cuerpo
+        assert await _solicitud(reader, writer, crudo) == 500
+        assert await _solicitud(reader, writer, b'GET /salud HTTP/1.1\r\n\r\n') == 200
+
+        # La conexión keep-alive queda ociosa; detener() debe cerrarla en lugar de esperarla
+        await asyncio.wait_for(s.detener(), 10)
+        assert await reader.read() == b''
+        writer.close()
+
+    asyncio.run(prueba())
+
+
+def test_limites_de_lectura():
+    async def prueba():
+        s = servicio.Servicio(_Fallido(), n_workers=1, tiempo_inactivo=0.2, tiempo_lectura=0.2, max_linea=1024,
+                              max_encabezados=10)
+        puerto = await s.iniciar(puerto=0)
+
+        async def estado(crudo):
+            reader, writer = await asyncio.open_connection('127.0.0.1', puerto)
+            try:
+                return await asyncio.wait_for(_solicitud(reader, writer, crudo), 10)
+            finally:
+                writer.close()
+
+        assert await estado(b'GET /' + b'a' * 2000 + b' HTTP/1.1\r\n\r\n') == 400
+        assert await estado(b'GET /salud HTTP/1.1\r\nX-Largo: ' + b'a' * 2000 + b'\r\n\r\n') == 431
+        muchos = b''.join(b'X-%d: 1\r\n' % i for i in range(11))
+        assert await estado(b'GET /salud HTTP/1.1\r\n' + muchos + b'\r\n') == 431
+        # Encabezados que nunca terminan
+        assert await estado(b'GET /salud HTTP/1.1\r\nHost: x\r\n') == 408
+        # Cuerpo incompleto
+        assert await estado(b'POST /transcribir HTTP/1.1\r\nContent-Length: 100\r\n\r\nabc') == 408
+
+        # Una conexión keep-alive ociosa se cierra sola, sin esperar a detener()
+        reader, writer = await asyncio.open_connection('127.0.0.1', puerto)
+        assert await _solicitud(reader, writer, b'GET /salud HTTP/1.1\r\n\r\n') == 200
+        assert await asyncio.wait_for(reader.read(), 10) == b''
+        writer.close()
+
+        await asyncio.wait_for(s.detener(), 10)
+
+    asyncio.run(prueba())
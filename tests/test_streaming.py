@@ -0,0 +1,34 @@
+import numpy as np
+
+from utils import streaming, inferencia
+
+
+def _tarareo(envolvente, sr=inferencia.SR):
+    rng = np.random.default_rng(0)
+    t = np.arange(3 * sr) / sr
+    silencio = 1e-4 * rng.standard_normal(int(0.3 * sr))
+    return np.concatenate((silencio, envolvente(t) * np.sin(2 * np.pi * 220 * t))).astype(np.float32)
+
+
+def _frames(audio, **kwargs):
+    frente = streaming.FrenteStreaming((100, 1000), sr=inferencia.SR, L_seg=inferencia.L_SEG,
+                                       top_db=inferencia.TOP_DB, **kwargs)
+    salidas = [frente.procesar(audio[i:i + 2205]).frames for i in range(0, len(audio), 2205)]
+    return np.concatenate(salidas + [frente.terminar().frames])
+
+
+def test_ventanas_normalizadas_como_preparar():
+    # El pico cae dentro de la espera: mismas ventanas que el procesamiento del archivo completo
+    audio = _tarareo(lambda t: 0.8 * np.exp(-t / 2))
+    esperadas = inferencia.preparar(audio, inferencia.SR)[:, 1:-1].T
+    frames = _frames(audio, espera=1.0)
+    assert len(frames) == len(esperadas)
+    np.testing.assert_allclose(frames, esperadas, atol=1e-6)
+
+
+def test_escala_fija_desde_el_corte():
+    # El pico llega después de la espera: la escala no cambia y las ventanas exceden 1
+    audio = _tarareo(lambda t: 0.1 + 0.7 * (t > 2))
+    frames = _frames(audio, espera=1.0)
+    assert np.abs(frames[:10]).max() <= 1
+    assert np.abs(frames).max() > 1
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+import librosa
+
+from utils import tarareos
+
+
+def _audios(sr, n=3, segundos=1.3, seed=0):
+    # Senoidales con ruido, de amplitudes distintas para que cada audio tenga su propio máximo
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(sr * segundos)) / sr
+    frecuencias = rng.uniform(100, 900, (n, 1))
+    amplitudes = rng.uniform(0.1, 1.0, (n, 1))
+    return amplitudes * np.sin(2 * np.pi * frecuencias * t) + 0.01 * rng.standard_normal((n, len(t)))
+
+
+def _librosa(audio, sr, L, freq_range):
+    # Espectrograma original: STFT completa, banda y amplitude_to_db
+    S = np.abs(librosa.stft(audio, n_fft=L, hop_length=L))
+    freqs = librosa.fft_frequencies(sr=sr, n_fft=L)
+    min_index = np.argmax(freqs >= freq_range[0])
+    max_index = np.argmax(freqs > freq_range[1]) - 1
+    return S[min_index:max_index], freqs[min_index:max_index]
+
+
+# Banda angosta (base de Fourier de la banda) y ancha (FFT completa)
+@pytest.mark.parametrize('freq_range', [(50, 1000), (20, 10000)])
+def test_potencia_banda_igual_a_librosa(freq_range):
+    sr, L = 22050, 1024
+    audios = _audios(sr)
+    plan = tarareos.plan_espectrograma(sr, L, freq_range, np.float64)
+    assert (plan.base_real is None) == (freq_range == (20, 10000))
+
+    relleno = np.pad(audios, ((0, 0), (L // 2, L // 2)))
+    n_ventanas = 1 + (relleno.shape[1] - L) // L
+    ventanas = np.lib.stride_tricks.sliding_window_view(relleno, L, axis=1)[:, ::L][:, :n_ventanas]
+    potencia = tarareos.potencia_banda(ventanas, plan)
+
+    for audio, P in zip(audios, potencia):
+        S, freqs = _librosa(audio, sr, L, freq_range)
+        assert np.array_equal(plan.freqs, freqs)
+        assert np.allclose(P.T, S ** 2, rtol=1e-7, atol=1e-9)
+
+
+@pytest.mark.parametrize('freq_range', [(50, 1000), (20, 10000)])
+@pytest.mark.parametrize('dtype', [np.float64, np.float32])
+def test_espectrograma_lote_igual_a_librosa(freq_range, dtype):
+    sr, L = 22050, 1024
+    audios = _audios(sr).astype(dtype)
+    S_db = tarareos.espectrograma_lote(audios, tarareos.plan_espectrograma(sr, L, freq_range, dtype))
+
+    atol = 1e-6 if dtype == np.float64 else 1e-2
+    for audio, S in zip(audios, S_db):
+        esperado = librosa.amplitude_to_db(_librosa(audio, sr, L, freq_range)[0], ref=np.max)
+        assert S.shape == esperado.shape
+        assert np.allclose(S, esperado, atol=atol)
+
+    # Un solo audio por espectrograma() da lo mismo que dentro del lote
+    S_uno, _ = tarareos.espectrograma(audios[1], sr, L, freq_range)
+    assert np.allclose(S_uno, S_db[1], atol=atol)
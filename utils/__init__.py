@@ -1,5 +1,19 @@
 # utils/__init__.py
+#
+# Los submódulos se importan al primer acceso (PEP 562): `import utils` no carga librosa,
+# pandas, matplotlib ni torch hasta que se usa el submódulo que los necesita.
+import importlib
 
-from . import midi
-from . import tarareos
-from . import preprocess
\ No newline at end of file
+__all__ = ['midi', 'tarareos', 'preprocess', 'pipeline', 'cache_audio', 'streaming', 'graficas',
+           'dataset', 'convseq2seq', 'inferencia', 'decodificacion', 'servicio', 'cuantizacion', 'metricas',
+           'perfilado', 'entrenamiento', 'alineacion', 'catalogo']
+
+
+def __getattr__(name):
+    if name in __all__:
+        return importlib.import_module(f'.{name}', __name__)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
\ No newline at end of file
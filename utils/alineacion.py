@@ -0,0 +1,265 @@
+"""
+Alineación de tarareos con su MIDI por correlación cruzada de envolventes de onsets.
+
+La envolvente del audio es la fuerza de onset de librosa y la del MIDI se dibuja con pulsos
+suavizados en los inicios de nota, sobre la misma rejilla de cuadros (sr / hop_length). El
+desfase de cada par es el máximo de su correlación cruzada, calculada con FFT para todo un
+lote de pares a la vez, y se aplica como un corrimiento de la tabla de notas (ver
+`utils.midi.NOTAS_DTYPE`) antes de `midi2vec`.
+
+Uso desde la terminal:
+    python -m utils.alineacion datos/Tarareos/wav_data_sync_with_midi/ datos/midis/ datos/midis_alineados/
+"""
+import os
+import argparse
+import numpy as np
+import mido
+
+from . import midi as midi_utils
+from . import pipeline
+from . import perfilado
+
+
+SR = 22050
+HOP_LENGTH = 512
+
+
+def envolvente_audio(y, sr=SR, hop_length=HOP_LENGTH):
+    """
+    Fuerza de onset del audio (`librosa.onset.onset_strength`), un valor por cuadro.
+    """
+    import librosa
+
+    with perfilado.etapa('alineacion.envolvente_audio'):
+        return librosa.onset.onset_strength(y=y, sr=sr, hop_length=hop_length).astype(np.float32)
+
+
+def envolventes_midi(tablas, n_cuadros, sr=SR, hop_length=HOP_LENGTH, ancho=2):
+    """
+    Dibuja las envolventes de onsets de varias tablas de notas en una sola matriz: un pulso
+    por inicio de nota, ensanchado con una ventana triangular de `ancho` cuadros por lado.
+
+    Parámetros:
+        tablas (list): Tuplas (notas, ticks_per_beat, tempo) como las de `midi.midi2notas`.
+        n_cuadros (int): Número de cuadros de la matriz; los inicios posteriores se descartan.
+        sr (int): Frecuencia de muestreo de la rejilla de cuadros.
+        hop_length (int): Muestras por cuadro.
+        ancho (int): Cuadros de ensanchamiento a cada lado del pulso.
+
+    Retorna:
+        envolventes (np.ndarray): Matriz float32 [len(tablas), n_cuadros].
+    """
+    B = len(tablas)
+    filas, cuadros = [], []
+    for i, (notas, ticks_per_beat, tempo) in enumerate(tablas):
+        segundos = notas['inicio'] * (tempo * 1e-6 / ticks_per_beat)
+        cuadros.append(np.round(segundos * sr / hop_length).astype(np.int64))
+        filas.append(np.full(len(notas), i, dtype=np.int64))
+    filas = np.concatenate(filas) if B else np.zeros(0, np.int64)
+    cuadros = np.concatenate(cuadros) if B else np.zeros(0, np.int64)
+
+    envolventes = np.zeros(B * n_cuadros, dtype=np.float32)
+    for desplazamiento in range(-ancho, ancho + 1):
+        c = cuadros + desplazamiento
+        validos = (c >= 0) & (c < n_cuadros)
+        peso = 1 - abs(desplazamiento) / (ancho + 1)
+        envolventes += peso * np.bincount(filas[validos] * n_cuadros + c[validos], minlength=B * n_cuadros)
+    return envolventes.reshape(B, n_cuadros)
+
+
+def _estandarizar(x, longitudes):
+    # Media 0 y varianza 1 sobre la parte válida de cada fila; el relleno queda en 0
+    mascara = np.arange(x.shape[1]) < longitudes[:, np.newaxis]
+    n = np.maximum(longitudes, 1)[:, np.newaxis]
+    media = np.where(mascara, x, 0).sum(axis=1, keepdims=True) / n
+    x = np.where(mascara, x - media, 0)
+    norma = np.sqrt((x * x).sum(axis=1, keepdims=True))
+    return x / np.maximum(norma, 1e-12)
+
+
+def estimar_desfases(env_audio, env_midi, longitudes_audio=None, longitudes_midi=None, max_desfase=None):
+    """
+    Desfase de cada par (audio, MIDI) por correlación cruzada con FFT sobre todo el lote.
+    Un desfase positivo indica que el audio ocurre después que el MIDI.
+
+    Parámetros:
+        env_audio (np.ndarray): Envolventes del audio con relleno [batch_size, n_a].
+        env_midi (np.ndarray): Envolventes del MIDI con relleno [batch_size, n_m].
+        longitudes_audio (array): Cuadros válidos de cada fila de `env_audio` (por omisión n_a).
+        longitudes_midi (array): Cuadros válidos de cada fila de `env_midi` (por omisión n_m).
+        max_desfase (int): Desfase máximo buscado en cuadros, en ambos sentidos.
+
+    Retorna:
+        desfases (np.ndarray): Desfase float64 en cuadros, con interpolación parabólica del máximo.
+        correlaciones (np.ndarray): Correlación normalizada en el máximo, entre -1 y 1.
+    """
+    B, n_a = env_audio.shape
+    n_m = env_midi.shape[1]
+    longitudes_audio = np.full(B, n_a) if longitudes_audio is None else np.asarray(longitudes_audio)
+    longitudes_midi = np.full(B, n_m) if longitudes_midi is None else np.asarray(longitudes_midi)
+
+    a = _estandarizar(env_audio.astype(np.float64), longitudes_audio)
+    m = _estandarizar(env_midi.astype(np.float64), longitudes_midi)
+
+    # Sin traslape circular: n_fft >= n_a + n_m - 1
+    n_fft = 1 << int(np.ceil(np.log2(max(n_a + n_m - 1, 2))))
+    with perfilado.etapa('alineacion.correlacion', a.nbytes + m.nbytes):
+        corr = np.fft.irfft(np.fft.rfft(a, n_fft) * np.conj(np.fft.rfft(m, n_fft)), n_fft)
+
+    # corr[:, k] = sum_t a[t + k] m[t]; los desfases negativos quedan al final
+    desfases = np.concatenate((np.arange(n_fft - n_m + 1, n_fft) - n_fft, np.arange(n_a)))
+    corr = np.concatenate((corr[:, n_fft - n_m + 1:], corr[:, :n_a]), axis=1)
+    if max_desfase is not None:
+        dentro = np.abs(desfases) <= max_desfase
+        desfases, corr = desfases[dentro], corr[:, dentro]
+
+    filas = np.arange(B)
+    j = corr.argmax(axis=1)
+    correlaciones = corr[filas, j]
+
+    # Interpolación parabólica con los vecinos del máximo
+    izquierda = corr[filas, np.maximum(j - 1, 0)]
+    derecha = corr[filas, np.minimum(j + 1, corr.shape[1] - 1)]
+    curvatura = izquierda - 2 * correlaciones + derecha
+    interiores = (j > 0) & (j < corr.shape[1] - 1) & (curvatura < 0)
+    ajuste = np.zeros(B)
+    ajuste[interiores] = 0.5 * (izquierda - derecha)[interiores] / curvatura[interiores]
+
+    return desfases[j] + ajuste, correlaciones
+
+
+def desplazar_notas(notas, desfase, tempo, ticks_per_beat):
+    """
+    Corre la tabla de notas `desfase` segundos. Las notas que quedarían antes del tick 0 se
+    recortan y las que terminan antes de él se eliminan.
+
+    Parámetros:
+        notas (np.ndarray): Tabla de notas NOTAS_DTYPE.
+        desfase (float): Segundos; positivo retrasa las notas.
+        tempo (int): Tempo en microsegundos por negra.
+        ticks_per_beat (int): Resolución del archivo MIDI.
+
+    Retorna:
+        notas (np.ndarray): Nueva tabla de notas desplazada.
+    """
+    ticks = int(round(desfase * ticks_per_beat * 1e6 / tempo))
+    notas = notas[notas['fin'] + ticks > 0].copy()
+    notas['inicio'] = np.maximum(notas['inicio'] + ticks, 0)
+    notas['fin'] += ticks
+    return notas
+
+
+def _envolvente_par(nombre, audio_folder, midi_folder, sr, hop_length):
+    # Tarea por archivo para `pipeline.ejecutar`
+    from . import tarareos
+
+    y, sr = tarareos.cargar_audio(os.path.join(audio_folder, nombre + '.wav'), sr=sr)
+    midi_path = os.path.join(midi_folder, nombre + '.mid')
+    with perfilado.etapa('midi.cargar', os.path.getsize(midi_path)):
+        tabla = midi_utils.midi2notas(mido.MidiFile(midi_path))
+    return envolvente_audio(y, sr, hop_length), tabla
+
+
+def alinear(envolventes, tablas, sr=SR, hop_length=HOP_LENGTH, max_desfase=2.0, lote=256):
+    """
+    Estima el desfase en segundos de cada par (envolvente de audio, tabla de notas).
+
+    Parámetros:
+        envolventes (list): Envolventes de audio de `envolvente_audio`.
+        tablas (list): Tuplas (notas, ticks_per_beat, tempo) de `midi.midi2notas`.
+        sr (int): Frecuencia de muestreo con la que se calcularon las envolventes.
+        hop_length (int): Muestras por cuadro de las envolventes.
+        max_desfase (float): Desfase máximo buscado en segundos (None busca todos).
+        lote (int): Pares por FFT.
+
+    Retorna:
+        desfases (np.ndarray): Desfase en segundos de cada par.
+        correlaciones (np.ndarray): Correlación normalizada en el máximo de cada par.
+    """
+    cuadros_por_segundo = sr / hop_length
+    max_cuadros = None if max_desfase is None else int(np.ceil(max_desfase * cuadros_por_segundo))
+
+    desfases = np.zeros(len(envolventes))
+    correlaciones = np.zeros(len(envolventes))
+    # Agrupar pares de largo parecido reduce el relleno de cada FFT
+    orden = np.argsort([len(e) for e in envolventes], kind='stable')
+    for inicio in range(0, len(orden), lote):
+        idx = orden[inicio:inicio + lote]
+        longitudes = np.array([len(envolventes[i]) for i in idx])
+        n = int(longitudes.max())
+        env_audio = np.zeros((len(idx), n), dtype=np.float32)
+        for fila, i in enumerate(idx):
+            env_audio[fila, :longitudes[fila]] = envolventes[i]
+        # El MIDI se dibuja en la misma rejilla y con el mismo largo que su audio
+        env_midi = envolventes_midi([tablas[i] for i in idx], n, sr, hop_length)
+        env_midi[np.arange(n) >= longitudes[:, np.newaxis]] = 0
+
+        d, c = estimar_desfases(env_audio, env_midi, longitudes, longitudes, max_cuadros)
+        desfases[idx] = d / cuadros_por_segundo
+        correlaciones[idx] = c
+    return desfases, correlaciones
+
+
+def alinear_corpus(nombres, audio_folder, midi_folder, output_folder, sr=SR, hop_length=HOP_LENGTH,
+                   max_desfase=2.0, n_workers=None):
+    """
+    Alinea cada MIDI con su tarareo y guarda el MIDI desplazado con el mismo nombre en
+    `output_folder`. Las envolventes de audio se calculan en paralelo y las correlaciones
+    en lotes.
+
+    Parámetros:
+        nombres (iterable): Nombres de los pares (mismo nombre para el .wav y el .mid).
+        audio_folder (str): Carpeta de los tarareos .wav.
+        midi_folder (str): Carpeta de los MIDI.
+        output_folder (str): Carpeta para guardar los MIDI alineados.
+        sr (int): Frecuencia de muestreo para cargar el audio.
+        hop_length (int): Muestras por cuadro de las envolventes.
+        max_desfase (float): Desfase máximo buscado en segundos.
+        n_workers (int): Número de procesos para las envolventes de audio.
+
+    Retorna:
+        desfases (dict): nombre -> (desfase en segundos, correlación).
+        fallas (dict): nombre -> traceback de la excepción.
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    resultados, fallas = pipeline.ejecutar(_envolvente_par, nombres, n_workers,
+                                           audio_folder=audio_folder, midi_folder=midi_folder,
+                                           sr=sr, hop_length=hop_length)
+    nombres = list(resultados)
+    envolventes = [resultados[n][0] for n in nombres]
+    tablas = [resultados[n][1] for n in nombres]
+    desfases, correlaciones = alinear(envolventes, tablas, sr, hop_length, max_desfase)
+
+    salida = {}
+    for nombre, (notas, ticks_per_beat, tempo), d, c in zip(nombres, tablas, desfases, correlaciones):
+        notas = desplazar_notas(notas, d, tempo, ticks_per_beat)
+        with perfilado.etapa('midi.guardar'):
+            midi_utils.notas2midi(notas, ticks_per_beat, tempo).save(os.path.join(output_folder, nombre + '.mid'))
+        salida[nombre] = (float(d), float(c))
+    return salida, fallas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Alinea los MIDI con sus tarareos por correlación de onsets.')
+    parser.add_argument('audios', help='Carpeta de los tarareos .wav.')
+    parser.add_argument('midis', help='Carpeta de los MIDI con el mismo nombre que cada tarareo.')
+    parser.add_argument('salida', help='Carpeta para los MIDI alineados.')
+    parser.add_argument('--max-desfase', type=float, default=2.0, help='Desfase máximo en segundos.')
+    parser.add_argument('--hop-length', type=int, default=HOP_LENGTH)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--reporte', default=None, help='CSV con el desfase y la correlación de cada par.')
+    args = parser.parse_args(argv)
+
+    nombres = sorted(os.path.splitext(f)[0] for f in os.listdir(args.audios) if f.endswith('.wav')
+                     and os.path.exists(os.path.join(args.midis, os.path.splitext(f)[0] + '.mid')))
+    desfases, fallas = alinear_corpus(nombres, args.audios, args.midis, args.salida, hop_length=args.hop_length,
+                                      max_desfase=args.max_desfase, n_workers=args.workers)
+    print(f'{len(desfases)} MIDI alineados, {len(fallas)} con error')
+    if args.reporte:
+        with open(args.reporte, 'w') as f:
+            f.write('nombre,desfase,correlacion\n')
+            f.writelines(f'{n},{d:.4f},{c:.4f}\n' for n, (d, c) in desfases.items())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+import os
+import hashlib
+import functools
+import tempfile
+import librosa
+import numpy as np
+
+
+# Carpeta y tamaño máximo del caché; se pueden cambiar con variables de entorno
+DIRECTORIO = os.environ.get('HUM_CACHE_AUDIO',
+                            os.path.join(os.path.expanduser('~'), '.cache', 'hum_transcription', 'audio'))
+MAX_BYTES = int(os.environ.get('HUM_CACHE_AUDIO_MAX_BYTES', 8 * 2**30))
+
+# Al desalojar se baja hasta esta fracción de max_bytes, para no volver a recorrer la
+# carpeta en cada escritura una vez que el caché está lleno
+OBJETIVO = 0.9
+# Escrituras tras las cuales se vuelve a medir la carpeta (otros procesos también escriben)
+REVISAR_CADA = 256
+
+# Bytes estimados de cada carpeta del caché en este proceso: directorio -> [bytes, escrituras]
+_ocupado = {}
+
+
+@functools.lru_cache(maxsize=2**16)
+def _sha1(path, tamaño, mtime_ns):
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for bloque in iter(lambda: f.read(2**20), b''):
+            sha1.update(bloque)
+    return sha1.hexdigest()
+
+
+def huella(path):
+    """
+    Calcula el hash SHA-1 del contenido de un archivo. Se memoriza por (ruta, tamaño, mtime)
+    para no volver a leer el archivo dentro del mismo proceso (hasta 2**16 archivos).
+    """
+    stat = os.stat(path)
+    return _sha1(os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+
+def cargar(path, sr=22050, directorio=None, max_bytes=None):
+    """
+    Equivalente a `librosa.load(path, sr=sr)` con caché persistente en disco. El audio
+    decodificado y remuestreado se guarda como float32 en un .npy identificado por el hash
+    del contenido y sr, y se lee con memoria mapeada (copy-on-write). Al superar `max_bytes`
+    se eliminan los archivos usados hace más tiempo. El tamaño de la carpeta se lleva como
+    un total acumulado en el proceso y sólo se vuelve a medir al rebasar `max_bytes` o cada
+    REVISAR_CADA escrituras.
+
+    Parámetros:
+        path (str): Ruta del archivo de audio.
+        sr (int): Frecuencia de muestreo objetivo. None conserva la original.
+        directorio (str): Carpeta del caché (por omisión DIRECTORIO).
+        max_bytes (int): Tamaño máximo del caché (por omisión MAX_BYTES).
+
+    Retorna:
+        y (np.ndarray): Audio float32.
+        sr (int): Frecuencia de muestreo del audio.
+    """
+    directorio = directorio or DIRECTORIO
+    max_bytes = MAX_BYTES if max_bytes is None else max_bytes
+
+    if sr is None:
+        import soundfile
+        sr = soundfile.info(path).samplerate
+
+    cache_path = os.path.join(directorio, f'{huella(path)}_{sr}.npy')
+    try:
+        y = np.load(cache_path, mmap_mode='c')
+    except (FileNotFoundError, ValueError):
+        pass
+    else:
+        try:
+            os.utime(cache_path) # Marca de uso reciente para la política LRU
+        except OSError:
+            pass # Caché de sólo lectura o archivo ya desalojado: el audio cargado sigue siendo válido
+        return y, sr
+
+    y, sr = librosa.load(path, sr=sr)
+    y = np.ascontiguousarray(y, dtype=np.float32)
+
+    # Escritura atómica: varios procesos pueden llenar el caché a la vez
+    os.makedirs(directorio, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directorio, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, y)
+            n_bytes = f.tell()
+        os.replace(tmp_path, cache_path)
+    except BaseException:
+        os.remove(tmp_path) # No dejar temporales a medio escribir (p. ej. disco lleno)
+        raise
+
+    _anotar(directorio, n_bytes, max_bytes)
+    return y, sr
+
+
+def _anotar(directorio, n_bytes, max_bytes):
+    # Suma la escritura al total estimado; recorre la carpeta sólo si hace falta
+    estado = _ocupado.get(directorio)
+    if estado is None or estado[1] >= REVISAR_CADA or estado[0] + n_bytes > max_bytes:
+        _ocupado[directorio] = [desalojar(directorio, max_bytes, int(max_bytes * OBJETIVO)), 0]
+    else:
+        estado[0] += n_bytes
+        estado[1] += 1
+
+
+def desalojar(directorio=None, max_bytes=None, objetivo=None):
+    """
+    Si el caché supera `max_bytes`, elimina los archivos usados hace más tiempo hasta quedar
+    debajo de `objetivo` (por omisión `max_bytes`).
+
+    Retorna:
+        total (int): Bytes que quedan en el caché.
+    """
+    directorio = directorio or DIRECTORIO
+    max_bytes = MAX_BYTES if max_bytes is None else max_bytes
+    objetivo = max_bytes if objetivo is None else objetivo
+
+    # Otro proceso puede desalojar al mismo tiempo: los archivos que desaparecen se omiten
+    entradas, stats = [], []
+    for e in os.scandir(directorio):
+        if e.name.endswith('.npy'):
+            try:
+                stats.append(e.stat())
+            except FileNotFoundError:
+                continue
+            entradas.append(e)
+    total = sum(s.st_size for s in stats)
+    if total <= max_bytes:
+        return total
+
+    for i in np.argsort([s.st_mtime_ns for s in stats]):
+        try:
+            os.remove(entradas[i].path)
+        except FileNotFoundError:
+            continue
+        total -= stats[i].st_size
+        if total <= objetivo:
+            break
+    return total
@@ -0,0 +1,280 @@
+"""
+Catálogo incremental del corpus: una tabla por tipo de archivo (MIDI y WAV) con la huella de
+cada archivo (tamaño, mtime y SHA-1 del contenido) junto a sus columnas de análisis, guardada
+por columnas en un solo .npz.
+
+Al actualizar, los archivos con el mismo tamaño y mtime no se vuelven a leer; si cambiaron,
+se compara el hash y sólo se analizan los archivos nuevos o con contenido distinto. Las
+columnas de los MIDI son las de `utils.preprocess.escanear_midis`, por lo que las tablas de
+`midis_info.csv`, `midis_notas.csv` y `estandar.csv`/`no_estandar.csv` se obtienen del
+catálogo sin volver a leer los archivos.
+
+Uso:
+    catalogo = Catalogo('datos_procesados/catalogo.npz')
+    catalogo.actualizar(midis='Datos/MIDIs/midi_data/', wavs='datos/Tarareos/wav_data_sync_with_midi/')
+    llaves = catalogo.consultar('midi', ('problem?', '==', False), ('min_time', '>=', 0.1))['key']
+
+Desde la terminal:
+    python -m utils.catalogo datos_procesados/catalogo.npz --midis Datos/MIDIs/midi_data/
+"""
+import os
+import hashlib
+import operator
+import tempfile
+import argparse
+import numpy as np
+
+from . import preprocess
+from . import perfilado
+
+
+VERSION = 2
+TABLAS = ('midi', 'wav')
+EXTENSIONES = {'midi': ('.mid', '.midi'), 'wav': ('.wav',)}
+OPERADORES = {'==': operator.eq, '!=': operator.ne, '<': operator.lt, '<=': operator.le,
+              '>': operator.gt, '>=': operator.ge, 'in': np.isin}
+
+# Columnas de texto de escanear_midis que pueden ser None (se guardan como '')
+_OPCIONALES = ('RepetitionID', 'MetaID')
+
+
+def sha1(path):
+    """Hash SHA-1 del contenido de un archivo."""
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for bloque in iter(lambda: f.read(2**20), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def _listar(carpeta, extensiones):
+    # (archivo, tamaño, mtime) de los archivos de la carpeta, ordenados por nombre
+    archivos = []
+    with os.scandir(carpeta) as entradas:
+        for entrada in entradas:
+            if entrada.is_file() and entrada.name.lower().endswith(extensiones):
+                stat = entrada.stat()
+                archivos.append((entrada.name, stat.st_size, stat.st_mtime_ns))
+    archivos.sort()
+    return archivos
+
+
+def _analizar_midis(paths):
+    # Columnas de escanear_midis sin tipos object, para guardarse sin pickle
+    columnas = preprocess.escanear_midis(paths)
+    for nombre, valores in columnas.items():
+        if valores.dtype == object:
+            columnas[nombre] = np.array(['' if v is None else str(v) for v in valores], dtype=str)
+    return columnas
+
+
+def _analizar_wavs(paths):
+    # Sólo el encabezado de cada archivo
+    import soundfile
+
+    n = len(paths)
+    columnas = {'key': np.array([os.path.splitext(os.path.basename(p))[0] for p in paths], dtype=str),
+                'samplerate': np.zeros(n, dtype=np.int32),
+                'canales': np.zeros(n, dtype=np.int16),
+                'muestras': np.zeros(n, dtype=np.int64),
+                'duration': np.zeros(n, dtype=np.float64)}
+    for i, path in enumerate(paths):
+        info = soundfile.info(path)
+        columnas['samplerate'][i] = info.samplerate
+        columnas['canales'][i] = info.channels
+        columnas['muestras'][i] = info.frames
+        columnas['duration'][i] = info.frames / info.samplerate
+    return columnas
+
+
+ANALIZADORES = {'midi': _analizar_midis, 'wav': _analizar_wavs}
+
+
+def _concatenar(a, b):
+    # np.concatenate de dos tablas con las mismas columnas; los textos toman el ancho mayor
+    if not a:
+        return b
+    if not b:
+        return a
+    return {nombre: np.concatenate((a[nombre], b[nombre])) for nombre in a}
+
+
+class Catalogo:
+    """
+    Catálogo persistente del corpus. Cada tabla es un dict columna -> np.ndarray con las
+    columnas de huella 'archivo', 'tamaño', 'mtime_ns' y 'sha1' más las del análisis.
+    """
+    def __init__(self, path):
+        """
+        Parámetros:
+            path (str): Archivo .npz del catálogo; si no existe, el catálogo empieza vacío.
+        """
+        self.path = path
+        self.carpetas = {tabla: None for tabla in TABLAS}
+        self.tablas = {tabla: {} for tabla in TABLAS}
+        if os.path.exists(path):
+            self._cargar()
+
+    def _cargar(self):
+        with np.load(self.path) as datos:
+            if int(datos['version']) != VERSION:
+                return # Formato anterior: se reconstruye en la siguiente actualización
+            for llave in datos.files:
+                if '/' not in llave:
+                    continue
+                tabla, columna = llave.split('/', 1)
+                if columna == '__carpeta__':
+                    self.carpetas[tabla] = str(datos[llave])
+                else:
+                    self.tablas[tabla][columna] = datos[llave]
+
+    def guardar(self):
+        """Escribe el catálogo de forma atómica (archivo temporal + rename)."""
+        arreglos = {'version': np.array(VERSION)}
+        for tabla in TABLAS:
+            if self.carpetas[tabla] is not None:
+                arreglos[f'{tabla}/__carpeta__'] = np.array(self.carpetas[tabla])
+            for columna, valores in self.tablas[tabla].items():
+                arreglos[f'{tabla}/{columna}'] = valores
+
+        directorio = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directorio, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directorio, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, **arreglos)
+        os.replace(tmp_path, self.path)
+
+    def __len__(self):
+        return sum(len(t.get('archivo', ())) for t in self.tablas.values())
+
+    def actualizar(self, midis=None, wavs=None, guardar=True):
+        """
+        Sincroniza el catálogo con las carpetas: analiza los archivos nuevos o modificados y
+        elimina los que ya no existen.
+
+        Parámetros:
+            midis (str): Carpeta de los MIDI (None no actualiza esa tabla).
+            wavs (str): Carpeta de los tarareos .wav (None no actualiza esa tabla).
+            guardar (bool): Escribir el catálogo al terminar.
+
+        Retorna:
+            cambios (dict): tabla -> conteo de 'nuevos', 'modificados', 'eliminados' y 'sin_cambios'.
+        """
+        cambios = {}
+        for tabla, carpeta in (('midi', midis), ('wav', wavs)):
+            if carpeta is not None:
+                with perfilado.etapa(f'catalogo.{tabla}'):
+                    cambios[tabla] = self._actualizar_tabla(tabla, carpeta)
+        if guardar and cambios:
+            self.guardar()
+        return cambios
+
+    def _actualizar_tabla(self, tabla, carpeta):
+        actual = self.tablas[tabla]
+        if self.carpetas[tabla] is not None and os.path.abspath(carpeta) != os.path.abspath(self.carpetas[tabla]):
+            actual = {} # Otra carpeta: las huellas anteriores no aplican
+        self.carpetas[tabla] = carpeta
+
+        archivos = _listar(carpeta, EXTENSIONES[tabla])
+        previos = {nombre: i for i, nombre in enumerate(actual.get('archivo', ()))}
+        conteo = {'nuevos': 0, 'modificados': 0, 'eliminados': 0, 'sin_cambios': 0}
+
+        conservar = [] # Filas de la tabla actual que se mantienen
+        mtimes = []    # mtime vigente de esas filas (pudo cambiar sin cambiar el contenido)
+        analizar = []  # (archivo, tamaño, mtime, sha1) por analizar
+        for nombre, tamaño, mtime in archivos:
+            i = previos.pop(nombre, None)
+            if i is not None and actual['tamaño'][i] == tamaño and actual['mtime_ns'][i] == mtime:
+                conservar.append(i)
+                mtimes.append(mtime)
+                conteo['sin_cambios'] += 1
+                continue
+
+            huella = sha1(os.path.join(carpeta, nombre))
+            if i is not None and actual['tamaño'][i] == tamaño and actual['sha1'][i] == huella:
+                # Sólo cambió el mtime (copia, touch)
+                conservar.append(i)
+                mtimes.append(mtime)
+                conteo['sin_cambios'] += 1
+            else:
+                analizar.append((nombre, tamaño, mtime, huella))
+                conteo['nuevos' if i is None else 'modificados'] += 1
+        conteo['eliminados'] = len(previos)
+
+        conservar = np.array(conservar, dtype=np.int64)
+        tabla_conservada = {columna: valores[conservar] for columna, valores in actual.items()}
+        if tabla_conservada:
+            tabla_conservada['mtime_ns'] = np.array(mtimes, dtype=np.int64)
+
+        tabla_nueva = {}
+        if analizar:
+            nombres, tamaños, mtimes_nuevos, huellas = zip(*analizar)
+            tabla_nueva = {'archivo': np.array(nombres, dtype=str),
+                           'tamaño': np.array(tamaños, dtype=np.int64),
+                           'mtime_ns': np.array(mtimes_nuevos, dtype=np.int64),
+                           'sha1': np.array(huellas, dtype='U40')}
+            tabla_nueva.update(ANALIZADORES[tabla]([os.path.join(carpeta, n) for n in nombres]))
+
+        resultado = _concatenar(tabla_conservada, tabla_nueva)
+        if resultado:
+            orden = np.argsort(resultado['archivo'], kind='stable')
+            resultado = {columna: valores[orden] for columna, valores in resultado.items()}
+        self.tablas[tabla] = resultado
+        return conteo
+
+    def consultar(self, tabla, *condiciones, columnas=None):
+        """
+        Filtra una tabla con condiciones por columna, sin leer ningún archivo del corpus.
+
+        Parámetros:
+            tabla (str): 'midi' o 'wav'.
+            *condiciones (tuple): (columna, operador, valor) con operador en OPERADORES,
+                                  p. ej. ('problem?', '==', False), ('min_time', '>=', 0.1).
+            columnas (list): Columnas a regresar (por omisión todas).
+
+        Retorna:
+            seleccion (dict): columna -> np.ndarray con las filas que cumplen todas las condiciones.
+        """
+        datos = self.tablas[tabla]
+        if not datos:
+            return {}
+        mascara = np.ones(len(datos['archivo']), dtype=bool)
+        for columna, op, valor in condiciones:
+            if op not in OPERADORES:
+                raise ValueError(f'Operador no soportado: {op!r} (opciones: {", ".join(OPERADORES)})')
+            mascara &= OPERADORES[op](datos[columna], valor)
+        return {columna: datos[columna][mascara] for columna in (columnas or datos)}
+
+    def midis(self, *condiciones):
+        """
+        Columnas de la tabla MIDI con los tipos de `preprocess.escanear_midis` (textos como
+        object, None en las columnas opcionales vacías), para `preprocess.tablas_midis` y
+        `preprocess.separar_tipos`.
+        """
+        columnas = self.consultar('midi', *condiciones)
+        for nombre, valores in columnas.items():
+            if valores.dtype.kind == 'U':
+                valores = valores.astype(object)
+                if nombre in _OPCIONALES:
+                    valores[valores == ''] = None
+                elif nombre == 'min_figure':
+                    valores[valores == '0'] = 0
+                columnas[nombre] = valores
+        return columnas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Actualiza el catálogo incremental del corpus.')
+    parser.add_argument('catalogo', help='Archivo .npz del catálogo.')
+    parser.add_argument('--midis', default=None, help='Carpeta de los MIDI.')
+    parser.add_argument('--wavs', default=None, help='Carpeta de los tarareos .wav.')
+    args = parser.parse_args(argv)
+
+    catalogo = Catalogo(args.catalogo)
+    for tabla, conteo in catalogo.actualizar(args.midis, args.wavs).items():
+        print(f'{tabla}: ' + ', '.join(f'{k} {v}' for k, v in conteo.items()))
+    print(f'{len(catalogo)} archivos en {args.catalogo}')
+
+
+if __name__ == '__main__':
+    main()
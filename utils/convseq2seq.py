@@ -0,0 +1,173 @@
+import random
+import numpy as np
+import torch
+
+from . import perfilado
+
+
+def convout_calc(input_dim, kernel, stride, dilation=1):
+    new_dim = np.floor((input_dim - 1 - dilation*(kernel-1)) / stride + 1)
+    return int(new_dim)
+
+
+class Encoder(torch.nn.Module):
+    def __init__(self, input_dim, hidden_dim):
+        super(Encoder, self).__init__()
+
+        # Conv2D
+        self.conv2d = torch.nn.Conv2d(in_channels=1,
+                                      out_channels=1,
+                                      kernel_size=(int(1378//16), 4),
+                                      stride=(1, 1))
+        # Dimensión H de Conv2D
+        self.conv2_H_dim = convout_calc(input_dim, kernel=int(1378//16), stride=1)
+
+        # MaxPooling2D
+        self.max_pool2d = torch.nn.MaxPool2d(kernel_size=(int(86//4), 2))
+        # Dimensión H de MaxPooling2D
+        self.pool_H_dim = convout_calc(self.conv2_H_dim, kernel=int(86//4), stride=int(86//4))
+
+        # Encoder LSTM
+        self.encoder_lstm = torch.nn.LSTM(input_size=self.pool_H_dim,
+                                          hidden_size=hidden_dim,
+                                          batch_first=True)
+
+    def longitud_salida(self, ventanas):
+        # Pasos del LSTM que produce un audio de `ventanas` columnas (Conv2d y MaxPool2d sobre N)
+        conv_W = ventanas - self.conv2d.kernel_size[1] + 1
+        return (conv_W - self.max_pool2d.kernel_size[1]) // self.max_pool2d.kernel_size[1] + 1
+
+    def forward(self, x, ventanas=None):
+        # x: [batch_size, L, N]
+        # ventanas: [batch_size] columnas reales de cada audio (opcional). Con ellas el LSTM se
+        # detiene en la longitud de cada audio y el relleno del lote no cambia su estado final.
+        x = x.unsqueeze(1) # Canal pivote
+
+        # ETAPA Convolucional
+        conv_out = self.conv2d(x)
+        pool_out = self.max_pool2d(conv_out)
+
+        # Transformar a dimensiones apropiadas para LSTM
+        pool_out = pool_out.squeeze(1)
+        pool_out_t = pool_out.transpose(1, 2)
+
+        # ETAPA Recurrente
+        if ventanas is None:
+            encoder_outputs, (hidden, cell) = self.encoder_lstm(pool_out_t)
+        else:
+            pasos = self.longitud_salida(torch.as_tensor(ventanas).cpu()).clamp(min=1)
+            empaquetado = torch.nn.utils.rnn.pack_padded_sequence(pool_out_t, pasos, batch_first=True,
+                                                                  enforce_sorted=False)
+            encoder_outputs, (hidden, cell) = self.encoder_lstm(empaquetado)
+            encoder_outputs, _ = torch.nn.utils.rnn.pad_packed_sequence(encoder_outputs, batch_first=True,
+                                                                        total_length=pool_out_t.shape[1])
+
+        return encoder_outputs, (hidden, cell)
+
+
+class Decoder(torch.nn.Module):
+    def __init__(self, labels_dim, hidden_dim, embedding_dim, dropout=0.25):
+        super(Decoder, self).__init__()
+        # Parámetros
+        self._labels_dim = labels_dim
+        self._hidden_dim = hidden_dim
+        self._embedding_dim = embedding_dim
+
+        # Decoder LSTM
+        self.embedding = torch.nn.Embedding(labels_dim, embedding_dim)
+        self.decoder_lstm = torch.nn.LSTM(input_size=embedding_dim,
+                                          hidden_size=hidden_dim,
+                                          batch_first=True)
+        self.dropout = torch.nn.Dropout(dropout)
+
+        # Capa lineal que mapeará las salidas del LSTM a la dimensión de salida (es decir, al número de clases)
+        self.fc = torch.nn.Linear(hidden_dim, labels_dim)
+
+
+    def forward(self, input, hidden, cell):
+        # input : [batch_size]
+        logits, hidden, cell = self.forward_secuencia(input.unsqueeze(1), hidden, cell)
+        return logits.squeeze(1), hidden, cell
+
+    def forward_secuencia(self, inputs, hidden, cell):
+        # inputs : [batch_size, T] -> Ejecuta T pasos del decoder en una sola llamada
+
+        # Embedding:
+        embedded = self.dropout(self.embedding(inputs)) # embedded: [batch_size, T, embedding_dim]
+
+        # Aplicar celda recurrente
+        output, (hidden, cell) = self.decoder_lstm(embedded, (hidden, cell)) # output: [batch_size, T, hidden_dim]
+
+        # Predicción
+        logits = self.fc(output) # logits: [batch_size, T, labels_dim]
+
+        return logits, hidden, cell
+
+
+class Seq2Seq(torch.nn.Module):
+    def __init__(self, encoder, decoder, device, chunk_size=1):
+        super().__init__()
+        self.encoder = encoder
+        self.decoder = decoder
+        self.device = device
+        # Número de pasos consecutivos que comparten la decisión de teacher forcing.
+        # chunk_size=1 reproduce el muestreo paso a paso original (una moneda por celda).
+        # Con chunk_size=c se lanza una moneda por bloque de c celdas: la proporción esperada
+        # de celdas con teacher forcing sigue siendo teacher_forcing_ratio, pero los bloques
+        # forzados corren en una sola llamada al decoder y el modelo ve rachas de hasta c
+        # celdas de sus propias predicciones en lugar de alternancias celda a celda.
+        # No afecta la inferencia (teacher_forcing_ratio=0).
+        self.chunk_size = chunk_size
+
+    def forward(self, src, trg, teacher_forcing_ratio=0.5):
+        # src = [batch_size, L, N]
+        # trg = [batch_size, K]
+
+        batch_size = trg.shape[0]
+        labels_size = self.decoder._labels_dim
+
+        # Último estado oculto del encoder
+        with perfilado.etapa('modelo.encoder'):
+            _, (hidden, cell) = self.encoder(src)
+
+        # La celda 0 (<SOS>) no se predice
+        outputs = [torch.zeros(batch_size, 1, labels_size, device=src.device)]
+
+        if teacher_forcing_ratio >= 1:
+            # Teacher forcing total: todas las entradas son conocidas -> una sola llamada al decoder
+            with perfilado.etapa('modelo.decoder'):
+                logits, _, _ = self.decoder.forward_secuencia(trg[:, :-1], hidden, cell)
+            outputs.append(logits)
+            return torch.cat(outputs, dim=1)
+
+        with perfilado.etapa('modelo.decoder'):
+            return self._decodificar(trg, hidden, cell, teacher_forcing_ratio, outputs)
+
+    def _decodificar(self, trg, hidden, cell, teacher_forcing_ratio, outputs):
+        trg_length = trg.shape[1]
+
+        input = trg[:, 0] # Se comienza en la primera celda del vector MIDI objetivo
+        # input: [batch size]
+        t = 1
+        while t < trg_length:
+            fin = min(t + self.chunk_size, trg_length)
+
+            # Decidir si se realiza teacher forcing para el bloque [t, fin)
+            teacher_force = random.random() < teacher_forcing_ratio
+            if teacher_force:
+                # Las entradas del bloque son la entrada actual y las celdas objetivo previas
+                inputs = torch.cat((input.unsqueeze(1), trg[:, t:fin - 1]), dim=1)
+                logits, hidden, cell = self.decoder.forward_secuencia(inputs, hidden, cell)
+                outputs.append(logits)
+                input = trg[:, fin - 1]
+            else:
+                for _ in range(t, fin):
+                    # Realiza la predicción del valor de celda
+                    output, hidden, cell = self.decoder(input, hidden, cell)
+                    # output = [batch_size, labels_dim]
+                    outputs.append(output.unsqueeze(1))
+                    # Escoge el código más probable
+                    input = output.argmax(1)
+            t = fin
+
+        return torch.cat(outputs, dim=1)
@@ -0,0 +1,200 @@
+"""
+Cuantización dinámica int8 del ConvSeq2Seq para inferencia en CPU y comparación contra el
+modelo float32 en las muestras TEST.
+
+Sólo se cuantizan los LSTM y las capas Linear (pesos int8, activaciones cuantizadas al vuelo).
+La cuantización dinámica de PyTorch no soporta Conv2d, por lo que la etapa convolucional del
+Encoder se mantiene en float32.
+
+Uso desde la terminal:
+    python -m utils.cuantizacion --shards datos_procesados/shards/
+"""
+import os
+import json
+import time
+import argparse
+import numpy as np
+import torch
+
+from . import dataset
+from . import metricas
+from . import inferencia
+
+
+MODELO_INT8 = os.path.splitext(inferencia.MODELO)[0] + '_int8.pt'
+LLAVES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'misc', 'train_valid_test_keys.json')
+
+
+def cuantizar(model):
+    """
+    Parámetros:
+        model (Seq2Seq): Modelo float32 en modo evaluación.
+
+    Retorna:
+        model_int8 (Seq2Seq): Copia con LSTM y Linear cuantizados dinámicamente a int8.
+    """
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.LSTM, torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _dinamicos(model_int8):
+    # (nombre, módulo) de las capas cuantizadas dinámicamente
+    tipos = (torch.ao.nn.quantized.dynamic.LSTM, torch.ao.nn.quantized.dynamic.Linear)
+    return [(nombre, modulo) for nombre, modulo in model_int8.named_modules() if isinstance(modulo, tipos)]
+
+
+def pesos_int8(model_int8):
+    """
+    Pesos del modelo cuantizado sólo como tensores, para leerse con `torch.load(weights_only=True)`.
+    El state_dict guarda las capas dinámicas como parámetros empaquetados (objetos de TorchScript);
+    aquí cada una se reemplaza por sus pesos qint8 y sus bias float32.
+
+    Parámetros:
+        model_int8 (Seq2Seq): Modelo de `cuantizar`.
+
+    Retorna:
+        pesos (dict): Nombre -> tensor.
+    """
+    dinamicos = _dinamicos(model_int8)
+    prefijos = tuple(nombre + '.' for nombre, _ in dinamicos)
+    pesos = {llave: valor for llave, valor in model_int8.state_dict().items() if not llave.startswith(prefijos)}
+    for nombre, modulo in dinamicos:
+        if isinstance(modulo, torch.ao.nn.quantized.dynamic.LSTM):
+            pesos_bias = modulo._weight_bias()
+            for llave, valor in {**pesos_bias['weight'], **pesos_bias['bias']}.items():
+                pesos[f'{nombre}.{llave}'] = valor
+        else:
+            pesos[f'{nombre}.weight'], pesos[f'{nombre}.bias'] = modulo._weight_bias()
+    return pesos
+
+
+def cargar_pesos(model_int8, pesos):
+    """
+    Carga en un modelo de `cuantizar` los pesos de `pesos_int8`.
+
+    Parámetros:
+        model_int8 (Seq2Seq): Modelo cuantizado con la misma arquitectura.
+        pesos (dict): Pesos de `pesos_int8`.
+    """
+    dinamicos = _dinamicos(model_int8)
+    restantes = dict(pesos)
+    for nombre, modulo in dinamicos:
+        prefijo = nombre + '.'
+        propios = {llave[len(prefijo):]: restantes.pop(llave) for llave in list(restantes) if llave.startswith(prefijo)}
+        if isinstance(modulo, torch.ao.nn.quantized.dynamic.LSTM):
+            modulo.set_weight_bias(propios)
+        else:
+            modulo.set_weight_bias(propios['weight'], propios['bias'])
+
+    # Las llaves empaquetadas de las capas dinámicas ya se cargaron con set_weight_bias
+    prefijos = tuple(nombre + '.' for nombre, _ in dinamicos)
+    estado = model_int8.state_dict()
+    faltantes = [llave for llave in estado if not llave.startswith(prefijos) and llave not in restantes]
+    sobrantes = [llave for llave in restantes if llave not in estado]
+    if faltantes or sobrantes:
+        raise RuntimeError(f'Pesos int8 incompatibles: faltan {faltantes}, sobran {sobrantes}')
+    estado.update(restantes)
+    model_int8.load_state_dict(estado)
+
+
+def exportar(model_path=inferencia.MODELO, salida=None):
+    """
+    Cuantiza el modelo de `model_path` y guarda sus pesos (ver `pesos_int8`) junto a él
+    (por omisión `models/ConvSeq2Seq_model_int8.pt`). Se carga con
+    `inferencia.cargar_modelo(salida, cuantizado=True)`.
+
+    Retorna:
+        salida (str): Ruta del modelo cuantizado.
+    """
+    salida = salida or os.path.splitext(model_path)[0] + '_int8.pt'
+    model_int8 = cuantizar(inferencia.cargar_modelo(model_path))
+    torch.save(pesos_int8(model_int8), salida)
+    return salida
+
+
+def evaluar(model, datos, batch_size=32):
+    """
+    Decodifica sin teacher forcing (greedy, tantos pasos como el vector objetivo) cada muestra
+    de `datos` y la compara con su vector MIDI, sin contar el <SOS>.
+
+    Parámetros:
+        model (Seq2Seq): Modelo en modo evaluación.
+        datos (TarareoMIDIShards): Muestras a evaluar.
+        batch_size (int): Tamaño de cada lote.
+
+    Retorna:
+        resultados (dict): accuracy, precision, recall, f1 (ponderados), levenshtein promedio
+                           y latencia del modelo en ms por muestra.
+    """
+    n_ventanas, n_etiquetas = datos.longitudes()
+    muestreador = dataset.MuestreadorPorLongitud(np.stack((n_ventanas, n_etiquetas), axis=1), batch_size,
+                                                 shuffle=False)
+    colador = dataset.ColadorPrealocado(pin_memory=False)
+
+    evaluador = metricas.EvaluadorSecuencias()
+    segundos = 0.0
+    with torch.inference_mode():
+        for lote in muestreador:
+            src, trg = colador([datos[i] for i in lote])
+            K = int(n_etiquetas[lote].max())
+
+            inicio = time.perf_counter()
+            preds = inferencia.decodificar_greedy(model, src, K, torch.from_numpy(n_ventanas[lote]))
+            segundos += time.perf_counter() - inicio
+
+            # Sin el <SOS>
+            evaluador.actualizar(preds[:, 1:], trg[:, 1:K], n_etiquetas[lote] - 1)
+
+    resultados = evaluador.resultados()
+    resultados['latencia_ms'] = 1000 * segundos / max(len(datos), 1)
+    return resultados
+
+
+def comparar(shard_directory, model_path=inferencia.MODELO, int8_path=None, llaves_path=LLAVES, batch_size=32,
+             n_threads=None):
+    """
+    Compara el modelo float32 y el int8 sobre las muestras TEST presentes en los shards.
+    Si no existe el modelo int8, se exporta primero.
+
+    Retorna:
+        comparacion (dict): Resultados de `evaluar` y tamaño en MB de cada modelo.
+    """
+    if n_threads is not None:
+        torch.set_num_threads(n_threads)
+    int8_path = int8_path or os.path.splitext(model_path)[0] + '_int8.pt'
+    if not os.path.exists(int8_path):
+        exportar(model_path, int8_path)
+
+    with open(llaves_path) as f:
+        test = json.load(f)['TEST']
+    disponibles = set(np.load(os.path.join(shard_directory, dataset.INDICE))['nombre'].tolist())
+    faltantes = [llave for llave in test if llave not in disponibles]
+    if faltantes:
+        print(f'{len(faltantes)} muestras TEST no están en los shards y se omiten')
+    datos = dataset.TarareoMIDIShards(shard_directory, [llave for llave in test if llave in disponibles])
+
+    comparacion = {}
+    for nombre, path, cuantizado in (('float32', model_path, False), ('int8', int8_path, True)):
+        model = inferencia.cargar_modelo(path, cuantizado=cuantizado)
+        comparacion[nombre] = evaluar(model, datos, batch_size)
+        comparacion[nombre]['tamaño_mb'] = os.path.getsize(path) / 2**20
+    return comparacion
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Exporta el modelo int8 y lo compara contra el float32 en TEST.')
+    parser.add_argument('--shards', required=True, help='Carpeta con los shards de utils.dataset.empaquetar.')
+    parser.add_argument('--modelo', default=inferencia.MODELO, help='Ruta al state_dict float32.')
+    parser.add_argument('--int8', default=None, help='Ruta del modelo int8 (se exporta si no existe).')
+    parser.add_argument('--llaves', default=LLAVES, help='JSON con las llaves TRAIN/VALID/TEST.')
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--threads', type=int, default=None, help='Hilos de PyTorch.')
+    args = parser.parse_args(argv)
+
+    comparacion = comparar(args.shards, args.modelo, args.int8, args.llaves, args.batch_size, args.threads)
+    print(f"{'':>14}" + ''.join(f'{nombre:>12}' for nombre in comparacion))
+    for metrica in comparacion['float32']:
+        print(f'{metrica:>14}' + ''.join(f'{r[metrica]:>12.4f}' for r in comparacion.values()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,297 @@
+import os
+import glob
+import numpy as np
+import torch
+
+from . import perfilado
+
+
+INDICE = 'indice.npz'
+
+
+def empaquetar(samples, tarareo_directory, midi_directory, extensions, output_directory, max_bytes_shard=2**30):
+    """
+    Empaqueta las ventanas de audio y los vectores MIDI de cada muestra en pocos archivos
+    contiguos (shards) que se leen con memoria mapeada. El <SOS> y <EOS> (ceros al inicio y final)
+    se agregan aquí, una sola vez, en lugar de en cada lectura.
+
+    Estructura de salida:
+        frames_XXX.npy: float32 (filas, L). Cada muestra ocupa n_ventanas + 2 filas consecutivas.
+        targets_XXX.npy: int8 (posiciones,). Cada muestra ocupa K + 2 posiciones consecutivas.
+        indice.npz: nombre, shard, fila, n_ventanas, posicion y n_etiquetas de cada muestra.
+
+    Parámetros:
+        samples (list): Nombres de las muestras.
+        tarareo_directory (str): Carpeta con las ventanas de audio (L, n_ventanas).
+        midi_directory (str): Carpeta con los vectores MIDI objetivo.
+        extensions (tuple): Extensión del nombre del tarareo y vector midi. Ejm ('_frames.npy', '_target.npy')
+        output_directory (str): Carpeta de destino de los shards.
+        max_bytes_shard (int): Tamaño máximo aproximado de cada shard de ventanas.
+    """
+    os.makedirs(output_directory, exist_ok=True)
+    n = len(samples)
+
+    # Primera pasada: sólo se leen los encabezados para conocer las dimensiones
+    n_ventanas = np.empty(n, dtype=np.int32)
+    n_etiquetas = np.empty(n, dtype=np.int32)
+    L = None
+    for i, sample in enumerate(samples):
+        tarareo = np.load(os.path.join(tarareo_directory, sample + extensions[0]), mmap_mode='r')
+        midi = np.load(os.path.join(midi_directory, sample + extensions[1]), mmap_mode='r')
+        if L is None:
+            L = tarareo.shape[0]
+        elif tarareo.shape[0] != L:
+            raise ValueError(f'{sample}: se esperaban ventanas de {L} muestras, no {tarareo.shape[0]}')
+        n_ventanas[i] = tarareo.shape[1] + 2
+        n_etiquetas[i] = midi.shape[0] + 2
+
+    # Asignar muestras a shards consecutivos
+    filas_por_shard = max(1, max_bytes_shard // (L * 4))
+    shard = np.empty(n, dtype=np.int32)
+    fila = np.empty(n, dtype=np.int64)
+    posicion = np.empty(n, dtype=np.int64)
+    shard_actual, fila_actual, posicion_actual = 0, 0, 0
+    for i in range(n):
+        if fila_actual > 0 and fila_actual + n_ventanas[i] > filas_por_shard:
+            shard_actual, fila_actual, posicion_actual = shard_actual + 1, 0, 0
+        shard[i], fila[i], posicion[i] = shard_actual, fila_actual, posicion_actual
+        fila_actual += n_ventanas[i]
+        posicion_actual += n_etiquetas[i]
+
+    # Segunda pasada: copiar cada muestra a su lugar en el shard
+    for s in range(shard_actual + 1 if n else 0):
+        en_shard = np.flatnonzero(shard == s)
+        frames = np.lib.format.open_memmap(os.path.join(output_directory, f'frames_{s:03d}.npy'), mode='w+',
+                                           dtype=np.float32, shape=(int(n_ventanas[en_shard].sum()), L))
+        targets = np.lib.format.open_memmap(os.path.join(output_directory, f'targets_{s:03d}.npy'), mode='w+',
+                                            dtype=np.int8, shape=(int(n_etiquetas[en_shard].sum()),))
+        for i in en_shard:
+            tarareo = np.load(os.path.join(tarareo_directory, samples[i] + extensions[0]))
+            midi = np.load(os.path.join(midi_directory, samples[i] + extensions[1]))
+
+            # Tarareo: Intensidad 0 | Midi: Silencio <-> 0
+            bloque = frames[fila[i]:fila[i] + n_ventanas[i]]
+            bloque[0] = 0
+            bloque[1:-1] = tarareo.T
+            bloque[-1] = 0
+
+            bloque = targets[posicion[i]:posicion[i] + n_etiquetas[i]]
+            bloque[0] = 0
+            bloque[1:-1] = midi
+            bloque[-1] = 0
+
+        frames.flush()
+        targets.flush()
+        del frames, targets
+
+    np.savez(os.path.join(output_directory, INDICE),
+             nombre=np.asarray(samples, dtype=str), shard=shard, fila=fila, n_ventanas=n_ventanas,
+             posicion=posicion, n_etiquetas=n_etiquetas)
+
+
+class TarareoMIDIShards(torch.utils.data.Dataset):
+    """
+    Dataset sobre los shards de `empaquetar`. Cada muestra es una vista sin copia de los archivos
+    mapeados en memoria, por lo que varios workers del DataLoader comparten las mismas páginas.
+
+    Regresa (tarareo, midi) con las mismas formas que `TarareoMIDIDataset`:
+    tarareo [L, n_ventanas + 2] float32 y midi [K + 2] int8, ya con <SOS> y <EOS>.
+    """
+    def __init__(self, shard_directory: str, samples: list = None):
+        self._shard_directory = shard_directory
+
+        indice = np.load(os.path.join(shard_directory, INDICE))
+        nombres = indice['nombre']
+        if samples is None:
+            seleccion = np.arange(len(nombres))
+        else:
+            posiciones = {nombre: i for i, nombre in enumerate(nombres)}
+            seleccion = np.array([posiciones[sample] for sample in samples], dtype=np.int64)
+
+        self._samples = list(nombres[seleccion])
+        self._shard = indice['shard'][seleccion]
+        self._fila = indice['fila'][seleccion]
+        self._n_ventanas = indice['n_ventanas'][seleccion]
+        self._posicion = indice['posicion'][seleccion]
+        self._n_etiquetas = indice['n_etiquetas'][seleccion]
+
+        # Los archivos se abren en cada proceso al primer acceso
+        self._frames = None
+        self._targets = None
+
+    def _abrir(self):
+        # mmap_mode='c': páginas compartidas de sólo lectura, escribibles sin tocar el archivo
+        self._frames = [np.load(path, mmap_mode='c')
+                        for path in sorted(glob.glob(os.path.join(self._shard_directory, 'frames_*.npy')))]
+        self._targets = [np.load(path, mmap_mode='c')
+                         for path in sorted(glob.glob(os.path.join(self._shard_directory, 'targets_*.npy')))]
+
+    def __getstate__(self):
+        # No se serializan los mapas de memoria al enviar el dataset a los workers
+        state = self.__dict__.copy()
+        state['_frames'] = None
+        state['_targets'] = None
+        return state
+
+    def __len__(self):
+        return len(self._samples)
+
+    def longitudes(self):
+        """Número de ventanas y de etiquetas (con <SOS> y <EOS>) de cada muestra."""
+        return self._n_ventanas, self._n_etiquetas
+
+    def __getitem__(self, idx):
+        if self._frames is None:
+            with perfilado.etapa('dataset.abrir'):
+                self._abrir()
+
+        s = self._shard[idx]
+        fila = self._fila[idx]
+        posicion = self._posicion[idx]
+
+        tarareo = self._frames[s][fila:fila + self._n_ventanas[idx]]
+        midi = self._targets[s][posicion:posicion + self._n_etiquetas[idx]]
+
+        # Vistas sin copia: [n_ventanas, L] -> [L, n_ventanas]. Las páginas mapeadas se leen
+        # al copiarlas en el lote, por lo que esa lectura cuenta en la etapa 'collate'.
+        return torch.from_numpy(tarareo).T, torch.from_numpy(midi)
+
+
+class MuestreadorPorLongitud(torch.utils.data.Sampler):
+    """
+    Batch sampler que agrupa muestras de longitud similar para reducir el padding.
+    En cada época las muestras se barajan, se dividen en grupos de `batch_size * lotes_por_grupo`,
+    se ordenan por longitud dentro de cada grupo y se cortan en lotes; el orden de los lotes
+    también se baraja. Se usa como `DataLoader(dataset, batch_sampler=...)`.
+    """
+    def __init__(self, longitudes, batch_size: int, lotes_por_grupo: int = 50, shuffle: bool = True,
+                 drop_last: bool = False, seed: int = 0):
+        # longitudes: [n] o [n, criterios], p. ej. columnas (n_ventanas, n_etiquetas) de `longitudes()`
+        longitudes = np.asarray(longitudes)
+        self._longitudes = longitudes.reshape(len(longitudes), -1)
+        self._batch_size = batch_size
+        self._tam_grupo = batch_size * lotes_por_grupo
+        self._shuffle = shuffle
+        self._drop_last = drop_last
+        self._seed = seed
+        self._epoch = 0
+
+    @property
+    def epoch(self):
+        # Época que usará la siguiente iteración (avanza sola al terminar cada una)
+        return self._epoch
+
+    def set_epoch(self, epoch: int):
+        self._epoch = epoch
+
+    def _lotes(self):
+        n = len(self._longitudes)
+        rng = np.random.default_rng((self._seed, self._epoch))
+        orden = rng.permutation(n) if self._shuffle else np.arange(n)
+
+        lotes = []
+        for inicio in range(0, n, self._tam_grupo):
+            grupo = orden[inicio:inicio + self._tam_grupo]
+            # Orden por el primer criterio y desempate por los siguientes
+            llaves = self._longitudes[grupo].T[::-1]
+            grupo = grupo[np.lexsort(llaves)]
+            lotes.extend(grupo[i:i + self._batch_size] for i in range(0, len(grupo), self._batch_size))
+
+        if self._drop_last and lotes and len(lotes[-1]) < self._batch_size:
+            lotes = [lote for lote in lotes if len(lote) == self._batch_size]
+        if self._shuffle:
+            lotes = [lotes[i] for i in rng.permutation(len(lotes))]
+        return lotes
+
+    def __iter__(self):
+        lotes = self._lotes()
+        self._epoch += 1
+        for lote in lotes:
+            yield lote.tolist()
+
+    def __len__(self):
+        n = len(self._longitudes)
+        if not self._drop_last:
+            return sum(-(-min(self._tam_grupo, n - i) // self._batch_size) for i in range(0, n, self._tam_grupo))
+        return len(self._lotes())
+
+
+class ColadorPrealocado:
+    """
+    `collate_fn` equivalente a `audio_vector_collate_fn` que reutiliza tensores preasignados por
+    forma de lote. N_max y K_max se redondean hacia arriba a un múltiplo de `multiplo`
+    para que, junto con `MuestreadorPorLongitud`, las formas se repitan entre lotes. Sólo los
+    audios se entregan con N redondeado (columnas de ceros, como el relleno del lote); las
+    etiquetas se entregan como vista de K_max columnas, porque una columna de relleno contaría
+    en la pérdida como un silencio más.
+
+    Los buffers se reutilizan de forma circular: con la misma forma, la llamada número
+    `n_buffers + 1` escribe sobre el lote de la primera. Un lote sólo es válido hasta que se
+    piden `n_buffers` lotes más; para conservarlo (p. ej. guardarlo en una lista, o adelantar
+    lotes en el proceso principal) hay que copiarlo con `.clone()` o subir `n_buffers`.
+    Si hay GPU, los buffers se crean en memoria fijada (pinned).
+
+    Dentro de un proceso del DataLoader (`num_workers` > 0) no se reutilizan buffers: el lote
+    se envía al proceso principal en memoria compartida y sobreescribirlo en la siguiente
+    llamada corrompería los lotes que aún no se consumen. Ahí cada lote usa tensores nuevos
+    y el DataLoader se encarga de fijarlos en memoria si `pin_memory=True`.
+    """
+    def __init__(self, multiplo: int = 8, n_buffers: int = 2, pin_memory: bool = None, max_formas: int = 32):
+        self._multiplo = multiplo
+        self._n_buffers = n_buffers
+        self._pin_memory = torch.cuda.is_available() if pin_memory is None else pin_memory
+        self._max_formas = max_formas
+        self._buffers = {} # forma -> [buffers, siguiente]
+
+    def _redondear(self, x):
+        return -(-x // self._multiplo) * self._multiplo
+
+    def _buffer(self, forma):
+        entrada = self._buffers.pop(forma, None)
+        if entrada is None:
+            entrada = [[], 0]
+            if len(self._buffers) >= self._max_formas:
+                # Descarta la forma usada hace más tiempo
+                self._buffers.pop(next(iter(self._buffers)))
+        # Reinsertar al final mantiene el orden de uso reciente
+        self._buffers[forma] = entrada
+
+        buffers, siguiente = entrada
+        if len(buffers) < self._n_buffers:
+            B, L, N, K = forma
+            buffers.append((torch.zeros(B, L, N, dtype=torch.float32, pin_memory=self._pin_memory),
+                            torch.zeros(B, K, dtype=torch.int64, pin_memory=self._pin_memory)))
+            siguiente = len(buffers) - 1
+        entrada[1] = (siguiente + 1) % self._n_buffers
+        return buffers[siguiente]
+
+    def __call__(self, batch):
+        with perfilado.etapa('collate') as e:
+            padded_audios, padded_labels = self._colar(batch)
+            e.agregar_bytes(padded_audios.nbytes + padded_labels.nbytes)
+        return padded_audios, padded_labels
+
+    def _colar(self, batch):
+        audios, labels = zip(*batch)
+
+        # Dimensiones máximas en una sola pasada
+        formas = np.array([(audio.size(0), audio.size(1), label.size(0)) for audio, label in batch])
+        L_max, N_max, K_max = formas.max(axis=0).tolist()
+        # L es la dimensión de entrada del Encoder, por lo que no se redondea
+        forma = (len(batch), L_max, self._redondear(N_max), self._redondear(K_max))
+
+        if torch.utils.data.get_worker_info() is not None:
+            B, L, N, _ = forma
+            padded_audios = torch.zeros(B, L, N, dtype=torch.float32)
+            padded_labels = torch.zeros(B, K_max, dtype=torch.int64)
+        else:
+            padded_audios, padded_labels = self._buffer(forma)
+            padded_labels = padded_labels[:, :K_max]
+            padded_audios.zero_()
+            padded_labels.zero_()
+
+        for i, (L, N, K) in enumerate(formas.tolist()):
+            padded_audios[i, :L, :N].copy_(audios[i])
+            padded_labels[i, :K].copy_(labels[i])
+
+        return padded_audios, padded_labels
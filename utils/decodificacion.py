@@ -0,0 +1,105 @@
+"""
+Decodificadores para el Seq2Seq. El encoder (Conv2d + MaxPool2d + LSTM) se ejecuta una sola vez
+por lote con `codificar` y sus estados se pueden reutilizar entre decodificaciones.
+"""
+import torch
+
+
+def codificar(model, src, ventanas=None):
+    """
+    Ejecuta el encoder y regresa su último estado, que es lo único que usa el decoder.
+
+    Parámetros:
+        model (Seq2Seq): Modelo entrenado.
+        src (torch.Tensor): Ventanas [batch_size, L, N].
+        ventanas (torch.Tensor): Columnas reales de cada audio [batch_size]; con ellas el estado
+                                 de cada audio no depende del relleno del lote.
+
+    Retorna:
+        estados (tuple): (hidden, cell), cada uno [1, batch_size, hidden_dim].
+    """
+    _, (hidden, cell) = model.encoder(src, ventanas)
+    return hidden, cell
+
+
+@torch.inference_mode()
+def beam_search(model, src=None, pasos=None, k=4, gramatica=True, longitudes=None, estados=None, ventanas=None):
+    """
+    Búsqueda en haz: las k hipótesis de cada audio se acomodan en la dimensión de batch,
+    así que cada paso es una sola llamada al decoder con batch_size * k entradas.
+
+    El puntaje es la suma de log-probabilidades. Las hipótesis de un mismo audio tienen la misma
+    longitud, por lo que no se normaliza por longitud (no cambiaría cuál es la mejor).
+
+    Parámetros:
+        model (Seq2Seq): Modelo entrenado (en modo evaluación).
+        src (torch.Tensor): Ventanas [batch_size, L, N]. No se usa si se pasan `estados`.
+        pasos (int): Longitud del vector a decodificar, incluyendo <SOS>.
+        k (int): Ancho del haz. k=1 con gramatica=False equivale a la decodificación greedy.
+        gramatica (bool): Prohíbe un "2" (nota sostenida) inmediatamente después de un "0" (silencio o <SOS>).
+        longitudes (torch.Tensor): Pasos de cada audio [batch_size]; después de su longitud,
+                                   un audio sólo se rellena con ceros sin cambiar su puntaje.
+        estados (tuple): (hidden, cell) de `codificar`, para no volver a ejecutar el encoder.
+        ventanas (torch.Tensor): Columnas reales de cada audio [batch_size] (ver `codificar`).
+
+    Retorna:
+        preds (torch.Tensor): Mejor hipótesis de cada audio [batch_size, pasos]; la celda 0 es <SOS>.
+        puntajes (torch.Tensor): Log-probabilidad de esa hipótesis [batch_size].
+    """
+    hidden, cell = estados if estados is not None else codificar(model, src, ventanas)
+    B = hidden.shape[1]
+    device = hidden.device
+    V = model.decoder._labels_dim
+
+    # [1, B, H] -> [1, B * k, H]: las hipótesis de cada audio quedan contiguas
+    hidden = hidden.repeat_interleave(k, dim=1)
+    cell = cell.repeat_interleave(k, dim=1)
+
+    # Al inicio sólo la primera hipótesis está viva, para no repetir k veces la misma
+    puntajes = torch.full((B, k), float('-inf'), device=device)
+    puntajes[:, 0] = 0
+    tokens = torch.zeros(B * k, dtype=torch.int64, device=device) # <SOS>
+    desplazamiento = (torch.arange(B, device=device) * k).unsqueeze(1)
+    if longitudes is None:
+        longitudes = torch.full((B,), pasos, dtype=torch.int64, device=device)
+    longitudes = longitudes.to(device)
+
+    origenes, elegidos = [], []
+    for t in range(1, pasos):
+        logits, hidden, cell = model.decoder(tokens, hidden, cell)
+        logp = torch.log_softmax(logits, dim=-1).view(B, k, V)
+
+        if gramatica:
+            logp[..., 2] = logp[..., 2].masked_fill(tokens.view(B, k) == 0, float('-inf'))
+
+        # Audios terminados: sólo pueden continuar con 0 y sin costo
+        terminados = t >= longitudes
+        if terminados.any():
+            logp[terminados] = float('-inf')
+            logp[terminados, :, 0] = 0
+
+        candidatos = (puntajes.unsqueeze(-1) + logp).view(B, k * V)
+        puntajes, indices = candidatos.topk(k, dim=1)
+        origen = torch.div(indices, V, rounding_mode='floor')
+        token = indices % V
+
+        # Reordenar los estados según la hipótesis de la que viene cada candidato
+        fila = (origen + desplazamiento).view(-1)
+        hidden = hidden[:, fila]
+        cell = cell[:, fila]
+        tokens = token.view(-1)
+
+        origenes.append(origen)
+        elegidos.append(token)
+
+    # Reconstrucción de la mejor hipótesis desde el final
+    mejor_puntaje, mejor = puntajes.max(dim=1)
+
+    preds = torch.zeros(B, pasos, dtype=torch.int64, device=device)
+    haz = mejor
+    filas = torch.arange(B, device=device)
+    for t in range(pasos - 1, 0, -1):
+        preds[:, t] = elegidos[t - 1][filas, haz]
+        haz = origenes[t - 1][filas, haz]
+
+    return preds, mejor_puntaje
@@ -0,0 +1,316 @@
+"""
+Ciclo de entrenamiento y validación del ConvSeq2Seq (antes definido en 3-Arquitectura_ConvSeq2Seq.ipynb)
+y checkpoints reanudables de cada época.
+
+Cada etapa del paso de entrenamiento (espera del DataLoader, copia al dispositivo, forward,
+pérdida, backward, recorte del gradiente y paso del optimizador) se registra con
+`utils.perfilado` cuando el perfilado está activo.
+"""
+import os
+import copy
+import json
+import random
+import collections
+import tempfile
+import concurrent.futures
+import numpy as np
+import torch
+from tqdm.auto import tqdm
+
+from . import perfilado
+
+
+def _lotes(data_loader, desc=None):
+    # Itera el DataLoader midiendo el tiempo de espera de cada lote
+    iterador = iter(tqdm(data_loader, desc=desc) if desc else data_loader)
+    while True:
+        with perfilado.etapa('datos'):
+            batch = next(iterador, None)
+        if batch is None:
+            return
+        yield batch
+
+
+def _al_dispositivo(batch, device):
+    with perfilado.etapa('datos.dispositivo', batch[0].nbytes + batch[1].nbytes):
+        src = batch[0].to(device, non_blocking=True)
+        trg = batch[1].to(device, non_blocking=True)
+    return src, trg
+
+
+def _perdida(output, trg, criterion):
+    # output = [batch size, K, label_size]
+    output_dim = output.shape[-1]
+    output = output[:, 1:].reshape(-1, output_dim)
+    # output = [batch size * (K - 1), label_size]
+    trg = trg[:, 1:].reshape(-1)
+    # trg = [batch size * (K - 1)]
+    return criterion(output, trg)
+
+
+def train_fn(model, data_loader, optimizer, criterion, clip, teacher_forcing_ratio, device):
+    """
+    Una época de entrenamiento.
+
+    Retorna:
+        loss (float): Pérdida promedio por lote.
+    """
+    model.train()
+    epoch_loss = 0
+    for batch in _lotes(data_loader, desc="Training batches"):
+        src, trg = _al_dispositivo(batch, device)
+        # src = [batch size, L, N]
+        # trg = [batch size, K]
+        optimizer.zero_grad()
+        with perfilado.etapa('modelo.forward'):
+            output = model(src, trg, teacher_forcing_ratio)
+        with perfilado.etapa('loss'):
+            loss = _perdida(output, trg, criterion)
+        with perfilado.etapa('loss.backward'):
+            loss.backward()
+        with perfilado.etapa('clip_grad_norm'):
+            torch.nn.utils.clip_grad_norm_(model.parameters(), clip)
+        with perfilado.etapa('optimizer.step'):
+            optimizer.step()
+        epoch_loss += loss.item()
+    return epoch_loss / len(data_loader)
+
+
+def evaluate_fn(model, data_loader, criterion, device):
+    """
+    Pérdida promedio por lote sin teacher forcing.
+    """
+    model.eval()
+    epoch_loss = 0
+    with torch.no_grad():
+        for batch in _lotes(data_loader):
+            src, trg = _al_dispositivo(batch, device)
+            with perfilado.etapa('modelo.forward'):
+                output = model(src, trg, 0)  # apaga teacher forcing
+            with perfilado.etapa('loss'):
+                loss = _perdida(output, trg, criterion)
+            epoch_loss += loss.item()
+    return epoch_loss / len(data_loader)
+
+
+##### Checkpoints
+def _a_cpu(x):
+    # Copia independiente en CPU de un state_dict (tensores anidados en dicts/listas)
+    if torch.is_tensor(x):
+        return x.detach().to('cpu', copy=True)
+    if isinstance(x, dict):
+        return {k: _a_cpu(v) for k, v in x.items()}
+    if isinstance(x, (list, tuple)):
+        return type(x)(_a_cpu(v) for v in x)
+    return copy.deepcopy(x)
+
+
+def estado_rng():
+    """Estado de los generadores de random, numpy y torch (CPU y CUDA)."""
+    estado = {'random': random.getstate(), 'numpy': np.random.get_state(), 'torch': torch.get_rng_state()}
+    if torch.cuda.is_available():
+        estado['cuda'] = torch.cuda.get_rng_state_all()
+    return estado
+
+
+def restaurar_rng(estado):
+    random.setstate(estado['random'])
+    np.random.set_state(estado['numpy'])
+    torch.set_rng_state(estado['torch'])
+    if 'cuda' in estado and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(estado['cuda'])
+
+
+def _escribir_atomico(objeto, path):
+    # Un corte a mitad de la escritura deja el archivo anterior intacto
+    directorio = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directorio, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directorio, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            if isinstance(objeto, bytes):
+                f.write(objeto)
+            else:
+                torch.save(objeto, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+class GestorCheckpoints:
+    """
+    Guarda un checkpoint por época (modelo, optimizador, scheduler, estado de los generadores
+    aleatorios y datos extra como el historial de pérdidas) y permite reanudar el entrenamiento
+    exactamente desde el último.
+
+    `guardar` sólo copia el estado a memoria de CPU; la escritura al disco ocurre en un hilo
+    aparte, por lo que el entrenamiento no espera al almacenamiento (p. ej. Google Drive). Detrás
+    de la escritura en curso puede quedar una más en cola; sólo si el almacenamiento tarda más
+    que dos épocas en escribir un checkpoint, `guardar` espera al más antiguo. Cada
+    archivo se escribe en un temporal y se renombra, y el índice `checkpoints.json` se actualiza
+    después, por lo que una interrupción nunca deja un checkpoint a medias. Se conservan los `k`
+    mejores según la métrica y siempre el último.
+
+    Uso:
+        gestor = GestorCheckpoints('checkpoints/ConvSeq2Seq', k=3, ruta_mejor='checkpoints/ConvSeq2Seq/mejor_modelo.pt')
+        estado = gestor.reanudar(model, optimizer, muestreador=train_sampler)
+        inicio = estado['epoca'] if estado else 0
+        for epoch in range(inicio, n_epochs):
+            train_sampler.set_epoch(epoch)
+            ...
+            gestor.guardar(epoch + 1, model, optimizer, valid_loss, muestreador=train_sampler)
+        gestor.esperar()
+
+    Para que la reanudación sea exacta, la división train/val/test también debe ser
+    reproducible (p. ej. `random_split(..., generator=torch.Generator().manual_seed(0))`).
+    """
+    INDICE = 'checkpoints.json'
+
+    def __init__(self, directorio, k=3, modo='min', ruta_mejor=None):
+        """
+        Parámetros:
+            directorio (str): Carpeta de los checkpoints.
+            k (int): Número de mejores checkpoints que se conservan (además del último).
+            modo (str): 'min' si una métrica menor es mejor (pérdida), 'max' si no.
+            ruta_mejor (str): Si se da, el state_dict del mejor modelo se escribe también en esta
+                              ruta (el formato de models/ConvSeq2Seq_model.pt). Conviene que no sea
+                              el modelo preentrenado del repositorio, que se sobreescribiría.
+        """
+        if modo not in ('min', 'max'):
+            raise ValueError(f"modo debe ser 'min' o 'max', no {modo!r}")
+        self.directorio = directorio
+        self.k = k
+        self.modo = modo
+        self.ruta_mejor = ruta_mejor
+        self._hilo = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self._pendientes = collections.deque() # Escrituras en curso y en cola
+        self._max_pendientes = 2
+
+        os.makedirs(directorio, exist_ok=True)
+        indice_path = os.path.join(directorio, self.INDICE)
+        if os.path.exists(indice_path):
+            with open(indice_path) as f:
+                self._indice = json.load(f)
+        else:
+            self._indice = {'checkpoints': [], 'ultimo': None, 'mejor': None}
+        # El índice lo actualiza el hilo de escritura; la mejor métrica se sigue aquí
+        self._mejor = None if self._indice['mejor'] is None else self._indice['mejor']['metrica']
+
+    def _es_mejor(self, metrica, referencia):
+        if referencia is None:
+            return True
+        return metrica < referencia if self.modo == 'min' else metrica > referencia
+
+    def mejor_metrica(self):
+        return self._mejor
+
+    def guardar(self, epoca, model, optimizer, metrica, scheduler=None, extra=None, muestreador=None):
+        """
+        Copia el estado a CPU y encola su escritura. Si ya hay una escritura en curso y otra en
+        cola, se espera a la más antigua (a lo más tres copias del estado en memoria). Los errores
+        de escrituras anteriores se propagan aquí.
+
+        Parámetros:
+            epoca (int): Épocas completadas; al reanudar se continúa desde esta.
+            model (nn.Module): Modelo.
+            optimizer (Optimizer): Optimizador.
+            metrica (float): Métrica de validación con la que se ordenan los checkpoints.
+            scheduler: Scheduler de la tasa de aprendizaje (opcional).
+            extra (dict): Datos adicionales, p. ej. el historial de pérdidas.
+            muestreador (MuestreadorPorLongitud): Se guarda su época (opcional).
+
+        Retorna:
+            es_mejor (bool): Si la métrica mejora a la de todos los checkpoints anteriores.
+        """
+        metrica = float(metrica)
+        with perfilado.etapa('checkpoint.copia'):
+            estado = {'epoca': int(epoca),
+                      'metrica': metrica,
+                      'model': _a_cpu(model.state_dict()),
+                      'optimizer': _a_cpu(optimizer.state_dict()),
+                      'scheduler': None if scheduler is None else _a_cpu(scheduler.state_dict()),
+                      'rng': estado_rng(),
+                      'muestreador': None if muestreador is None else muestreador.epoch,
+                      'extra': copy.deepcopy(extra)}
+
+        es_mejor = self._es_mejor(metrica, self._mejor)
+        if es_mejor:
+            self._mejor = metrica
+        # Propaga errores de las escrituras terminadas y espera sólo si la cola está llena
+        while self._pendientes and (self._pendientes[0].done() or len(self._pendientes) >= self._max_pendientes):
+            self._pendientes.popleft().result()
+        self._pendientes.append(self._hilo.submit(self._escribir, estado, es_mejor))
+        return es_mejor
+
+    def _escribir(self, estado, es_mejor):
+        epoca, metrica = estado['epoca'], estado['metrica']
+        archivo = f'epoca_{epoca:04d}.pt'
+        with perfilado.etapa('checkpoint.escribir') as e:
+            _escribir_atomico(estado, os.path.join(self.directorio, archivo))
+            e.agregar_bytes(os.path.getsize(os.path.join(self.directorio, archivo)))
+            if es_mejor and self.ruta_mejor:
+                _escribir_atomico(estado['model'], self.ruta_mejor)
+
+        entrada = {'archivo': archivo, 'epoca': epoca, 'metrica': metrica}
+        # Un checkpoint de la misma época (p. ej. tras reanudar) reemplaza al anterior
+        checkpoints = [c for c in self._indice['checkpoints'] if c['archivo'] != archivo] + [entrada]
+        orden = sorted(checkpoints, key=lambda c: c['metrica'], reverse=self.modo == 'max')
+        conservar = {c['archivo'] for c in orden[:self.k]} | {archivo}
+
+        indice = {'checkpoints': [c for c in checkpoints if c['archivo'] in conservar],
+                  'ultimo': entrada,
+                  'mejor': entrada if es_mejor else self._indice['mejor']}
+        _escribir_atomico(json.dumps(indice, indent=2).encode(), os.path.join(self.directorio, self.INDICE))
+        self._indice = indice
+
+        # Se borran hasta que el índice ya no los menciona
+        for c in checkpoints:
+            if c['archivo'] not in conservar:
+                try:
+                    os.remove(os.path.join(self.directorio, c['archivo']))
+                except FileNotFoundError:
+                    pass
+
+    def esperar(self):
+        """Espera a que terminen las escrituras pendientes y propaga su error, si lo hubo."""
+        while self._pendientes:
+            self._pendientes.popleft().result()
+
+    def cerrar(self):
+        self.esperar()
+        self._hilo.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+        return False
+
+    def reanudar(self, model, optimizer=None, scheduler=None, map_location='cpu', muestreador=None):
+        """
+        Carga el último checkpoint en `model`, `optimizer` y `scheduler`, restaura los
+        generadores aleatorios y la época de `muestreador`.
+
+        Retorna:
+            estado (dict): epoca, metrica y extra del checkpoint, o None si no hay ninguno.
+        """
+        self.esperar()
+        ultimo = self._indice['ultimo']
+        if ultimo is None:
+            return None
+
+        estado = torch.load(os.path.join(self.directorio, ultimo['archivo']), map_location=map_location,
+                            weights_only=False)
+        model.load_state_dict(estado['model'])
+        if optimizer is not None:
+            optimizer.load_state_dict(estado['optimizer'])
+        if scheduler is not None and estado['scheduler'] is not None:
+            scheduler.load_state_dict(estado['scheduler'])
+        if muestreador is not None and estado.get('muestreador') is not None:
+            muestreador.set_epoch(estado['muestreador'])
+        restaurar_rng(estado['rng'])
+        return {'epoca': estado['epoca'], 'metrica': estado['metrica'], 'extra': estado['extra']}
@@ -0,0 +1,20 @@
+"""
+Gráficas opcionales. Este módulo es el único que importa matplotlib y librosa.display,
+por lo que sólo se carga cuando se necesita graficar.
+"""
+import os
+import matplotlib.pyplot as plt
+import librosa.display
+
+
+def save_spectrogram(file_path, spectrogram_db, sr, hop_length):
+
+    plt.figure(figsize=(10, 6))
+    librosa.display.specshow(spectrogram_db, sr=sr, hop_length=hop_length, x_axis='time', y_axis='log')
+    plt.colorbar(format='%+2.0f dB')
+    plt.title(f'Espectrograma de STFT de {os.path.basename(file_path)}')
+    
+    # Save the figure
+    output_filename = os.path.splitext(file_path)[0] + '_spectrogram.png'
+    plt.savefig(output_filename)
+    plt.close()
@@ -0,0 +1,399 @@
+"""
+Transcripción de tarareos con el modelo ConvSeq2Seq entrenado (models/ConvSeq2Seq_model.pt).
+
+Uso desde la terminal:
+    python -m utils.inferencia datos/Tarareos/ --salida predicciones/ --batch-size 64
+    python -m utils.inferencia grabacion_larga.wav --largo 2 --midi
+"""
+import os
+import time
+import argparse
+import librosa
+import numpy as np
+import torch
+
+from . import midi
+from . import tarareos
+from . import pipeline
+from . import decodificacion
+from .convseq2seq import Encoder, Decoder, Seq2Seq
+
+
+# Configuración con la que se entrenó el modelo (ver 2-preprocesamiento y 3-Arquitectura_ConvSeq2Seq)
+SR = 22050
+T = 10
+L_SEG = 0.0625 # lowest_time / 2
+TOP_DB = 55
+L = int(SR * L_SEG)
+HIDDEN_DIM = 30
+MODELO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models', 'ConvSeq2Seq_model.pt')
+
+
+def cargar_modelo(path=MODELO, hidden_dim=HIDDEN_DIM, device='cpu', cuantizado=False):
+    """
+    Construye el Seq2Seq con la arquitectura de entrenamiento y carga sus pesos.
+
+    Parámetros:
+        path (str): Ruta al state_dict del modelo.
+        hidden_dim (int): Dimensión oculta de los LSTM.
+        device (str): Dispositivo de inferencia.
+        cuantizado (bool): Los pesos son de un modelo int8 de `cuantizacion.exportar` (sólo CPU).
+
+    Retorna:
+        model (Seq2Seq): Modelo en modo evaluación.
+    """
+    encoder = Encoder(input_dim=L, hidden_dim=hidden_dim)
+    decoder = Decoder(labels_dim=3, embedding_dim=3, hidden_dim=hidden_dim, dropout=0.25)
+    model = Seq2Seq(encoder, decoder, device).to(device).eval()
+    if cuantizado:
+        from .cuantizacion import cuantizar, cargar_pesos
+        model = cuantizar(model)
+        cargar_pesos(model, torch.load(path, map_location=device, weights_only=True))
+    else:
+        model.load_state_dict(torch.load(path, map_location=device))
+    return model.eval()
+
+
+def preparar(audio, sr, T=T, L_seg=L_SEG, top_db=TOP_DB):
+    """
+    Aplica al audio el mismo tratamiento que en el preprocesamiento: recorte de silencio,
+    recorte a T segundos, normalización y división en ventanas, con <SOS> y <EOS>.
+
+    Parámetros:
+        audio (np.ndarray): Array de audio.
+        sr (int): Frecuencia de muestreo del audio.
+        T (float): Duración máxima en segundos.
+        L_seg (float): Duración de cada ventana en segundos.
+        top_db (float): Umbral de Decibeles debajo del cual se considera silencio.
+
+    Retorna:
+        frames (np.ndarray): Ventanas float32 de (L, n_ventanas + 2).
+    """
+    if sr != SR:
+        audio = librosa.resample(audio, orig_sr=sr, target_sr=SR)
+        sr = SR
+
+    y_recortado = tarareos.trim(audio, sr, T, top_db=top_db)
+
+    # Al menos una ventana completa
+    n_muestras = int(sr * L_seg)
+    if len(y_recortado) < n_muestras:
+        y_recortado = np.pad(y_recortado, (0, n_muestras - len(y_recortado)))
+
+    # Amplitud positiva (magnitud) y Normalizar
+    y_abs = np.abs(y_recortado)
+    rango = np.max(y_abs) - np.min(y_abs)
+    y_norm = (y_recortado - np.min(y_abs)) / (rango if rango > 0 else 1)
+
+    audio_frames, _ = tarareos.dividir_en_ventanas(y_norm, sr, L_seg)
+
+    frames = np.zeros((audio_frames.shape[0], audio_frames.shape[1] + 2), dtype=np.float32)
+    frames[:, 1:-1] = audio_frames
+    return frames
+
+
+def _preparar_archivo(audio_path, T=T, L_seg=L_SEG, top_db=TOP_DB):
+    y, sr = tarareos.cargar_audio(audio_path, sr=SR)
+    return preparar(y, sr, T, L_seg, top_db)
+
+
+def ventanas_largas(audio, sr, T=T, solape=2.0, L_seg=L_SEG, top_db=TOP_DB):
+    """
+    Divide una grabación de cualquier duración en ventanas de T segundos que se traslapan
+    `solape` segundos. Se recorta el silencio al inicio y final de toda la grabación y cada
+    ventana se normaliza por separado, como los extractos de T segundos del entrenamiento.
+    Las ventanas se generan una a una, así que sólo el audio ocupa memoria proporcional a la duración.
+
+    Parámetros:
+        audio (np.ndarray): Array de audio.
+        sr (int): Frecuencia de muestreo del audio.
+        T (float): Duración de cada ventana en segundos.
+        solape (float): Traslape entre ventanas consecutivas en segundos.
+        L_seg (float): Duración de cada casilla en segundos.
+        top_db (float): Umbral de Decibeles debajo del cual se considera silencio.
+
+    Retorna:
+        ventanas (generator): Pares (inicio, frames) con la casilla inicial de la ventana y sus
+                              frames float32 de (L, n_casillas + 2), como los de `preparar`.
+    """
+    if sr != SR:
+        audio = librosa.resample(audio, orig_sr=sr, target_sr=SR)
+        sr = SR
+
+    y_recortado = tarareos.trim(audio, sr, len(audio) / sr, top_db=top_db)
+    n_muestras = int(sr * L_seg)
+    if len(y_recortado) < n_muestras:
+        y_recortado = np.pad(y_recortado, (0, n_muestras - len(y_recortado)))
+
+    # Vista (L, n_casillas) sin copia
+    audio_frames, _ = tarareos.dividir_en_ventanas(y_recortado, sr, L_seg)
+    n_total = audio_frames.shape[1]
+    N = int(round(T / L_seg))
+    paso = max(1, N - int(round(solape / L_seg)))
+
+    inicio = 0
+    while True:
+        bloque = audio_frames[:, inicio:inicio + N]
+
+        # Amplitud positiva (magnitud) y Normalizar
+        y_abs = np.abs(bloque)
+        minimo = y_abs.min()
+        rango = y_abs.max() - minimo
+        frames = np.zeros((bloque.shape[0], bloque.shape[1] + 2), dtype=np.float32)
+        frames[:, 1:-1] = (bloque - minimo) / (rango if rango > 0 else 1)
+        yield inicio, frames
+
+        if inicio + N >= n_total:
+            break
+        inicio += paso
+
+
+def _corte(vec_a, inicio_a, vec_b, inicio_b):
+    # Casilla donde se pasa de la ventana a a la b: dentro del traslape, la más cercana al punto
+    # medio en la que ambas ventanas coinciden, para no partir una nota; si no hay, el punto medio.
+    fin_a = inicio_a + len(vec_a)
+    if fin_a <= inicio_b:
+        return inicio_b
+    posiciones = np.arange(inicio_b, fin_a)
+    medio = (inicio_b + fin_a) // 2
+    coinciden = posiciones[vec_a[posiciones - inicio_a] == vec_b[posiciones - inicio_b]]
+    if len(coinciden) == 0:
+        return medio
+    return int(coinciden[np.argmin(np.abs(coinciden - medio))])
+
+
+def unir_ventanas(vectores, inicios):
+    """
+    Une los vectores 0,1,2 de ventanas traslapadas en un solo vector continuo. En cada
+    traslape se corta en una casilla donde ambas ventanas coinciden (la más cercana al punto medio)
+    y, si en la unión queda un "2" después de un "0", se cambia por "1".
+
+    Parámetros:
+        vectores (list): Vector de cada ventana, en orden.
+        inicios (list): Casilla inicial de cada ventana.
+
+    Retorna:
+        vector (np.ndarray): Vector int8 de toda la grabación.
+    """
+    if not vectores:
+        return np.zeros(0, dtype=np.int8)
+
+    total = inicios[-1] + len(vectores[-1])
+    vector = np.zeros(total, dtype=np.int8)
+    desde = 0
+    for k, (vec, inicio) in enumerate(zip(vectores, inicios)):
+        hasta = total if k == len(vectores) - 1 else _corte(vec, inicio, vectores[k + 1], inicios[k + 1])
+        vector[desde:hasta] = vec[desde - inicio:hasta - inicio]
+        if desde > 0 and vector[desde] == 2 and vector[desde - 1] == 0:
+            vector[desde] = 1
+        desde = hasta
+
+    return vector
+
+
+def decodificar_greedy(model, src, pasos, ventanas=None):
+    """
+    Decodificación greedy sin vector objetivo: la entrada inicial es <SOS> (0) y cada paso
+    usa el código más probable del anterior. El encoder se ejecuta una sola vez.
+
+    Parámetros:
+        model (Seq2Seq): Modelo entrenado.
+        src (torch.Tensor): Ventanas [batch_size, L, N].
+        pasos (int): Longitud del vector a decodificar, incluyendo <SOS>.
+        ventanas (torch.Tensor): Columnas reales de cada audio [batch_size]. Sin ellas, el relleno
+                                 del lote también pasa por el encoder.
+
+    Retorna:
+        preds (torch.Tensor): Códigos [batch_size, pasos]; la celda 0 es <SOS>.
+    """
+    _, (hidden, cell) = model.encoder(src, ventanas)
+
+    preds = torch.zeros(src.shape[0], pasos, dtype=torch.int64, device=src.device)
+    input = preds[:, 0]
+    for t in range(1, pasos):
+        output, hidden, cell = model.decoder(input, hidden, cell)
+        input = output.argmax(1)
+        preds[:, t] = input
+
+    return preds
+
+
+class Transcriptor:
+    """
+    Motor de inferencia por lotes sobre CPU. Carga el modelo una sola vez y agrupa las
+    solicitudes en micro-lotes de tamaño similar (ordenados por número de ventanas). El encoder
+    se detiene en la longitud real de cada audio, así que la transcripción no depende de los
+    demás audios del lote (salvo en el modelo cuantizado, cuya escala de activaciones es por lote).
+
+    El presupuesto de pasos de decodificación es fijo (`pasos`) o, si es None, el número de
+    ventanas de cada audio + 2, que es donde el modelo aprendió a colocar el <EOS>.
+    Con `haz` > 1 se decodifica con búsqueda en haz (ver `decodificacion.beam_search`).
+    """
+    def __init__(self, model_path=MODELO, batch_size=32, pasos=None, device='cpu', n_threads=None, haz=1,
+                 cuantizado=False):
+        if n_threads is not None:
+            torch.set_num_threads(n_threads)
+        self.model = cargar_modelo(model_path, device=device, cuantizado=cuantizado)
+        self.batch_size = batch_size
+        self.pasos = pasos
+        self.device = device
+        self.haz = haz
+
+    def transcribir_frames(self, frames):
+        """
+        Parámetros:
+            frames (list): Ventanas (L, n_ventanas + 2) de `preparar`.
+
+        Retorna:
+            vectores (list): Vector int8 codificado en 0,1,2 por audio, sin <SOS> ni <EOS>.
+        """
+        n_ventanas = np.array([f.shape[1] for f in frames])
+        orden = np.argsort(n_ventanas, kind='stable')
+        vectores = [None] * len(frames)
+
+        with torch.inference_mode():
+            for inicio in range(0, len(frames), self.batch_size):
+                lote = orden[inicio:inicio + self.batch_size]
+                N_max = n_ventanas[lote].max()
+                src = torch.zeros(len(lote), L, N_max, dtype=torch.float32)
+                for i, j in enumerate(lote):
+                    src[i, :, :n_ventanas[j]] = torch.from_numpy(frames[j])
+
+                pasos = self.pasos or int(N_max)
+                ventanas = torch.from_numpy(n_ventanas[lote])
+                if self.haz > 1:
+                    longitudes = None if self.pasos else ventanas
+                    preds, _ = decodificacion.beam_search(self.model, src.to(self.device), pasos, k=self.haz,
+                                                          longitudes=longitudes, ventanas=ventanas)
+                else:
+                    preds = decodificar_greedy(self.model, src.to(self.device), pasos, ventanas)
+                preds = preds.cpu().numpy().astype(np.int8)
+
+                for i, j in enumerate(lote):
+                    fin = pasos - 1 if self.pasos else n_ventanas[j] - 1
+                    vectores[j] = preds[i, 1:fin]
+
+        return vectores
+
+    def transcribir_largo(self, entrada, sr=SR, solape=2.0, T=T):
+        """
+        Transcribe una grabación de cualquier duración con ventanas de T segundos traslapadas
+        (ver `ventanas_largas` y `unir_ventanas`). Las ventanas pasan por el modelo en lotes de
+        `batch_size`, por lo que la memoria del modelo no depende de la duración.
+
+        Parámetros:
+            entrada (str | np.ndarray): Ruta a un archivo .wav o array de audio con frecuencia `sr`.
+            sr (int): Frecuencia de muestreo del array de audio.
+            solape (float): Traslape entre ventanas en segundos.
+            T (float): Duración de cada ventana en segundos.
+
+        Retorna:
+            vector (np.ndarray): Vector int8 codificado en 0,1,2 de toda la grabación.
+        """
+        if isinstance(entrada, str):
+            entrada, sr = tarareos.cargar_audio(entrada, sr=SR)
+
+        vectores, inicios, lote = [], [], []
+        for inicio, frames in ventanas_largas(entrada, sr, T=T, solape=solape):
+            inicios.append(inicio)
+            lote.append(frames)
+            if len(lote) == self.batch_size:
+                vectores.extend(self._vectores_ventana(lote))
+                lote = []
+        if lote:
+            vectores.extend(self._vectores_ventana(lote))
+
+        return unir_ventanas(vectores, inicios)
+
+    def _vectores_ventana(self, frames):
+        # Con `pasos` fijo la salida puede no medir lo mismo que la ventana; se ajusta con ceros
+        vectores = self.transcribir_frames(frames)
+        ajustados = []
+        for f, vec in zip(frames, vectores):
+            n = f.shape[1] - 2
+            ajustado = np.zeros(n, dtype=np.int8)
+            ajustado[:min(n, len(vec))] = vec[:n]
+            ajustados.append(ajustado)
+        return ajustados
+
+    def transcribir(self, entradas, sr=SR):
+        """
+        Parámetros:
+            entradas (list): Rutas a archivos .wav o arrays de audio con frecuencia de muestreo `sr`.
+            sr (int): Frecuencia de muestreo de los arrays de audio.
+
+        Retorna:
+            vectores (list): Vector int8 codificado en 0,1,2 por entrada.
+        """
+        frames = [_preparar_archivo(e) if isinstance(e, str) else preparar(e, sr) for e in entradas]
+        return self.transcribir_frames(frames)
+
+
+def _listar_wavs(rutas):
+    wavs = []
+    for ruta in rutas:
+        if os.path.isdir(ruta):
+            wavs.extend(os.path.join(ruta, f) for f in sorted(os.listdir(ruta)) if f.lower().endswith('.wav'))
+        else:
+            wavs.append(ruta)
+    return wavs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Transcribe tarareos .wav a vectores 0/1/2 con ConvSeq2Seq.')
+    parser.add_argument('rutas', nargs='+', help='Archivos .wav o carpetas que los contienen.')
+    parser.add_argument('--modelo', default=MODELO, help='Ruta al state_dict del modelo.')
+    parser.add_argument('--salida', default='predicciones', help='Carpeta donde guardar los <nombre>_pred.npy.')
+    parser.add_argument('--batch-size', type=int, default=32, help='Tamaño máximo de cada micro-lote.')
+    parser.add_argument('--pasos', type=int, default=None, help='Pasos fijos de decodificación (por omisión, según el audio).')
+    parser.add_argument('--workers', type=int, default=None, help='Procesos para la extracción de ventanas.')
+    parser.add_argument('--bloque', type=int, default=512, help='Archivos que se preparan en memoria a la vez.')
+    parser.add_argument('--largo', type=float, default=None, metavar='SOLAPE',
+                        help='Transcribe la grabación completa con ventanas de T s traslapadas SOLAPE s.')
+    parser.add_argument('--midi', action='store_true', help='Guarda además un <nombre>_pred.mid.')
+    parser.add_argument('--haz', type=int, default=1, help='Ancho de la búsqueda en haz (1 = greedy).')
+    parser.add_argument('--int8', action='store_true', help='El modelo es int8 (ver utils.cuantizacion).')
+    args = parser.parse_args(argv)
+
+    wavs = _listar_wavs(args.rutas)
+    os.makedirs(args.salida, exist_ok=True)
+    transcriptor = Transcriptor(args.modelo, batch_size=args.batch_size, pasos=args.pasos, haz=args.haz,
+                               cuantizado=args.int8)
+
+    def guardar(wavs, vectores):
+        nombres = [os.path.join(args.salida, os.path.splitext(os.path.basename(wav))[0] + '_pred') for wav in wavs]
+        for nombre, vector in zip(nombres, vectores):
+            np.save(nombre + '.npy', vector)
+        if args.midi and vectores:
+            # Los vectores tienen largos distintos: se escriben juntos con relleno y sus longitudes
+            longitudes = np.array([len(v) for v in vectores])
+            matriz = np.zeros((len(vectores), longitudes.max()), dtype=np.int8)
+            for fila, vector in zip(matriz, vectores):
+                fila[:len(vector)] = vector
+            midi.vec2midi_lote(matriz, L_SEG, [nombre + '.mid' for nombre in nombres], longitudes)
+
+    inicio = time.perf_counter()
+    n_ok = 0
+    if args.largo is not None:
+        # Una grabación a la vez; las ventanas de cada una se agrupan en lotes
+        for wav in wavs:
+            guardar([wav], [transcriptor.transcribir_largo(wav, solape=args.largo)])
+            n_ok += 1
+    else:
+        for b in range(0, len(wavs), args.bloque):
+            bloque = wavs[b:b + args.bloque]
+            frames, fallas = pipeline.ejecutar(_preparar_archivo, bloque, n_workers=args.workers, chunksize=4)
+            for wav, error in fallas.items():
+                print(f'Error en {wav}:\n{error}')
+
+            nombres = list(frames)
+            vectores = transcriptor.transcribir_frames([frames[n] for n in nombres])
+            guardar(nombres, vectores)
+            n_ok += len(nombres)
+
+    duracion = time.perf_counter() - inicio
+    print(f'{n_ok} archivos en {duracion:.2f} s ({n_ok / max(duracion, 1e-9):.2f} archivos/s)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""
+Métricas de evaluación acumulables por lote: matriz de confusión, accuracy, precision, recall y F1
+ponderados (como `sklearn.metrics` con average='weighted' y zero_division=0) y distancia de
+Levenshtein de un lote completo de secuencias. La memoria no depende del tamaño del conjunto.
+"""
+import numpy as np
+
+
+def _numpy(x):
+    # Acepta tensores de torch sin importar torch
+    if hasattr(x, 'detach'):
+        x = x.detach().cpu().numpy()
+    return np.asarray(x)
+
+
+def mascara_longitudes(longitudes, K):
+    """Máscara booleana [batch_size, K] que es True en las primeras `longitudes[i]` posiciones de cada fila."""
+    return np.arange(K) < _numpy(longitudes)[:, np.newaxis]
+
+
+class MatrizConfusion:
+    """
+    Matriz de confusión que se actualiza por lote con un solo `np.bincount`.
+    Las filas son la clase verdadera y las columnas la predicha.
+    """
+    def __init__(self, n_clases=3):
+        self.n_clases = n_clases
+        self.matriz = np.zeros((n_clases, n_clases), dtype=np.int64)
+
+    def actualizar(self, targets, preds, mascara=None):
+        """
+        Parámetros:
+            targets (array): Clases verdaderas, de cualquier forma.
+            preds (array): Clases predichas, de la misma forma.
+            mascara (array): Posiciones válidas (p. ej. sin padding), de la misma forma.
+        """
+        targets = _numpy(targets).astype(np.int64, copy=False)
+        preds = _numpy(preds).astype(np.int64, copy=False)
+        if mascara is not None:
+            mascara = _numpy(mascara).astype(bool, copy=False)
+            targets, preds = targets[mascara], preds[mascara]
+        n = self.n_clases
+        self.matriz += np.bincount(targets.ravel() * n + preds.ravel(), minlength=n * n).reshape(n, n)
+
+    def accuracy(self):
+        total = self.matriz.sum()
+        return float(np.trace(self.matriz) / total) if total else 0.0
+
+    def por_clase(self):
+        """precision, recall, f1 y soporte de cada clase."""
+        verdaderos = np.diag(self.matriz).astype(np.float64)
+        predichos = self.matriz.sum(axis=0)
+        soporte = self.matriz.sum(axis=1)
+        precision = np.divide(verdaderos, predichos, out=np.zeros_like(verdaderos), where=predichos > 0)
+        recall = np.divide(verdaderos, soporte, out=np.zeros_like(verdaderos), where=soporte > 0)
+        suma = precision + recall
+        f1 = np.divide(2 * precision * recall, suma, out=np.zeros_like(verdaderos), where=suma > 0)
+        return precision, recall, f1, soporte
+
+    def ponderadas(self):
+        """precision, recall y f1 promediadas con el soporte de cada clase como peso."""
+        precision, recall, f1, soporte = self.por_clase()
+        total = soporte.sum()
+        if total == 0:
+            return 0.0, 0.0, 0.0
+        pesos = soporte / total
+        return float(precision @ pesos), float(recall @ pesos), float(f1 @ pesos)
+
+
+def levenshtein_lote(a, b, longitudes_a=None, longitudes_b=None):
+    """
+    Distancia de edición entre las filas de `a` y `b` con una sola programación dinámica
+    vectorizada sobre el lote. Se recorre `a` renglón por renglón; dentro del renglón, la
+    dependencia de izquierda a derecha (inserciones) se resuelve con un mínimo acumulado:
+    D[i, j] = j + min_{k <= j} (tmp[k] - k).
+
+    Parámetros:
+        a (array): Secuencias enteras con padding [batch_size, n].
+        b (array): Secuencias enteras con padding [batch_size, m].
+        longitudes_a (array): Longitud real de cada fila de `a` (por omisión n).
+        longitudes_b (array): Longitud real de cada fila de `b` (por omisión m).
+
+    Retorna:
+        distancias (np.ndarray): Distancia int64 de cada par [batch_size].
+    """
+    a, b = _numpy(a), _numpy(b)
+    B, n = a.shape
+    m = b.shape[1]
+    longitudes_a = np.full(B, n) if longitudes_a is None else _numpy(longitudes_a).astype(np.int64)
+    longitudes_b = np.full(B, m) if longitudes_b is None else _numpy(longitudes_b).astype(np.int64)
+
+    filas = np.arange(B)
+    columnas = np.arange(m + 1)
+    D = np.broadcast_to(columnas, (B, m + 1)).copy() # Renglón 0: j inserciones
+    distancias = D[filas, longitudes_b].copy()       # Secuencias `a` vacías
+
+    tmp = np.empty_like(D)
+    for i in range(1, int(longitudes_a.max(initial=0)) + 1):
+        costo = (a[:, i - 1:i] != b).astype(np.int64)
+        tmp[:, 0] = i
+        np.minimum(D[:, 1:] + 1, D[:, :-1] + costo, out=tmp[:, 1:])
+        tmp -= columnas
+        np.minimum.accumulate(tmp, axis=1, out=D)
+        D += columnas
+
+        terminadas = longitudes_a == i
+        distancias[terminadas] = D[terminadas, longitudes_b[terminadas]]
+
+    return distancias
+
+
+class EvaluadorSecuencias:
+    """
+    Acumula por lote la matriz de confusión por casilla y la distancia de Levenshtein por
+    secuencia entre predicciones y vectores objetivo con padding.
+
+    Uso:
+        evaluador = EvaluadorSecuencias()
+        for ...:
+            evaluador.actualizar(preds, trg, longitudes)
+        evaluador.resultados()
+    """
+    def __init__(self, n_clases=3, guardar_distancias=False):
+        self.confusion = MatrizConfusion(n_clases)
+        self.suma_distancias = 0
+        self.n_secuencias = 0
+        # Distancias individuales, p. ej. para un histograma (crece con el número de secuencias)
+        self.distancias = [] if guardar_distancias else None
+
+    def actualizar(self, preds, targets, longitudes=None):
+        """
+        Parámetros:
+            preds (array): Predicciones [batch_size, K].
+            targets (array): Vectores objetivo [batch_size, K].
+            longitudes (array): Casillas válidas de cada fila (por omisión K).
+        """
+        preds, targets = _numpy(preds), _numpy(targets)
+        if longitudes is None:
+            longitudes = np.full(len(targets), targets.shape[1])
+        longitudes = _numpy(longitudes)
+
+        self.confusion.actualizar(targets, preds, mascara_longitudes(longitudes, targets.shape[1]))
+        distancias = levenshtein_lote(preds, targets, longitudes, longitudes)
+        self.suma_distancias += int(distancias.sum())
+        self.n_secuencias += len(distancias)
+        if self.distancias is not None:
+            self.distancias.extend(distancias.tolist())
+
+    def resultados(self):
+        precision, recall, f1 = self.confusion.ponderadas()
+        return {'accuracy': self.confusion.accuracy(),
+                'precision': precision,
+                'recall': recall,
+                'f1': f1,
+                'levenshtein': self.suma_distancias / max(self.n_secuencias, 1)}
@@ -59,6 +59,99 @@ def midi2vec(midi, N, T): #, L_segs
     return vector_midi
 
 
+def midi2eventos(midi):
+    """
+    Extrae los eventos de nota de un archivo MIDI como un arreglo compacto de tiempos.
+    Cada renglón corresponde a una nota: `[inicio, fin]` en segundos desde el comienzo del archivo.
+    Se obtiene de la tabla de notas (ver `midi2notas`).
+
+    Parámetros:
+        midi (MidiFile): Archivo MIDI a transformar
+
+    Retorna:
+        eventos (np.ndarray): Arreglo (notas, 2) de tiempos de inicio y fin ordenados por inicio.
+    """
+    notas, ticks_per_beat, tempo = midi2notas(midi)
+    return notas2eventos(notas, tempo, ticks_per_beat)
+
+
+def eventos2vec(eventos, N, T, out=None):
+    """
+    Versión vectorizada de `midi2vec` a partir de los eventos de `midi2eventos`.
+    Sigue los mismos criterios de asignación:
+    `vec[i] -> comienzo del evento`
+    `vec[i+1] -> Duración L_segs del evento`
+    A diferencia de `midi2vec`, el vector resultante siempre tiene longitud N; las casillas
+    posteriores a la última nota se marcan como silencio y las notas después de T se descartan.
+
+    Las casillas se calculan con el tiempo absoluto de cada evento (`floor(t / L_segs)`),
+    mientras que `midi2vec` redondea hacia abajo cada silencio y cada duración por separado.
+    Si L_segs = T/N divide a todas las duraciones ambos vectores coinciden; si no, en
+    `midi2vec` los redondeos se acumulan y las notas se recorren hacia el inicio (en el corpus,
+    con T/N que no divide a las figuras, difieren casi todos los archivos). Aquí cada inicio
+    de nota cae en la casilla de su tiempo real, que es la que corresponde a la ventana de audio.
+
+    Parámetros:
+        eventos (np.ndarray): Arreglo (notas, 2) de tiempos de inicio y fin en segundos.
+        N (int): Número total de ventanas
+        T (float): Duración total que representará el vector
+        out (np.ndarray): Vector de longitud N donde escribir el resultado (opcional).
+
+    Retorna:
+        vector_midi (np.ndarray): Vector int8 de longitud N codificado en 0,1,2.
+    """
+    if out is None:
+        out = np.zeros(N, dtype=np.int8)
+    else:
+        out[:] = 0
+
+    if len(eventos) == 0:
+        return out
+
+    # Índice de casilla de cada evento. La tolerancia absorbe el error de conversión tick -> segundo
+    L_segs = T / N
+    inicio = np.floor(eventos[:, 0] / L_segs + 1e-6).astype(np.int64)
+    fin = np.floor(eventos[:, 1] / L_segs + 1e-6).astype(np.int64)
+
+    validas = inicio < N
+    inicio = inicio[validas]
+    fin = np.minimum(fin[validas], N)
+
+    # Notas sostenidas: casillas (inicio, fin) marcadas con diferencias acumuladas
+    sostenidas = fin > inicio + 1
+    delta = np.zeros(N + 1, dtype=np.int32)
+    np.add.at(delta, inicio[sostenidas] + 1, 1)
+    np.add.at(delta, fin[sostenidas], -1)
+    out[np.cumsum(delta[:N]) > 0] = 2
+
+    # Los inicios de nota tienen prioridad sobre cualquier nota sostenida
+    out[inicio] = 1
+
+    return out
+
+
+def midi2vec_lote(midis, N, T):
+    """
+    Codifica una lista de archivos MIDI en una sola matriz preasignada.
+
+    Parámetros:
+        midis (list): Rutas de archivos MIDI u objetos MidiFile.
+        N (int): Número total de ventanas
+        T (float): Duración total que representará cada vector
+
+    Retorna:
+        vectores (np.ndarray): Matriz int8 de (archivos, N) codificada en 0,1,2.
+    """
+    vectores = np.zeros((len(midis), N), dtype=np.int8)
+
+    for i, midi in enumerate(midis):
+        if not isinstance(midi, mido.MidiFile):
+            midi = mido.MidiFile(midi)
+        eventos2vec(midi2eventos(midi), N, T, out=vectores[i])
+
+    return vectores
+
+
 
 ###### Midi analysis ###############
 # Detecta MIDIs con "note_on" consecutivos en lugar de "note_on/note_off"
@@ -163,6 +256,334 @@ def trim(midi, tempo, T):
     return new_midi
 
 
+###### Tabla de notas ###############
+# Representación compacta de un MIDI: una fila por nota con tiempos en ticks absolutos.
+# Supone un solo tempo por archivo, como ocurre en el corpus de tarareos.
+NOTAS_DTYPE = np.dtype([('nota', np.uint8),
+                        ('inicio', np.int64),
+                        ('fin', np.int64),
+                        ('velocity', np.uint8)])
+
+TEMPO_DEFAULT = 500000 # 120 bpm, valor por omisión del estándar MIDI
+
+
+def midi2notas(midi):
+    """
+    Construye la tabla de notas de un archivo MIDI en un solo recorrido de sus pistas.
+    Una nota termina con 'note_off', con 'note_on' de velocity 0 o con un nuevo 'note_on'
+    del mismo tono mientras sigue sonando.
+
+    Parámetros:
+        midi (MidiFile): Archivo MIDI a transformar
+
+    Retorna:
+        notas (np.ndarray): Arreglo estructurado NOTAS_DTYPE ordenado por inicio.
+        ticks_per_beat (int): Resolución del archivo MIDI.
+        tempo (int): Tempo en microsegundos por negra (el primero definido en el archivo).
+    """
+    filas = []
+    tempo = None
+
+    for track in midi.tracks:
+        ticks = 0
+        activas = {} # nota -> (tick de inicio, velocity)
+        for msg in track:
+            ticks += msg.time
+            if msg.type == 'set_tempo' and tempo is None:
+                tempo = msg.tempo
+            elif msg.type == 'note_on' and msg.velocity > 0:
+                if msg.note in activas:
+                    # Reinicio de una nota que sigue sonando: la anterior termina aquí
+                    inicio, velocity = activas[msg.note]
+                    filas.append((msg.note, inicio, ticks, velocity))
+                activas[msg.note] = (ticks, msg.velocity)
+            elif msg.type in ('note_off', 'note_on') and msg.note in activas:
+                inicio, velocity = activas.pop(msg.note)
+                filas.append((msg.note, inicio, ticks, velocity))
+
+    notas = np.array(filas, dtype=NOTAS_DTYPE)
+    notas = notas[np.argsort(notas['inicio'], kind='stable')]
+
+    return notas, midi.ticks_per_beat, (tempo or TEMPO_DEFAULT)
+
+
+def notas2eventos(notas, tempo, ticks_per_beat):
+    """
+    Convierte los ticks de la tabla de notas a segundos.
+
+    Parámetros:
+        notas (np.ndarray): Tabla de notas NOTAS_DTYPE.
+        tempo (int): Tempo en microsegundos por negra.
+        ticks_per_beat (int): Resolución del archivo MIDI.
+
+    Retorna:
+        eventos (np.ndarray): Arreglo (notas, 2) de tiempos de inicio y fin en segundos.
+    """
+    segundos_por_tick = tempo * 1e-6 / ticks_per_beat
+    eventos = np.empty((len(notas), 2), dtype=np.float64)
+    np.multiply(notas['inicio'], segundos_por_tick, out=eventos[:, 0])
+    np.multiply(notas['fin'], segundos_por_tick, out=eventos[:, 1])
+    return eventos
+
+
+def lstrip_notas(notas):
+    """
+    Versión de `lstrip` sobre la tabla de notas: recorta el tiempo muerto antes de la primera nota.
+    El recorte se hace "in place".
+
+    Parámetros:
+        notas (np.ndarray): Tabla de notas NOTAS_DTYPE.
+
+    Retorna:
+        notas (np.ndarray): Tabla de notas cuya primera nota comienza en el tick 0.
+    """
+    if len(notas):
+        desfase = notas['inicio'].min()
+        notas['inicio'] -= desfase
+        notas['fin'] -= desfase
+    return notas
+
+
+def trim_notas(notas, tempo, ticks_per_beat, T):
+    """
+    Versión de `trim` sobre la tabla de notas: conserva sólo las notas que terminan
+    antes de T segundos, eliminando cualquier nota sonando en el corte.
+
+    Parámetros:
+        notas (np.ndarray): Tabla de notas NOTAS_DTYPE.
+        tempo (int): Tempo en microsegundos por negra.
+        ticks_per_beat (int): Resolución del archivo MIDI.
+        T (float): Duración máxima en segundos.
+
+    Retorna:
+        notas (np.ndarray): Tabla de notas con una duración máxima de T segundos.
+    """
+    ticks_per_second = ticks_per_beat * 1e6 / tempo
+    max_ticks = int(T * ticks_per_second)
+    return notas[notas['fin'] <= max_ticks]
+
+
+def notas2midi(notas, ticks_per_beat, tempo):
+    """
+    Serializa la tabla de notas a un archivo MIDI de una pista con mensajes
+    'note_on'/'note_off' (velocity 0 al terminar), como los del corpus.
+
+    Parámetros:
+        notas (np.ndarray): Tabla de notas NOTAS_DTYPE.
+        ticks_per_beat (int): Resolución del archivo MIDI.
+        tempo (int): Tempo en microsegundos por negra.
+
+    Retorna:
+        midi (MidiFile): Archivo MIDI equivalente a la tabla.
+    """
+    n = len(notas)
+    ticks = np.concatenate((notas['inicio'], notas['fin']))
+    es_inicio = np.concatenate((np.ones(n, dtype=bool), np.zeros(n, dtype=bool)))
+    tonos = np.concatenate((notas['nota'], notas['nota'])).tolist()
+    velocities = np.concatenate((notas['velocity'], np.zeros(n, dtype=np.uint8))).tolist()
+
+    # En un mismo tick, los 'note_off' van antes que los 'note_on'
+    orden = np.lexsort((es_inicio, ticks))
+    deltas = np.diff(ticks[orden], prepend=0).tolist()
+
+    track = mido.MidiTrack()
+    track.append(mido.MetaMessage('set_tempo', tempo=int(tempo), time=0))
+    for j, delta in zip(orden.tolist(), deltas):
+        tipo = 'note_on' if es_inicio[j] else 'note_off'
+        track.append(mido.Message(tipo, note=tonos[j], velocity=velocities[j], time=delta))
+
+    midi = mido.MidiFile(ticks_per_beat=ticks_per_beat)
+    midi.tracks.append(track)
+    return midi
+
+
+def vec2notas(vec, L_segs, ticks_per_beat=480, tempo=TEMPO_DEFAULT, nota=60, velocity=64):
+    """
+    Operación inversa de `eventos2vec`: cada "1" inicia una nota que dura su casilla y las "2"
+    consecutivas. Un "2" después de un "0" también se considera inicio de nota.
+    El vector no contiene altura, por lo que todas las notas usan el tono `nota`.
+
+    Parámetros:
+        vec (np.ndarray): Vector MIDI codificado en 0,1,2.
+        L_segs (float): Duración de cada casilla en segundos.
+        ticks_per_beat (int): Resolución del archivo MIDI.
+        tempo (int): Tempo en microsegundos por negra.
+        nota (int): Tono MIDI de las notas.
+        velocity (int): Velocity de las notas.
+
+    Retorna:
+        notas (np.ndarray): Tabla de notas NOTAS_DTYPE.
+    """
+    vec = np.asarray(vec)
+    previo = np.concatenate(([0], vec[:-1]))
+    inicios = np.flatnonzero((vec == 1) | ((vec == 2) & (previo == 0)))
+
+    # Cada nota termina en la primera casilla posterior que no es "2"
+    no_sostenidas = np.append(np.flatnonzero(vec != 2), len(vec))
+    fines = no_sostenidas[np.searchsorted(no_sostenidas, inicios, side='right')]
+
+    ticks_por_casilla = L_segs * ticks_per_beat * 1e6 / tempo
+    notas = np.zeros(len(inicios), dtype=NOTAS_DTYPE)
+    notas['nota'] = nota
+    notas['inicio'] = np.round(inicios * ticks_por_casilla)
+    notas['fin'] = np.round(fines * ticks_por_casilla)
+    notas['velocity'] = velocity
+    return notas
+
+
+def vec2midi(vec, L_segs, ticks_per_beat=480, tempo=TEMPO_DEFAULT, nota=60, velocity=64):
+    """
+    Convierte un vector codificado en 0,1,2 a un archivo MIDI (ver `vec2notas`).
+    """
+    notas = vec2notas(vec, L_segs, ticks_per_beat, tempo, nota, velocity)
+    return notas2midi(notas, ticks_per_beat, tempo)
+
+
+def _numpy(x):
+    # Acepta tensores de torch sin importar torch
+    if hasattr(x, 'detach'):
+        x = x.detach().cpu().numpy()
+    return np.asarray(x)
+
+
+def vec2notas_lote(vecs, L_segs, longitudes=None, tonos=None, ticks_per_beat=480, tempo=TEMPO_DEFAULT, nota=60,
+                   velocity=64):
+    """
+    Versión por lote de `vec2notas`: los inicios y fines de nota de todas las filas se
+    encuentran con una sola pasada sobre la matriz aplanada.
+
+    Parámetros:
+        vecs (array): Matriz (o tensor) [batch_size, N] codificada en 0,1,2.
+        L_segs (float): Duración de cada casilla en segundos (T / N).
+        longitudes (array): Casillas válidas de cada fila; el resto se trata como silencio.
+        tonos (array): Tono MIDI por casilla [batch_size, N] (opcional). Cada nota usa el
+                       promedio redondeado de sus casillas con tono válido (> 0, no NaN).
+        ticks_per_beat (int): Resolución del archivo MIDI.
+        tempo (int): Tempo en microsegundos por negra.
+        nota (int): Tono de las notas sin tono válido.
+        velocity (int): Velocity de las notas.
+
+    Retorna:
+        tablas (list): Una tabla de notas NOTAS_DTYPE por fila.
+    """
+    vecs = _numpy(vecs)
+    B, N = vecs.shape
+    # Una columna final de silencio separa las filas y cierra las notas sostenidas hasta el final
+    v = np.zeros((B, N + 1), dtype=np.int8)
+    v[:, :N] = vecs
+    if longitudes is not None:
+        v[np.arange(N + 1) >= _numpy(longitudes)[:, np.newaxis]] = 0
+    plano = v.ravel()
+
+    previo = np.empty_like(plano)
+    previo[0] = 0
+    previo[1:] = plano[:-1]
+    inicios = np.flatnonzero((plano == 1) | ((plano == 2) & (previo == 0)))
+    no_sostenidas = np.flatnonzero(plano != 2)
+    fines = no_sostenidas[np.searchsorted(no_sostenidas, inicios, side='right')]
+
+    filas = inicios // (N + 1)
+    ticks_por_casilla = L_segs * ticks_per_beat * 1e6 / tempo
+    notas = np.zeros(len(inicios), dtype=NOTAS_DTYPE)
+    notas['nota'] = nota
+    notas['inicio'] = np.round((inicios - filas * (N + 1)) * ticks_por_casilla)
+    notas['fin'] = np.round((fines - filas * (N + 1)) * ticks_por_casilla)
+    notas['velocity'] = velocity
+
+    if tonos is not None and len(inicios):
+        t = np.zeros((B, N + 1))
+        t[:, :N] = _numpy(tonos)
+        t = t.ravel()
+        validos = np.isfinite(t) & (t > 0)
+        # Suma y número de casillas con tono de cada nota [inicio, fin) con sumas acumuladas
+        acumulada = np.concatenate(([0], np.cumsum(np.where(validos, t, 0))))
+        acumulada_n = np.concatenate(([0], np.cumsum(validos)))
+        suma = acumulada[fines] - acumulada[inicios]
+        cuenta = acumulada_n[fines] - acumulada_n[inicios]
+        con_tono = cuenta > 0
+        notas['nota'][con_tono] = np.clip(np.round(suma[con_tono] / cuenta[con_tono]), 0, 127)
+
+    return np.split(notas, np.searchsorted(filas, np.arange(1, B)))
+
+
+def _bytes_vlq(valores):
+    # Bytes de cada cantidad de longitud variable del estándar MIDI (7 bits por byte, hasta 4 bytes)
+    return 1 + (valores >= 1 << 7) + (valores >= 1 << 14) + (valores >= 1 << 21)
+
+
+def notas2bytes(notas, ticks_per_beat, tempo):
+    """
+    Serializa la tabla de notas directamente a los bytes del archivo .mid que escribiría
+    `notas2midi(notas, ticks_per_beat, tempo).save(...)`, sin crear un mensaje de mido por evento.
+
+    Retorna:
+        datos (bytes): Archivo MIDI completo.
+    """
+    n = len(notas)
+    ticks = np.concatenate((notas['inicio'], notas['fin']))
+    es_inicio = np.concatenate((np.ones(n, dtype=bool), np.zeros(n, dtype=bool)))
+    orden = np.lexsort((es_inicio, ticks))
+    deltas = np.diff(ticks[orden], prepend=0)
+
+    # Cada evento: delta (1 a 4 bytes) + estado + nota + velocity
+    n_vlq = _bytes_vlq(deltas)
+    largos = n_vlq + 3
+    fin_evento = np.cumsum(largos)
+    inicio_evento = fin_evento - largos
+    eventos = np.empty(int(fin_evento[-1]) if len(fin_evento) else 0, dtype=np.uint8)
+    for k in range(4):
+        # Byte k del delta en los eventos cuyo delta tiene más de k bytes
+        sel = n_vlq > k
+        corrimiento = 7 * (n_vlq[sel] - 1 - k)
+        continua = np.where(k < n_vlq[sel] - 1, 0x80, 0)
+        eventos[inicio_evento[sel] + k] = ((deltas[sel] >> corrimiento) & 0x7F) | continua
+    eventos[fin_evento - 3] = np.where(es_inicio[orden], 0x90, 0x80)
+    eventos[fin_evento - 2] = np.concatenate((notas['nota'], notas['nota']))[orden]
+    eventos[fin_evento - 1] = np.concatenate((notas['velocity'], np.zeros(n, dtype=np.uint8)))[orden]
+
+    tempo = int(tempo)
+    pista = (b'\x00\xff\x51\x03' + tempo.to_bytes(3, 'big') + eventos.tobytes() + b'\x00\xff\x2f\x00')
+    return (b'MThd' + (6).to_bytes(4, 'big') + (1).to_bytes(2, 'big') + (1).to_bytes(2, 'big')
+            + int(ticks_per_beat).to_bytes(2, 'big') + b'MTrk' + len(pista).to_bytes(4, 'big') + pista)
+
+
+def vec2midi_lote(vecs, L_segs, paths, longitudes=None, tonos=None, ticks_per_beat=480, tempo=TEMPO_DEFAULT, nota=60,
+                  velocity=64, n_hilos=8):
+    """
+    Convierte un lote de vectores 0,1,2 (p. ej. las predicciones del modelo) en archivos .mid.
+    Las tablas de notas se obtienen con `vec2notas_lote`, cada archivo se serializa con
+    `notas2bytes` y la escritura se reparte en un pool de hilos.
+
+    Parámetros:
+        vecs (array): Matriz (o tensor) [batch_size, N] codificada en 0,1,2.
+        L_segs (float): Duración de cada casilla en segundos (T / N).
+        paths (list): Ruta del .mid de cada fila.
+        longitudes (array): Casillas válidas de cada fila.
+        tonos (array): Tono MIDI por casilla [batch_size, N] (opcional, ver `vec2notas_lote`).
+        ticks_per_beat (int): Resolución de los archivos MIDI.
+        tempo (int): Tempo en microsegundos por negra.
+        nota (int): Tono de las notas sin tono.
+        velocity (int): Velocity de las notas.
+        n_hilos (int): Hilos para escribir los archivos.
+
+    Retorna:
+        paths (list): Las rutas escritas.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    tablas = vec2notas_lote(vecs, L_segs, longitudes, tonos, ticks_per_beat, tempo, nota, velocity)
+    if len(tablas) != len(paths):
+        raise ValueError(f'Se recibieron {len(tablas)} vectores y {len(paths)} rutas')
+
+    def escribir(path, notas):
+        with open(path, 'wb') as f:
+            f.write(notas2bytes(notas, ticks_per_beat, tempo))
+
+    with ThreadPoolExecutor(max_workers=n_hilos) as executor:
+        list(executor.map(escribir, paths, tablas))
+    return list(paths)
+
+
 
 
 
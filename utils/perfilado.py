@@ -0,0 +1,234 @@
+"""
+Instrumentación ligera por etapas (carga de audio, STFT, np.save/np.load, collate, encoder,
+decoder, backward, ...). Cada etapa registra su duración, el proceso/hilo y los bytes que movió.
+
+Desactivado (por omisión), `etapa()` regresa un contexto vacío compartido y el costo es una
+comparación por llamada. Se activa con `activar(directorio)` o con la variable de entorno
+HUM_PERFILADO=<directorio>, que heredan los procesos de `utils.pipeline`; cada proceso agrega
+sus eventos a `directorio/eventos_<pid>.jsonl`.
+
+Uso:
+    perfilado.activar('perfiles/corrida_1')
+    with perfilado.etapa('audio.cargar') as e:
+        y, sr = librosa.load(path)
+        e.agregar_bytes(y.nbytes)
+    ...
+    perfilado.exportar('perfiles/corrida_1') # trace.json (chrome://tracing o Perfetto) y resumen.json
+
+Desde la terminal:
+    python -m utils.perfilado perfiles/corrida_1
+"""
+import os
+import sys
+import glob
+import json
+import time
+import atexit
+import threading
+import collections
+
+
+_directorio = os.environ.get('HUM_PERFILADO') or None
+_sincronizar_cuda = False
+_eventos = []
+_candado = threading.Lock()
+MAX_EVENTOS = 10000 # Eventos en memoria antes de escribirlos al disco
+
+
+class _Nulo:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def agregar_bytes(self, n):
+        pass
+
+
+_NULO = _Nulo()
+
+
+class _Etapa:
+    __slots__ = ('nombre', 'bytes', 'inicio')
+
+    def __init__(self, nombre, bytes):
+        self.nombre = nombre
+        self.bytes = bytes
+
+    def __enter__(self):
+        self.inicio = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        if _sincronizar_cuda:
+            import torch
+            torch.cuda.synchronize()
+        fin = time.perf_counter_ns()
+        evento = (self.nombre, self.inicio // 1000, (fin - self.inicio) // 1000, self.bytes, threading.get_ident())
+        with _candado:
+            _eventos.append(evento)
+            lleno = len(_eventos) >= MAX_EVENTOS
+        if lleno:
+            volcar()
+        return False
+
+    def agregar_bytes(self, n):
+        self.bytes += int(n)
+
+
+def activo():
+    return _directorio is not None
+
+
+def etapa(nombre, bytes=0):
+    """
+    Contexto que mide una etapa. Con el perfilado desactivado no hace nada.
+
+    Parámetros:
+        nombre (str): Nombre de la etapa, p. ej. 'audio.cargar'.
+        bytes (int): Bytes movidos, si se conocen de antemano (si no, usar `agregar_bytes`).
+    """
+    if _directorio is None:
+        return _NULO
+    return _Etapa(nombre, bytes)
+
+
+def activar(directorio, cuda=False):
+    """
+    Activa el perfilado en este proceso y en los procesos que cree después.
+
+    Parámetros:
+        directorio (str): Carpeta donde se escriben los eventos.
+        cuda (bool): Sincronizar CUDA al cerrar cada etapa, para medir el tiempo real de la GPU.
+    """
+    global _directorio, _sincronizar_cuda
+    os.makedirs(directorio, exist_ok=True)
+    _directorio = directorio
+    _sincronizar_cuda = cuda
+    os.environ['HUM_PERFILADO'] = directorio
+
+
+def desactivar():
+    global _directorio
+    volcar()
+    _directorio = None
+    os.environ.pop('HUM_PERFILADO', None)
+
+
+def volcar(directorio=None):
+    """
+    Agrega los eventos pendientes de este proceso a `eventos_<pid>.jsonl` de `directorio`
+    (por omisión el directorio activo).
+    """
+    global _eventos
+    directorio = directorio or _directorio
+    if directorio is None:
+        return
+    with _candado:
+        eventos, _eventos = _eventos, []
+    if not eventos:
+        return
+    os.makedirs(directorio, exist_ok=True)
+    pid = os.getpid()
+    with open(os.path.join(directorio, f'eventos_{pid}.jsonl'), 'a') as f:
+        f.writelines(json.dumps([nombre, ts, dur, b, pid, tid]) + '\n' for nombre, ts, dur, b, tid in eventos)
+
+
+atexit.register(volcar)
+
+
+def _leer(directorio):
+    for path in sorted(glob.glob(os.path.join(directorio, 'eventos_*.jsonl'))):
+        with open(path) as f:
+            for linea in f:
+                yield json.loads(linea)
+
+
+def resumen(directorio):
+    """
+    Agrega los eventos de todos los procesos por etapa. Los eventos pendientes de este proceso
+    se escriben antes en `directorio`.
+
+    Las etapas pueden anidarse (p. ej. 'modelo.forward' contiene 'modelo.encoder' y
+    'modelo.decoder'); `total_s` incluye el tiempo de las etapas internas y `propio_s` sólo
+    el de la etapa misma, por lo que la suma de `propio_s` no cuenta nada dos veces.
+
+    Retorna:
+        resumen (dict): etapa -> llamadas, total_s, propio_s, media_ms, max_ms, bytes y MB/s;
+                        ordenado por propio_s.
+    """
+    volcar(directorio)
+    etapas = collections.defaultdict(lambda: [0, 0, 0, 0, 0]) # llamadas, total_us, max_us, bytes, propio_us
+    por_hilo = collections.defaultdict(list)
+    for nombre, ts, dur, b, pid, tid in _leer(directorio):
+        e = etapas[nombre]
+        e[0] += 1
+        e[1] += dur
+        e[2] = max(e[2], dur)
+        e[3] += b
+        e[4] += dur
+        por_hilo[pid, tid].append((ts, -dur, nombre))
+
+    # Tiempo propio: a cada etapa se le resta la duración de sus hijas directas en el mismo hilo
+    for eventos in por_hilo.values():
+        eventos.sort()
+        pila = [] # (fin, nombre) de las etapas abiertas
+        for ts, dur, nombre in eventos:
+            while pila and pila[-1][0] <= ts:
+                pila.pop()
+            if pila:
+                etapas[pila[-1][1]][4] += dur # dur es negativa
+            pila.append((ts - dur, nombre))
+
+    salida = {}
+    for nombre, (llamadas, total, maximo, b, propio) in sorted(etapas.items(), key=lambda x: -x[1][4]):
+        salida[nombre] = {'llamadas': llamadas, 'total_s': total / 1e6, 'propio_s': propio / 1e6,
+                          'media_ms': total / llamadas / 1e3, 'max_ms': maximo / 1e3, 'bytes': b,
+                          'MB/s': b / 2**20 / (total / 1e6) if total else 0.0}
+    return salida
+
+
+def exportar(directorio, trace='trace.json', resumen_path='resumen.json'):
+    """
+    Escribe en `directorio` el trace en formato Chrome (Trace Event, eventos completos 'X') y el
+    resumen por etapa en JSON.
+
+    Retorna:
+        resumen (dict): El mismo contenido de `resumen_path`.
+    """
+    volcar(directorio)
+    with open(os.path.join(directorio, trace), 'w') as f:
+        f.write('{"traceEvents":[\n')
+        for i, (nombre, ts, dur, b, pid, tid) in enumerate(_leer(directorio)):
+            evento = {'name': nombre, 'cat': nombre.split('.')[0], 'ph': 'X', 'ts': ts, 'dur': dur,
+                      'pid': pid, 'tid': tid, 'args': {'bytes': b}}
+            f.write((',\n' if i else '') + json.dumps(evento))
+        f.write('\n],"displayTimeUnit":"ms"}\n')
+
+    datos = resumen(directorio)
+    with open(os.path.join(directorio, resumen_path), 'w') as f:
+        json.dump(datos, f, indent=2)
+    return datos
+
+
+def imprimir(datos, archivo=sys.stdout):
+    """Tabla legible de `resumen`."""
+    print(f"{'etapa':<28}{'llamadas':>10}{'total s':>10}{'propio s':>10}{'media ms':>10}{'max ms':>10}{'MB':>10}"
+          f"{'MB/s':>10}", file=archivo)
+    for nombre, e in datos.items():
+        print(f"{nombre:<28}{e['llamadas']:>10}{e['total_s']:>10.3f}{e['propio_s']:>10.3f}{e['media_ms']:>10.3f}"
+              f"{e['max_ms']:>10.3f}"
+              f"{e['bytes'] / 2**20:>10.1f}{e['MB/s']:>10.1f}", file=archivo)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Resume un directorio de perfilado y exporta el trace de Chrome.')
+    parser.add_argument('directorio')
+    args = parser.parse_args()
+    imprimir(exportar(args.directorio))
+    print(f"Trace: {os.path.join(args.directorio, 'trace.json')}")
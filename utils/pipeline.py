@@ -0,0 +1,207 @@
+import os
+import functools
+import traceback
+import mido
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from . import midi as midi_utils
+from . import perfilado
+
+
+def _intentar(funcion, kwargs, nombre):
+    # Envuelve la tarea para que una falla no detenga la ejecución completa
+    try:
+        with perfilado.etapa(f'tarea.{funcion.__name__}'):
+            resultado = funcion(nombre, **kwargs)
+        return nombre, resultado, None
+    except Exception:
+        return nombre, None, traceback.format_exc()
+    finally:
+        # Los procesos del pool no ejecutan atexit: los eventos se escriben tras cada tarea
+        if perfilado.activo():
+            perfilado.volcar()
+
+
+def ejecutar(funcion, nombres, n_workers=None, chunksize=16, **kwargs):
+    """
+    Aplica `funcion(nombre, **kwargs)` a cada nombre repartiendo el trabajo en un
+    pool de procesos. Las fallas por archivo se reportan sin abortar la ejecución.
+
+    Parámetros:
+        funcion (callable): Tarea por archivo, definida a nivel de módulo para poder serializarse.
+        nombres (iterable): Nombres de las muestras a procesar.
+        n_workers (int): Número de procesos. None usa todos los núcleos; 1 ejecuta en serie.
+        chunksize (int): Número de archivos que recibe cada proceso por envío.
+        **kwargs: Argumentos adicionales de `funcion`.
+
+    Retorna:
+        resultados (dict): nombre -> valor devuelto por `funcion`.
+        fallas (dict): nombre -> traceback de la excepción.
+    """
+    tarea = functools.partial(_intentar, funcion, kwargs)
+
+    if n_workers == 1:
+        return _recolectar(map(tarea, nombres))
+
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        return _recolectar(executor.map(tarea, nombres, chunksize=chunksize))
+
+
+def _recolectar(salidas):
+    resultados = {}
+    fallas = {}
+    for nombre, resultado, error in salidas:
+        if error is None:
+            resultados[nombre] = resultado
+        else:
+            fallas[nombre] = error
+    return resultados, fallas
+
+
+###### Tareas por archivo ###############
+def recortar_midi(midi_name, input_folder, output_folder, T):
+    """
+    Recorta el tiempo muerto inicial de un MIDI y lo ajusta a T segundos.
+    """
+    midi_path = os.path.join(input_folder, midi_name + '.mid')
+    with perfilado.etapa('midi.cargar', os.path.getsize(midi_path)):
+        notas, ticks_per_beat, tempo = midi_utils.midi2notas(mido.MidiFile(midi_path))
+
+    notas = midi_utils.lstrip_notas(notas)
+    notas = midi_utils.trim_notas(notas, tempo, ticks_per_beat, T)
+
+    output_path = os.path.join(output_folder, midi_name + '.mid')
+    with perfilado.etapa('midi.guardar'):
+        midi_utils.notas2midi(notas, ticks_per_beat, tempo).save(output_path)
+
+
+def crear_vector(midi_name, input_folder, output_folder, N, T):
+    """
+    Convierte un MIDI recortado en su vector objetivo de longitud N.
+    """
+    midi_path = os.path.join(input_folder, midi_name + '.mid')
+    with perfilado.etapa('midi.cargar', os.path.getsize(midi_path)):
+        midi = mido.MidiFile(midi_path)
+    with perfilado.etapa('midi.vector'):
+        vector = midi_utils.eventos2vec(midi_utils.midi2eventos(midi), N, T)
+
+    output_vect_path = os.path.join(output_folder, midi_name + '_target.npy')
+    with perfilado.etapa('np.save', vector.nbytes):
+        np.save(output_vect_path, vector)
+
+
+def procesar_tarareo(audio_name, input_folder, midi_folder, output_folder_frames, output_folder_espectros,
+                     L_seg, freq_range, top_db=55, recortar_ventanas=False):
+    """
+    Recorta un tarareo a la duración de su MIDI, lo divide en ventanas y genera su espectrograma.
+    Ver `procesar_tarareos` para `recortar_ventanas`.
+
+    Retorna:
+        freqs (np.ndarray): Frecuencias conservadas en el espectrograma.
+    """
+    # librosa sólo se carga en los procesos que procesan audio
+    from . import tarareos
+
+    audio_path = os.path.join(input_folder, audio_name + '.wav')
+    y, sr = tarareos.cargar_audio(audio_path)
+    T_midi = mido.MidiFile(os.path.join(midi_folder, audio_name + '.mid')).length
+
+    # Recortar el audio
+    with perfilado.etapa('audio.trim'):
+        y_recortado = tarareos.trim(y, sr, T_midi, top_db=top_db)
+
+    ### VENTANAS
+    # Amplitud positiva (magnitud) y Normalizar, con la amplitud del audio recortado
+    y_abs = np.abs(y_recortado)
+    y_norm = ((y_recortado if recortar_ventanas else y) - np.min(y_abs)) / (np.max(y_abs) - np.min(y_abs))
+    audio_frames, L = tarareos.dividir_en_ventanas(y_norm, sr, L_seg)
+    with perfilado.etapa('np.save', audio_frames.nbytes):
+        np.save(os.path.join(output_folder_frames, audio_name + '_frames.npy'), audio_frames)
+
+    ### ESPECTROGRAMA
+    with perfilado.etapa('audio.espectrograma'):
+        espectrograma, freqs = tarareos.espectrograma(y_recortado, sr, L, freq_range)
+    with perfilado.etapa('np.save', espectrograma.nbytes):
+        np.save(os.path.join(output_folder_espectros, audio_name + '_espectrograma.npy'), espectrograma)
+
+    return freqs
+
+
+###### Etapas del preprocesamiento ###############
+def recortar_midis(midi_names, input_folder, output_folder, T, n_workers=None, chunksize=16):
+    """
+    Aplica `utils.midi.lstrip_notas` y `utils.midi.trim_notas` a todos los MIDI en paralelo.
+
+    Parámetros:
+        midi_names (iterable): Nombres de los MIDI a recortar.
+        input_folder (str): Carpeta de los MIDI originales.
+        output_folder (str): Carpeta de destino para guardar los archivos MIDI procesados.
+        T (float): Duración máxima en segundos para los archivos MIDI procesados.
+        n_workers (int): Número de procesos.
+        chunksize (int): Archivos por envío a cada proceso.
+
+    Retorna:
+        fallas (dict): nombre -> traceback de los archivos que no pudieron procesarse.
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    _, fallas = ejecutar(recortar_midi, midi_names, n_workers, chunksize,
+                         input_folder=input_folder, output_folder=output_folder, T=T)
+    return fallas
+
+
+def crear_vectores(midi_names, input_folder, output_folder, N, T, n_workers=None, chunksize=16):
+    """
+    Convierte todos los MIDI ingresados a vector objetivo en paralelo (ver `utils.midi.eventos2vec`).
+
+    Parámetros:
+        midi_names (iterable): Nombres de los MIDI a convertir.
+        input_folder (str): Carpeta de los MIDI recortados.
+        output_folder (str): Carpeta de destino para guardar los vectores MIDI.
+        N (int): Longitud del vector MIDI (normalmente del tamaño de ventanas temporales)
+        T (float): Duración máxima en segundos que codifica el vector
+        n_workers (int): Número de procesos.
+        chunksize (int): Archivos por envío a cada proceso.
+
+    Retorna:
+        fallas (dict): nombre -> traceback de los archivos que no pudieron procesarse.
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    _, fallas = ejecutar(crear_vector, midi_names, n_workers, chunksize,
+                         input_folder=input_folder, output_folder=output_folder, N=N, T=T)
+    return fallas
+
+
+def procesar_tarareos(audio_names, input_folder, midi_folder, output_folder_frames, output_folder_espectros,
+                      L_seg, freq_range, top_db=55, n_workers=None, chunksize=4, recortar_ventanas=False):
+    """
+    Procesa todos los archivos de audio seleccionados en paralelo, aplicando recorte,
+    división en ventanas y generación de espectrogramas.
+
+    Parámetros:
+        audio_names (iterable): Nombres de los audios a procesar.
+        input_folder (str): Carpeta de los tarareos .wav.
+        midi_folder (str): Carpeta de los MIDI recortados que definen la duración de cada audio.
+        output_folder_frames (str): Carpeta para guardar los arreglos de ventanas de audio procesados.
+        output_folder_espectros (str): Carpeta para guardar los espectrogramas generados.
+        L_seg (float): Duración de cada ventana en segundos.
+        freq_range (tuple): Rango de frecuencias a considerar (min_freq, max_freq).
+        top_db (float): Umbral de Decibeles debajo del cual se considera silencio.
+        n_workers (int): Número de procesos.
+        chunksize (int): Archivos por envío a cada proceso.
+        recortar_ventanas (bool): Dividir en ventanas el audio recortado. Por omisión las ventanas
+                                  salen del audio completo (normalizado con la amplitud del recorte),
+                                  como en el preprocesamiento con que se entrenó `models/ConvSeq2Seq_model.pt`;
+                                  el espectrograma siempre usa el audio recortado. Con True cambian
+                                  las entradas del modelo y hay que volver a entrenarlo.
+
+    Retorna:
+        final_freqs (dict): nombre -> frecuencias conservadas en el espectrograma.
+        fallas (dict): nombre -> traceback de los archivos que no pudieron procesarse.
+    """
+    os.makedirs(output_folder_frames, exist_ok=True)
+    os.makedirs(output_folder_espectros, exist_ok=True)
+    return ejecutar(procesar_tarareo, audio_names, n_workers, chunksize,
+                    input_folder=input_folder, midi_folder=midi_folder,
+                    output_folder_frames=output_folder_frames, output_folder_espectros=output_folder_espectros,
+                    L_seg=L_seg, freq_range=freq_range, top_db=top_db, recortar_ventanas=recortar_ventanas)
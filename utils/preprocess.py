@@ -1,6 +1,6 @@
 import os
 import mido
-import pandas as pd
+import numpy as np
 
 def nota_a_frequencia(nota):
 
@@ -15,6 +15,16 @@ def nota_a_cifrado(nota):
     return f"{cifrado}{octava}"
 
 
+# Mínima figura musical en función de su duración en negras (beats)
+QUANTA2FIGURE = {4: 'redonda',
+                 2: 'blanca',
+                 1: 'negra',
+                 1/2: 'corchea',
+                 1/4: 'semicorchea',
+                 1/8: 'fusa',
+                 1/16: 'semifusa'}
+
+
 def analizar_archivo(midi):
     """
     Analiza un archivo MIDI para obtener información sobre las notas.
@@ -55,18 +65,10 @@ def analizar_archivo(midi):
                     tiempo_min = mido.tick2second(msg.time, midi.ticks_per_beat, tempo_ms)  # [segs]
 
     # Mínima figura musical
-    # tempo_ms
-    quanta2figure = {4: 'redonda',
-                    2: 'blanca',
-                    1: 'negra',
-                    1/2: 'corchea',
-                    1/4: 'semicorchea',
-                    1/8: 'fusa',
-                    1/16: 'semifusa'}
     tempo_secs = tempo_ms / 10**6
 
     beat_quanta_min = tiempo_min / tempo_secs
-    note_fig_min =  quanta2figure.get(beat_quanta_min, 0)
+    note_fig_min =  QUANTA2FIGURE.get(beat_quanta_min, 0)
 
     freq_liminf = nota_a_frequencia(nota_liminf)
     freq_limsup = nota_a_frequencia(nota_limsup)
@@ -96,26 +98,240 @@ def extraer_info(filename):
 
 
 
+def _segundos(ticks, cambios, ticks_per_beat):
+    # Segundos hasta `ticks` con el mapa de tempo (tick, tempo) en orden de reproducción,
+    # como al sumar los tiempos de los mensajes de `MidiFile`
+    segundos = 0.0
+    anterior, tempo = 0, 500000
+    for tick, nuevo_tempo in cambios:
+        if tick >= ticks:
+            break
+        segundos += mido.tick2second(tick - anterior, ticks_per_beat, tempo)
+        anterior, tempo = tick, nuevo_tempo
+    return segundos + mido.tick2second(ticks - anterior, ticks_per_beat, tempo)
+
+
+def _escanear_archivo(midi, conteo):
+    """
+    Recorre las pistas de un MIDI ya cargado y calcula la información de `analizar_archivo`,
+    `utils.midi.detect_note_on_consecutives` y `utils.midi.first_note_data`.
+
+    Args:
+        midi: Objeto MidiFile cargado con la librería MIDO.
+        conteo: Renglón (128,) donde se acumula el conteo de cada nota.
+
+    Returns:
+        Tuple (duration, tempo_ms, min_ticks, problem, first_note):
+        - duration: Duración en segundos, igual a `midi.length`.
+        - tempo_ms: Último tempo definido en microsegundos por negra (None si no se define).
+        - min_ticks: Duración mínima en ticks de los 'note_off' con velocity 0 (None si no hay).
+        - problem: True si hay 'note_on' consecutivos en lugar de 'note_on/note_off'.
+        - first_note: (velocity, offset_tick, offset_sec) del primer 'note_on' al reproducir el
+          archivo, con su tiempo desde el mensaje anterior de cualquier pista (None si no hay).
+    """
+    tempo_ms = None
+    min_ticks = None
+    problem = False
+    primera = None # (tick absoluto, pista, posición, velocity)
+    cambios = []   # (tick, pista, posición, tempo)
+    fin = 0
+
+    for k, track in enumerate(midi.tracks):
+        ticks = 0
+        previous_note_on = False
+        for pos, msg in enumerate(track):
+            ticks += msg.time
+            tipo = msg.type
+
+            if tipo == 'note_on':
+                if msg.velocity > 0:
+                    conteo[msg.note] += 1
+                elif previous_note_on:
+                    problem = True
+                if primera is None or ticks < primera[0]:
+                    primera = (ticks, k, pos, msg.velocity)
+
+            elif tipo == 'note_off':
+                if msg.velocity == 0 and (min_ticks is None or msg.time < min_ticks):
+                    min_ticks = msg.time
+
+            elif tipo == 'set_tempo':
+                tempo_ms = msg.tempo
+                cambios.append((ticks, k, pos, msg.tempo))
+
+            previous_note_on = tipo == 'note_on'
+        fin = max(fin, ticks)
+
+    # Orden de reproducción: tick y, en empate, pista y posición (como mido.merge_tracks)
+    cambios.sort()
+    mapa = [(tick, tempo) for tick, _, _, tempo in cambios]
+    duration = _segundos(fin, mapa, midi.ticks_per_beat)
+
+    first_note = None
+    if primera is not None:
+        tick, k, pos, velocity = primera
+        orden = (tick, k, pos)
+        # Último mensaje (sin contar end_of_track) antes de la primera nota en cualquier pista
+        anterior = 0
+        for j, track in enumerate(midi.tracks):
+            ticks = 0
+            for p, msg in enumerate(track):
+                ticks += msg.time
+                if (ticks, j, p) >= orden:
+                    break
+                if msg.type != 'end_of_track':
+                    anterior = max(anterior, ticks)
+        offset_tick = tick - anterior
+        tempo = 500000
+        for cambio in cambios:
+            if cambio[:3] >= orden:
+                break
+            tempo = cambio[3]
+        first_note = (velocity, offset_tick, mido.tick2second(offset_tick, midi.ticks_per_beat, tempo))
+
+    return duration, tempo_ms, min_ticks, problem, first_note
+
+
+def escanear_midis(paths):
+    """
+    Analiza un conjunto de archivos MIDI leyendo cada uno una sola vez.
+    Reemplaza a `analizar_archivo`, `utils.midi.detect_note_on_consecutives`,
+    `utils.midi.first_note_data` y `extraer_info`, entregando arreglos por columna.
+
+    Coincide con esas funciones (`duration` es `midi.length`, `tempo_ms` el último tempo
+    definido, `offset_tick`/`offset_sec` el tiempo del primer 'note_on' desde el mensaje
+    anterior al reproducir el archivo), salvo en:
+    - `min_time`: es la duración mínima de los 'note_off' con velocity 0. `analizar_archivo`
+      comparaba ticks contra segundos y en la práctica se quedaba con el primero.
+      Se convierte a segundos con `tempo_ms`, por lo que se asume un solo tempo por archivo.
+    - Archivos sin 'set_tempo': se usa el tempo por omisión de MIDI (500000);
+      `analizar_archivo` fallaba.
+    - Archivos sin notas: `min_nota`/`max_nota` son NaN (frecuencia NaN y cifrado None en
+      `tablas_midis`), `velocity`, `offset_sec` y `offset_tick` son 0; las funciones anteriores
+      fallaban.
+
+    Args:
+        paths: Lista de rutas a archivos MIDI.
+
+    Returns:
+        Dict columna -> np.ndarray de longitud len(paths), con las columnas de
+        `midis_info.csv` (sin las derivadas de frecuencia y cifrado), las de tipo de MIDI
+        ('problem?', 'ticks', 'velocity', 'offset_sec', 'offset_tick') y 'notas_conteo',
+        una matriz int32 de (archivos, 128).
+    """
+    n = len(paths)
+    columnas = {
+        'key': np.empty(n, dtype=object),
+        'Genero': np.empty(n, dtype=object),
+        'PersonID': np.empty(n, dtype=object),
+        'MusicID': np.empty(n, dtype=object),
+        'SegmentID': np.empty(n, dtype=object),
+        'RepetitionID': np.empty(n, dtype=object),
+        'MetaID': np.empty(n, dtype=object),
+        'duration': np.empty(n, dtype=np.float64),
+        'tempo_ms': np.empty(n, dtype=np.int64),
+        'min_time': np.full(n, np.inf),
+        'min_figure': np.zeros(n, dtype=object),
+        'min_nota': np.full(n, np.nan),
+        'max_nota': np.full(n, np.nan),
+        'problem?': np.zeros(n, dtype=bool),
+        'ticks': np.empty(n, dtype=np.int32),
+        'velocity': np.zeros(n, dtype=np.int16),
+        'offset_sec': np.zeros(n, dtype=np.float64),
+        'offset_tick': np.zeros(n, dtype=np.int64),
+        'notas_conteo': np.zeros((n, 128), dtype=np.int32),
+    }
+    columnas_info = ['key', 'Genero', 'PersonID', 'MusicID', 'SegmentID', 'RepetitionID', 'MetaID']
+
+    for i, path in enumerate(paths):
+        for columna, valor in zip(columnas_info, extraer_info(os.path.basename(path))):
+            columnas[columna][i] = valor
+
+        midi = mido.MidiFile(path)
+        duration, tempo_ms, min_ticks, problem, first_note = _escanear_archivo(midi, columnas['notas_conteo'][i])
+        tempo_ms = tempo_ms or 500000
+
+        columnas['duration'][i] = duration
+        columnas['tempo_ms'][i] = tempo_ms
+        columnas['problem?'][i] = problem
+        columnas['ticks'][i] = midi.ticks_per_beat
+
+        if min_ticks is not None:
+            tiempo_min = mido.tick2second(min_ticks, midi.ticks_per_beat, tempo_ms)  # [segs]
+            columnas['min_time'][i] = tiempo_min
+            columnas['min_figure'][i] = QUANTA2FIGURE.get(tiempo_min / (tempo_ms / 10**6), 0)
+
+        if first_note is not None:
+            velocity, offset_tick, offset_sec = first_note
+            columnas['velocity'][i] = velocity
+            columnas['offset_tick'][i] = offset_tick
+            columnas['offset_sec'][i] = offset_sec
+
+    # Notas extremas a partir del conteo
+    ejecutadas = columnas['notas_conteo'] > 0
+    con_notas = ejecutadas.any(axis=1)
+    columnas['min_nota'][con_notas] = ejecutadas[con_notas].argmax(axis=1)
+    columnas['max_nota'][con_notas] = 127 - ejecutadas[con_notas, ::-1].argmax(axis=1)
+
+    return columnas
+
+
 def procesar_midis(path_carpeta):
+    paths = [os.path.join(path_carpeta, filename) for filename in os.listdir(path_carpeta)]
+    return tablas_midis(escanear_midis(paths))
+
+
+def tablas_midis(columnas):
+    """
+    Genera las tablas de `midis_info.csv` y `midis_notas.csv` a partir de las columnas de
+    `escanear_midis` (o de `utils.catalogo.Catalogo.midis`).
+
+    Args:
+        columnas: Dict de arreglos entregado por `escanear_midis`.
+
+    Returns:
+        Tuple (df_archivo, df_notas).
+    """
+    import pandas as pd
 
-    
-    data_archivo = []
-    data_notas = []
-    for filename in os.listdir(path_carpeta):
-        path_archivo = os.path.join(path_carpeta, filename)
-        midi = mido.MidiFile(path_archivo)
-
-        info_archivo = extraer_info(filename)
-        info_bounds, info_nota = analizar_archivo(midi)
-        data_archivo.append(info_archivo + list(info_bounds))
-        data_notas.append([info_archivo[0]] + info_nota)
-
-    columns_notas = ['key'] + [f'{i} ({nota_a_cifrado(i)})' for i in range(128)]
     columns = ['key', 'Genero', 'PersonID', 'MusicID', 'SegmentID', 'RepetitionID', 'MetaID', 
                'duration', 'tempo_ms', 'min_time', 'min_figure',
-               'min_nota', 'max_nota',
-               'min_freq', 'max_freq',
-               'min_cifrado', 'max_cifrado']
-    df_archivo = pd.DataFrame(data_archivo, columns=columns)
-    df_notas = pd.DataFrame(data_notas, columns=columns_notas)
-    return df_archivo, df_notas
\ No newline at end of file
+               'min_nota', 'max_nota']
+    df_archivo = pd.DataFrame({columna: columnas[columna] for columna in columns})
+
+    # Archivos sin notas: nota NaN (vacía en el CSV), frecuencia NaN y cifrado None
+    notas_base = np.array(['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B'], dtype=object)
+    for lim in ['min', 'max']:
+        nota = np.asarray(columnas[f'{lim}_nota'], dtype=np.float64)
+        con_notas = ~np.isnan(nota)
+        entera = np.where(con_notas, nota, 0).astype(np.int64)
+        cifrado = notas_base[entera % 12] + (entera // 12 - 1).astype(str).astype(object)
+        cifrado[~con_notas] = None
+        df_archivo[f'{lim}_nota'] = pd.array(nota, dtype='Int16')
+        df_archivo[f'{lim}_freq'] = nota_a_frequencia(nota)
+        df_archivo[f'{lim}_cifrado'] = cifrado
+
+    columns_notas = [f'{i} ({nota_a_cifrado(i)})' for i in range(128)]
+    df_notas = pd.DataFrame(columnas['notas_conteo'], columns=columns_notas)
+    df_notas.insert(0, 'key', columnas['key'])
+    return df_archivo, df_notas
+
+
+def separar_tipos(columnas):
+    """
+    Genera las tablas de MIDIs estándar y no estándar ('note_on' consecutivos)
+    a partir de las columnas de `escanear_midis`.
+
+    Args:
+        columnas: Dict de arreglos entregado por `escanear_midis`.
+
+    Returns:
+        Tuple (df_standard, df_non_standard) con las columnas de `estandar.csv`/`no_estandar.csv`.
+    """
+    import pandas as pd
+
+    columns = ['problem?', 'ticks', 'velocity', 'offset_sec', 'offset_tick']
+    df_tipos = pd.DataFrame({columna: columnas[columna] for columna in columns})
+    df_tipos.insert(0, 'filename', columnas['key'])
+    problem = columnas['problem?']
+    return df_tipos[~problem], df_tipos[problem]
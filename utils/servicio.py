@@ -0,0 +1,411 @@
+"""
+Servicio HTTP local de transcripción con el modelo ConvSeq2Seq (asyncio, sólo biblioteca estándar).
+
+La extracción de ventanas (decodificar el WAV, remuestrear, recortar y normalizar) se hace en un
+pool de procesos; las solicitudes concurrentes se agrupan en lotes del modelo de hasta `max_lote`
+audios, esperando como máximo `max_espera` segundos a que se junte el lote. Si hay más de
+`max_pendientes` solicitudes en curso, las nuevas se rechazan con 503. Las conexiones keep-alive
+ociosas se cierran después de `tiempo_inactivo` segundos y una solicitud que no llega completa en
+`tiempo_lectura` segundos se responde con 408; los encabezados demasiado largos o numerosos, con 431.
+
+Endpoints:
+    POST /transcribir[?formato=midi]  Cuerpo: archivo WAV. Responde {"vector": [...]} o un .mid.
+    GET  /metricas                    Latencias (p50, p90, p99), solicitudes y tamaño de lote promedio.
+    GET  /salud                       200 si el servicio está arriba.
+
+Uso:
+    python -m utils.servicio servir --puerto 8000
+    python -m utils.servicio carga audio.wav --puerto 8000 --solicitudes 500 --concurrencia 32
+"""
+import io
+import json
+import time
+import asyncio
+import argparse
+import collections
+import concurrent.futures
+import urllib.parse
+import numpy as np
+
+from . import midi
+from . import inferencia
+
+
+ESTADOS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 408: 'Request Timeout',
+           413: 'Payload Too Large', 431: 'Request Header Fields Too Large', 500: 'Internal Server Error',
+           503: 'Service Unavailable'}
+
+
+def _preparar_wav(datos):
+    # Se ejecuta en el pool de procesos
+    import soundfile
+    audio, sr = soundfile.read(io.BytesIO(datos), dtype='float32', always_2d=True)
+    return inferencia.preparar(audio.mean(axis=1), sr)
+
+
+class Agrupador:
+    """
+    Junta las ventanas de solicitudes concurrentes en lotes del modelo. El modelo corre en un
+    único hilo aparte para no bloquear el ciclo de eventos; mientras procesa un lote, el
+    siguiente se va llenando.
+    """
+    def __init__(self, transcriptor, max_lote=32, max_espera=0.01):
+        self._transcriptor = transcriptor
+        self._max_lote = max_lote
+        self._max_espera = max_espera
+        self._cola = asyncio.Queue()
+        self._hilo = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self._tarea = None
+        self.lotes = 0
+        self.audios = 0
+
+    def iniciar(self):
+        self._tarea = asyncio.get_running_loop().create_task(self._ciclo())
+
+    async def detener(self):
+        self._tarea.cancel()
+        try:
+            await self._tarea
+        except asyncio.CancelledError:
+            pass
+        self._hilo.shutdown(wait=True)
+
+    async def transcribir(self, frames):
+        futuro = asyncio.get_running_loop().create_future()
+        await self._cola.put((frames, futuro))
+        return await futuro
+
+    async def _ciclo(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            lote = [await self._cola.get()]
+            limite = loop.time() + self._max_espera
+            while len(lote) < self._max_lote:
+                restante = limite - loop.time()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(await asyncio.wait_for(self._cola.get(), restante))
+                except asyncio.TimeoutError:
+                    break
+
+            frames = [f for f, _ in lote]
+            try:
+                vectores = await loop.run_in_executor(self._hilo, self._transcriptor.transcribir_frames, frames)
+            except Exception as error:
+                for _, futuro in lote:
+                    if not futuro.done():
+                        futuro.set_exception(error)
+                continue
+
+            self.lotes += 1
+            self.audios += len(lote)
+            for (_, futuro), vector in zip(lote, vectores):
+                if not futuro.done():
+                    futuro.set_result(vector)
+
+
+class Servicio:
+    """
+    Parámetros:
+        transcriptor (inferencia.Transcriptor): Motor de inferencia ya cargado.
+        max_lote (int): Tamaño máximo de cada lote del modelo.
+        max_espera (float): Segundos máximos que se espera a completar un lote.
+        max_pendientes (int): Solicitudes en curso a partir de las cuales se responde 503.
+        n_workers (int): Procesos para la extracción de ventanas.
+        max_bytes (int): Tamaño máximo del WAV recibido.
+        n_latencias (int): Número de latencias recientes con que se calculan los percentiles.
+        tiempo_inactivo (float): Segundos que una conexión keep-alive espera una nueva solicitud.
+        tiempo_lectura (float): Segundos para recibir los encabezados y el cuerpo de una solicitud.
+        max_linea (int): Bytes máximos de la línea de solicitud y de cada encabezado.
+        max_encabezados (int): Número máximo de encabezados por solicitud.
+    """
+    def __init__(self, transcriptor, max_lote=32, max_espera=0.01, max_pendientes=256, n_workers=None,
+                 max_bytes=32 * 2**20, n_latencias=10000, tiempo_inactivo=15.0, tiempo_lectura=30.0,
+                 max_linea=8192, max_encabezados=100):
+        self._agrupador = Agrupador(transcriptor, max_lote, max_espera)
+        self._max_pendientes = max_pendientes
+        self._n_workers = n_workers
+        self._max_bytes = max_bytes
+        self._tiempo_inactivo = tiempo_inactivo
+        self._tiempo_lectura = tiempo_lectura
+        self._max_linea = max_linea
+        self._max_encabezados = max_encabezados
+        self._pool = None
+        self._servidor = None
+        self._pendientes = 0
+        self._latencias = collections.deque(maxlen=n_latencias)
+        self._conteo = collections.Counter()
+        self._conexiones = set() # Tareas de conexión abiertas
+        self._inactivas = set()  # Las que esperan una nueva solicitud (keep-alive)
+        self._cerrando = False
+
+    async def iniciar(self, host='127.0.0.1', puerto=8000):
+        self._pool = concurrent.futures.ProcessPoolExecutor(max_workers=self._n_workers)
+        self._agrupador.iniciar()
+        # Con `limit`, readline falla con ValueError en lugar de acumular una línea sin fin
+        self._servidor = await asyncio.start_server(self._atender, host, puerto, limit=self._max_linea)
+        return self._servidor.sockets[0].getsockname()[1]
+
+    async def detener(self):
+        # Las conexiones ociosas se cierran; las que están respondiendo terminan su solicitud
+        self._cerrando = True
+        self._servidor.close()
+        for tarea in self._inactivas:
+            tarea.cancel()
+        await asyncio.gather(*self._conexiones, return_exceptions=True)
+        await self._servidor.wait_closed()
+        await self._agrupador.detener()
+        self._pool.shutdown(wait=True)
+
+    def metricas(self):
+        latencias = np.array(self._latencias) * 1000
+        percentiles = np.percentile(latencias, [50, 90, 99]).round(2).tolist() if len(latencias) else [None] * 3
+        return {'solicitudes': dict(self._conteo),
+                'pendientes': self._pendientes,
+                'latencia_ms': dict(zip(['p50', 'p90', 'p99'], percentiles)),
+                'lote_promedio': self._agrupador.audios / max(self._agrupador.lotes, 1)}
+
+    async def _atender(self, reader, writer):
+        tarea = asyncio.current_task()
+        self._conexiones.add(tarea)
+        try:
+            while not self._cerrando:
+                self._inactivas.add(tarea)
+                try:
+                    solicitud = await _leer_solicitud(reader, self._max_bytes, self._max_encabezados,
+                                                      self._tiempo_inactivo, self._tiempo_lectura)
+                finally:
+                    self._inactivas.discard(tarea)
+                if solicitud is None:
+                    break
+                metodo, ruta, consulta, cuerpo, seguir = solicitud
+                estado, tipo, contenido = await self._responder(metodo, ruta, consulta, cuerpo)
+                seguir = seguir and not self._cerrando
+                self._conteo[estado] += 1
+                _escribir_respuesta(writer, estado, tipo, contenido, seguir)
+                await writer.drain()
+                if not seguir:
+                    break
+        except _ErrorHTTP as error:
+            self._conteo[error.estado] += 1
+            _escribir_respuesta(writer, error.estado, 'application/json', _json({'error': str(error)}), False)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._conexiones.discard(tarea)
+            writer.close()
+
+    async def _responder(self, metodo, ruta, consulta, cuerpo):
+        if ruta == '/salud':
+            return 200, 'application/json', _json({'estado': 'ok'})
+        if ruta == '/metricas':
+            return 200, 'application/json', _json(self.metricas())
+        if ruta != '/transcribir':
+            return 404, 'application/json', _json({'error': 'ruta desconocida'})
+        if metodo != 'POST':
+            return 405, 'application/json', _json({'error': 'use POST'})
+
+        # Contrapresión: se rechaza de inmediato en lugar de encolar sin límite
+        if self._pendientes >= self._max_pendientes:
+            return 503, 'application/json', _json({'error': 'servicio saturado'})
+
+        self._pendientes += 1
+        inicio = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            try:
+                frames = await loop.run_in_executor(self._pool, _preparar_wav, cuerpo)
+            except Exception as error:
+                return 400, 'application/json', _json({'error': f'audio inválido: {error}'})
+            try:
+                vector = await self._agrupador.transcribir(frames)
+            except Exception as error:
+                return 500, 'application/json', _json({'error': f'fallo del modelo: {error}'})
+        finally:
+            self._pendientes -= 1
+        self._latencias.append(time.perf_counter() - inicio)
+
+        if consulta.get('formato') == ['midi']:
+            notas = midi.vec2notas(vector, inferencia.L_SEG)
+            return 200, 'audio/midi', midi.notas2bytes(notas, 480, midi.TEMPO_DEFAULT)
+        return 200, 'application/json', _json({'vector': vector.tolist()})
+
+
+class _ErrorHTTP(Exception):
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+def _json(objeto):
+    return json.dumps(objeto).encode()
+
+
+async def _leer_linea(reader, estado, mensaje):
+    # readline convierte el LimitOverrunError del límite del StreamReader en ValueError
+    try:
+        return await reader.readline()
+    except (ValueError, asyncio.LimitOverrunError):
+        raise _ErrorHTTP(estado, mensaje)
+
+
+async def _leer_encabezados_y_cuerpo(reader, max_bytes, max_encabezados):
+    encabezados = {}
+    while True:
+        linea = await _leer_linea(reader, 431, 'encabezado demasiado largo')
+        if linea in (b'\r\n', b'\n', b''):
+            break
+        if len(encabezados) >= max_encabezados:
+            raise _ErrorHTTP(431, f'más de {max_encabezados} encabezados')
+        nombre, _, valor = linea.decode('latin-1').partition(':')
+        encabezados[nombre.strip().lower()] = valor.strip()
+
+    largo = encabezados.get('content-length', '0')
+    if not largo.isdecimal():
+        raise _ErrorHTTP(400, 'Content-Length inválido')
+    largo = int(largo)
+    if largo > max_bytes:
+        raise _ErrorHTTP(413, f'el cuerpo excede {max_bytes} bytes')
+    cuerpo = await reader.readexactly(largo) if largo else b''
+    return encabezados, cuerpo
+
+
+async def _leer_solicitud(reader, max_bytes, max_encabezados, tiempo_inactivo, tiempo_lectura):
+    # HTTP/1.1 mínimo: línea de solicitud, encabezados y cuerpo con Content-Length
+    try:
+        linea = await asyncio.wait_for(_leer_linea(reader, 400, 'línea de solicitud demasiado larga'),
+                                       tiempo_inactivo)
+    except asyncio.TimeoutError:
+        return None # Conexión ociosa
+    if not linea:
+        return None
+    try:
+        metodo, objetivo, version = linea.decode('latin-1').split()
+    except ValueError:
+        raise _ErrorHTTP(400, 'línea de solicitud inválida')
+
+    # Un solo plazo para el resto de la solicitud, para que un cliente lento no retenga la conexión
+    try:
+        encabezados, cuerpo = await asyncio.wait_for(
+            _leer_encabezados_y_cuerpo(reader, max_bytes, max_encabezados), tiempo_lectura)
+    except asyncio.TimeoutError:
+        raise _ErrorHTTP(408, f'la solicitud no llegó completa en {tiempo_lectura} s')
+
+    url = urllib.parse.urlsplit(objetivo)
+    conexion = encabezados.get('connection', '').lower()
+    seguir = conexion != 'close' if version == 'HTTP/1.1' else conexion == 'keep-alive'
+    return metodo, url.path, urllib.parse.parse_qs(url.query), cuerpo, seguir
+
+
+def _escribir_respuesta(writer, estado, tipo, contenido, seguir):
+    encabezados = [f'HTTP/1.1 {estado} {ESTADOS[estado]}',
+                   f'Content-Type: {tipo}',
+                   f'Content-Length: {len(contenido)}',
+                   'Connection: ' + ('keep-alive' if seguir else 'close')]
+    if estado == 503:
+        encabezados.append('Retry-After: 1')
+    writer.write(('\r\n'.join(encabezados) + '\r\n\r\n').encode('latin-1') + contenido)
+
+
+async def servir(host='127.0.0.1', puerto=8000, model_path=inferencia.MODELO, **kwargs):
+    """Levanta el servicio y atiende hasta que se cancele la tarea. `kwargs` van a `Servicio`."""
+    servicio = Servicio(inferencia.Transcriptor(model_path), **kwargs)
+    puerto = await servicio.iniciar(host, puerto)
+    print(f'Servicio de transcripción en http://{host}:{puerto}')
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await servicio.detener()
+
+
+##### Prueba de carga
+async def _cliente(host, puerto, cuerpo, n, latencias, estados):
+    reader, writer = await asyncio.open_connection(host, puerto)
+    try:
+        for _ in range(n):
+            inicio = time.perf_counter()
+            writer.write(f'POST /transcribir HTTP/1.1\r\nHost: {host}\r\n'
+                         f'Content-Length: {len(cuerpo)}\r\n\r\n'.encode('latin-1') + cuerpo)
+            await writer.drain()
+
+            estado = int((await reader.readline()).split()[1])
+            largo, seguir = 0, True
+            while True:
+                linea = await reader.readline()
+                if linea in (b'\r\n', b''):
+                    break
+                nombre, _, valor = linea.decode('latin-1').partition(':')
+                if nombre.lower() == 'content-length':
+                    largo = int(valor)
+                elif nombre.lower() == 'connection':
+                    seguir = valor.strip().lower() != 'close'
+            await reader.readexactly(largo)
+
+            latencias.append(time.perf_counter() - inicio)
+            estados[estado] += 1
+            if not seguir:
+                writer.close()
+                reader, writer = await asyncio.open_connection(host, puerto)
+    finally:
+        writer.close()
+
+
+async def prueba_carga(wav_path, host='127.0.0.1', puerto=8000, solicitudes=200, concurrencia=16):
+    """
+    Envía `solicitudes` transcripciones del mismo WAV con `concurrencia` clientes simultáneos
+    (cada uno con su conexión keep-alive) y resume el rendimiento observado.
+
+    Retorna:
+        resumen (dict): Solicitudes por segundo, latencias p50/p90/p99 en ms y conteo por estado HTTP.
+    """
+    with open(wav_path, 'rb') as f:
+        cuerpo = f.read()
+
+    latencias, estados = [], collections.Counter()
+    por_cliente = [solicitudes // concurrencia + (i < solicitudes % concurrencia) for i in range(concurrencia)]
+    inicio = time.perf_counter()
+    await asyncio.gather(*(_cliente(host, puerto, cuerpo, n, latencias, estados) for n in por_cliente if n))
+    duracion = time.perf_counter() - inicio
+
+    p50, p90, p99 = np.percentile(np.array(latencias) * 1000, [50, 90, 99]).round(2).tolist()
+    return {'solicitudes_por_segundo': round(len(latencias) / duracion, 2),
+            'latencia_ms': {'p50': p50, 'p90': p90, 'p99': p99},
+            'estados': dict(estados)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Servicio HTTP local de transcripción de tarareos.')
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    p = subparsers.add_parser('servir', help='Levanta el servicio.')
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--puerto', type=int, default=8000)
+    p.add_argument('--modelo', default=inferencia.MODELO, help='Ruta al state_dict del modelo.')
+    p.add_argument('--max-lote', type=int, default=32, help='Tamaño máximo de cada lote del modelo.')
+    p.add_argument('--max-espera', type=float, default=0.01, help='Segundos máximos para completar un lote.')
+    p.add_argument('--max-pendientes', type=int, default=256, help='Solicitudes en curso antes de responder 503.')
+    p.add_argument('--workers', type=int, default=None, help='Procesos para la extracción de ventanas.')
+
+    p = subparsers.add_parser('carga', help='Prueba de carga contra un servicio en ejecución.')
+    p.add_argument('wav', help='Archivo WAV que se envía en cada solicitud.')
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--puerto', type=int, default=8000)
+    p.add_argument('--solicitudes', type=int, default=200)
+    p.add_argument('--concurrencia', type=int, default=16)
+
+    args = parser.parse_args(argv)
+    if args.comando == 'servir':
+        try:
+            asyncio.run(servir(args.host, args.puerto, args.modelo, max_lote=args.max_lote,
+                               max_espera=args.max_espera, max_pendientes=args.max_pendientes,
+                               n_workers=args.workers))
+        except KeyboardInterrupt:
+            pass
+    else:
+        resumen = asyncio.run(prueba_carga(args.wav, args.host, args.puerto, args.solicitudes, args.concurrencia))
+        print(json.dumps(resumen, indent=2))
+
+
+if __name__ == '__main__':
+    main()
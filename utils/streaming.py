@@ -0,0 +1,292 @@
+"""
+Front end en streaming para tarareos: recibe el audio por bloques (micrófono o lector de
+archivos) y emite las ventanas de L muestras y las columnas del espectrograma de la banda a
+medida que se completan, con memoria acotada sin importar la duración de la grabación.
+
+Diferencias con el procesamiento del archivo completo (`tarareos.trim`, `dividir_en_ventanas`
+y `espectrograma`):
+    - El silencio inicial se detecta con la semántica de `librosa.effects.trim` (RMS de
+      `frame_length` muestras cada `hop_length`, centrado, umbral `top_db` debajo del máximo),
+      pero el máximo de referencia es el observado hasta `espera` segundos después del
+      primer cuadro sonoro, no el de toda la grabación.
+    - No se recorta el silencio final ni se corta a T segundos: el flujo no tiene final conocido.
+    - Los decibelios del espectrograma son relativos al máximo observado hasta el momento.
+    - Las ventanas se normalizan como en `inferencia.preparar` ((y - min|y|) / rango de |y|),
+      pero con el mínimo y el máximo del audio recibido al fijar el corte (al menos `espera`
+      segundos desde el primer cuadro sonoro), y esa escala ya no cambia. Si el pico del
+      tarareo llega después, las ventanas posteriores exceden 1 en magnitud y todo el extracto
+      queda a una escala mayor que la que verían el modelo y el entrenamiento; si el pico cae
+      dentro de la espera, las ventanas son las mismas que las de `inferencia.preparar`.
+      El espectrograma se calcula sobre el audio sin normalizar, como `espectrograma`.
+"""
+import collections
+import numpy as np
+import soundfile
+
+from . import tarareos
+
+
+Salida = collections.namedtuple('Salida', ['frames', 'espectro'])
+
+
+class BufferCircular:
+    """
+    Buffer circular de capacidad fija para muestras de audio. Escribir más de la capacidad
+    libre es un error: quien lo usa debe consumir antes de volver a escribir.
+    """
+    def __init__(self, capacidad, dtype=np.float32):
+        self._datos = np.zeros(capacidad, dtype=dtype)
+        self._inicio = 0
+        self._n = 0
+
+    def __len__(self):
+        return self._n
+
+    def escribir(self, x):
+        capacidad = len(self._datos)
+        n = len(x)
+        if self._n + n > capacidad:
+            raise ValueError(f'Buffer lleno: {self._n} + {n} muestras excede la capacidad de {capacidad}')
+        fin = (self._inicio + self._n) % capacidad
+        primero = min(n, capacidad - fin)
+        self._datos[fin:fin + primero] = x[:primero]
+        self._datos[:n - primero] = x[primero:]
+        self._n += n
+
+    def ver(self, i, n):
+        """Copia de `n` muestras a partir de la posición `i` (0 es la más antigua), sin consumirlas."""
+        capacidad = len(self._datos)
+        inicio = (self._inicio + i) % capacidad
+        primero = min(n, capacidad - inicio)
+        if primero == n:
+            return self._datos[inicio:inicio + n].copy()
+        return np.concatenate((self._datos[inicio:], self._datos[:n - primero]))
+
+    def descartar(self, n):
+        n = min(n, self._n)
+        self._inicio = (self._inicio + n) % len(self._datos)
+        self._n -= n
+
+    def leer(self, n):
+        x = self.ver(0, n)
+        self.descartar(n)
+        return x
+
+
+class FrenteStreaming:
+    """
+    Recorte incremental del silencio inicial, división en ventanas y espectrograma por bloques.
+
+    Uso:
+        frente = FrenteStreaming(freq_range=(hz_lb, hz_ub))
+        for bloque in fuente:
+            salida = frente.procesar(bloque) # Salida(frames [k, L], espectro [m, bins])
+        salida = frente.terminar()
+
+    Parámetros:
+        freq_range (tuple): Rango de frecuencias del espectrograma (min_freq, max_freq).
+        sr (int): Frecuencia de muestreo del audio de entrada.
+        L_seg (float): Duración de cada ventana en segundos.
+        top_db (float): Umbral de Decibeles debajo del cual se considera silencio.
+        espera (float): Segundos que se observan después del primer cuadro sonoro antes de fijar el corte.
+        frame_length (int): Muestras por cuadro del RMS (como `librosa.effects.trim`).
+        hop_length (int): Salto entre cuadros del RMS.
+        top_db_espectro (float): Rango dinámico del espectrograma debajo del máximo observado.
+        bloque_max (int): Muestras máximas que se procesan a la vez; los bloques mayores se dividen.
+        normalizar (bool): Normalizar las ventanas como `inferencia.preparar` (ver el docstring del módulo).
+    """
+    def __init__(self, freq_range, sr=22050, L_seg=0.0625, top_db=55, espera=2.0, frame_length=2048,
+                 hop_length=512, top_db_espectro=80.0, bloque_max=8192, normalizar=True):
+        self.sr = sr
+        self.L = int(sr * L_seg)
+        self.plan = tarareos.plan_espectrograma(sr, self.L, tuple(freq_range), np.float32)
+        self._top_db = top_db
+        self._espera = int(espera * sr)
+        self._frame_length = frame_length
+        self._hop_length = hop_length
+        self._top_db_espectro = top_db_espectro
+        self._bloque_max = bloque_max
+        self._normalizar = normalizar
+
+        # Antes del corte: audio desde el candidato (o desde el cuadro RMS pendiente) hasta lo recibido
+        self._pre = BufferCircular(self._espera + 2 * frame_length + hop_length + bloque_max)
+        self._pre_inicio = 0  # Posición absoluta de la muestra más antigua de _pre
+        self._recibidas = 0
+        self._sig_cuadro = 0  # Siguiente cuadro RMS por calcular
+        self._ref = 0.0       # Máximo de la energía media por cuadro
+        self._candidato = None # Primer cuadro sonoro según el máximo actual
+        self._mse = np.empty(0) # Energía de los cuadros desde el candidato
+        self.inicio = None    # Muestra del corte una vez fijado
+
+        # Después del corte
+        self._ventanas = BufferCircular(self.L + bloque_max)
+        self._espectro = BufferCircular(self.L + self.L // 2 + bloque_max)
+        self._ref_espectro = 0.0
+        self._minimo = np.float32(0.0) # Normalización de las ventanas, fijada en el corte
+        self._rango = np.float32(1.0)
+
+    def procesar(self, bloque):
+        """
+        Parámetros:
+            bloque (np.ndarray): Muestras nuevas (mono, frecuencia `sr`).
+
+        Retorna:
+            salida (Salida): Ventanas [k, L] y columnas en dB [m, bins] completadas con este bloque.
+        """
+        bloque = np.asarray(bloque, dtype=np.float32)
+        frames, columnas = [], []
+        for i in range(0, len(bloque), self._bloque_max):
+            parte = bloque[i:i + self._bloque_max]
+            if self.inicio is None:
+                self._detectar(parte, frames, columnas)
+            else:
+                self._alimentar(parte, frames, columnas)
+        return self._salida(frames, columnas)
+
+    def terminar(self):
+        """
+        Cierra el flujo: fija el corte con lo recibido si aún no se fijó y emite las últimas
+        columnas del espectrograma (relleno de L//2 ceros al final, como `center=True`).
+        La última ventana incompleta se descarta, igual que en `dividir_en_ventanas`.
+        """
+        frames, columnas = [], []
+        if self.inicio is None:
+            if self._recibidas == 0:
+                return self._salida(frames, columnas)
+            self._cuadros(fin=self._recibidas // self._hop_length, cerrar=True)
+            self._fijar_corte(frames, columnas)
+        self._espectro.escribir(np.zeros(self.L // 2, dtype=np.float32))
+        self._drenar(frames, columnas)
+        return self._salida(frames, columnas)
+
+    def _salida(self, frames, columnas):
+        frames = np.stack(frames) if frames else np.empty((0, self.L), dtype=np.float32)
+        if not columnas:
+            return Salida(frames, np.empty((0, len(self.plan.bins)), dtype=np.float32))
+
+        # power_to_db relativo al máximo observado hasta ahora
+        potencia = tarareos.potencia_banda(np.stack(columnas), self.plan)
+        self._ref_espectro = max(self._ref_espectro, float(potencia.max()))
+        amin = 1e-10
+        S_db = 10.0 * np.log10(np.maximum(potencia, amin))
+        S_db -= 10.0 * np.log10(max(self._ref_espectro, amin))
+        np.maximum(S_db, -self._top_db_espectro, out=S_db)
+        return Salida(frames, S_db)
+
+    ##### Antes del corte
+    def _detectar(self, parte, frames, columnas):
+        self._pre.escribir(parte)
+        self._recibidas += len(parte)
+
+        # Cuadros RMS cuya ventana centrada ya está completa
+        self._cuadros(fin=(self._recibidas - self._frame_length // 2) // self._hop_length)
+
+        if self._candidato is not None and \
+                (self._sig_cuadro - 1 - self._candidato) * self._hop_length >= self._espera:
+            self._fijar_corte(frames, columnas)
+
+    def _cuadros(self, fin, cerrar=False):
+        # Calcula la energía media de los cuadros [_sig_cuadro, fin] (fin inclusive)
+        if fin < self._sig_cuadro:
+            return
+        fl, hop = self._frame_length, self._hop_length
+        a = self._sig_cuadro * hop - fl // 2
+        b = fin * hop + fl // 2
+        a_real, b_real = max(a, 0), min(b, self._recibidas)
+
+        # Relleno de ceros fuera de la señal, como rms(center=True)
+        region = np.zeros(b - a, dtype=np.float32)
+        region[a_real - a:b_real - a] = self._pre.ver(a_real - self._pre_inicio, b_real - a_real)
+        ventanas = np.lib.stride_tricks.sliding_window_view(region, fl)[::hop]
+        mse = np.mean(ventanas.astype(np.float64) ** 2, axis=1)
+        self._sig_cuadro = fin + 1
+
+        self._ref = max(self._ref, float(mse.max()))
+        # db > -top_db  <=>  max(amin, mse) > max(amin, ref) * 10^(-top_db / 10)
+        amin = 1e-10
+        umbral = max(amin, self._ref) * 10.0 ** (-self._top_db / 10.0)
+
+        # El umbral sólo crece, así que el candidato sólo puede avanzar
+        primer = self._sig_cuadro - len(mse) if self._candidato is None else self._candidato
+        mse = mse if self._candidato is None else np.concatenate((self._mse, mse))
+        sonoros = np.flatnonzero(np.maximum(mse, amin) > umbral)
+        if len(sonoros):
+            self._candidato = primer + int(sonoros[0])
+            self._mse = mse[sonoros[0]:]
+        else:
+            self._candidato = None
+            self._mse = np.empty(0)
+
+        # Sólo se conserva el audio que aún puede formar parte de la salida o de un cuadro
+        conservar = max(0, self._sig_cuadro * hop - fl // 2)
+        if self._candidato is not None:
+            conservar = min(conservar, self._candidato * hop)
+        if not cerrar and conservar > self._pre_inicio:
+            self._pre.descartar(conservar - self._pre_inicio)
+            self._pre_inicio = conservar
+
+    def _fijar_corte(self, frames, columnas):
+        self.inicio = self._candidato * self._hop_length if self._candidato is not None else self._recibidas
+        self._pre.descartar(self.inicio - self._pre_inicio)
+        resto = self._pre.leer(len(self._pre))
+        self._pre = None
+        self._mse = None
+
+        if self._normalizar and len(resto):
+            y_abs = np.abs(resto)
+            self._minimo = y_abs.min()
+            rango = y_abs.max() - self._minimo
+            self._rango = rango if rango > 0 else np.float32(1.0)
+
+        # Ventanas centradas del espectrograma: relleno de L//2 ceros al inicio
+        self._espectro.escribir(np.zeros(self.L // 2, dtype=np.float32))
+        for i in range(0, len(resto), self._bloque_max):
+            self._alimentar(resto[i:i + self._bloque_max], frames, columnas)
+
+    ##### Después del corte
+    def _alimentar(self, parte, frames, columnas):
+        self._ventanas.escribir(parte)
+        self._espectro.escribir(parte)
+        self._drenar(frames, columnas)
+
+    def _drenar(self, frames, columnas):
+        L = self.L
+        while len(self._ventanas) >= L:
+            frames.append((self._ventanas.leer(L) - self._minimo) / self._rango)
+        while len(self._espectro) >= L:
+            columnas.append(self._espectro.leer(L))
+
+
+def bloques_de_archivo(audio_path, sr=22050, duracion_bloque=0.1):
+    """
+    Lee un archivo de audio por bloques, como lo entregaría un micrófono. Si la frecuencia de
+    muestreo del archivo no es `sr`, cada bloque se remuestrea por separado.
+
+    Parámetros:
+        audio_path (str): Ruta del archivo de audio.
+        sr (int): Frecuencia de muestreo de los bloques.
+        duracion_bloque (float): Duración de cada bloque en segundos.
+
+    Retorna:
+        bloques (generator): Bloques float32 mono.
+    """
+    import librosa
+
+    sr_archivo = soundfile.info(audio_path).samplerate
+    blocksize = max(1, int(duracion_bloque * sr_archivo))
+    for bloque in soundfile.blocks(audio_path, blocksize=blocksize, dtype='float32', always_2d=True):
+        bloque = bloque.mean(axis=1)
+        if sr_archivo != sr:
+            bloque = librosa.resample(bloque, orig_sr=sr_archivo, target_sr=sr)
+        yield bloque
+
+
+def procesar_archivo(audio_path, freq_range, duracion_bloque=0.1, **kwargs):
+    """
+    Pasa un archivo por `FrenteStreaming` y devuelve cada salida conforme se produce.
+    `kwargs` se pasan al constructor de `FrenteStreaming`.
+    """
+    frente = FrenteStreaming(freq_range, **kwargs)
+    for bloque in bloques_de_archivo(audio_path, frente.sr, duracion_bloque):
+        yield frente.procesar(bloque)
+    yield frente.terminar()
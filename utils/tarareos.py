@@ -1,8 +1,33 @@
 import os
+import functools
+import collections
 import librosa
 import numpy as np
-import matplotlib.pyplot as plt
-import librosa.display
+
+from . import cache_audio
+from . import perfilado
+
+
+# Caché de audio decodificado (ver utils.cache_audio); HUM_CACHE_AUDIO_ACTIVO=0 lo desactiva
+USAR_CACHE = os.environ.get('HUM_CACHE_AUDIO_ACTIVO', '1') != '0'
+
+
+def cargar_audio(audio_path, sr=22050):
+    """
+    Carga un audio como `librosa.load`, leyendo a través del caché de audio decodificado.
+    
+    Parámetros:
+        audio_path (str): Ruta del archivo de audio.
+        sr (int): Frecuencia de muestreo objetivo. None conserva la original.
+    
+    Retorna:
+        y (np.ndarray): Audio.
+        sr (int): Frecuencia de muestreo del audio.
+    """
+    with perfilado.etapa('audio.cargar') as e:
+        y, sr = cache_audio.cargar(audio_path, sr=sr) if USAR_CACHE else librosa.load(audio_path, sr=sr)
+        e.agregar_bytes(y.nbytes)
+    return y, sr
 
 
 def trim(audio, sr, T_midi, top_db=60):
@@ -57,6 +82,7 @@ def dividir_en_ventanas(audio, sr, L_seg):
 def espectrograma(audio, sr, L, freq_range):
     """
     Genera un espectrograma a partir de un audio recortado y devuelve su representación en array.
+    Usa el plan de análisis en caché de `plan_espectrograma` (ver `espectrograma_lote`).
     
     Parámetros:
         audio (np.ndarray): Array de audio.
@@ -68,36 +94,124 @@ def espectrograma(audio, sr, L, freq_range):
         S_filtered_db (np.ndarray): Espectrograma en decibelios filtrado por las frecuencias requeridas.
         freqs_filtered (np.ndarray): Valores de frecuencia restantes
     """
-    min_freq, max_freq = freq_range
+    dtype = np.float32 if audio.dtype == np.float32 else np.float64
+    plan = plan_espectrograma(sr, L, tuple(freq_range), dtype)
+    S_filtered_db = espectrograma_lote(audio[np.newaxis], plan)[0]
+    
+    return S_filtered_db, plan.freqs
+
+
+PlanEspectrograma = collections.namedtuple('PlanEspectrograma', ['sr', 'L', 'dtype', 'bins', 'freqs', 'ventana',
+                                                                 'base_real', 'base_imag'])
+
+
+@functools.lru_cache(maxsize=32)
+def plan_espectrograma(sr, L, freq_range, dtype=np.float32):
+    """
+    Precalcula lo que `espectrograma` necesita para un (sr, L, freq_range): los índices de la banda
+    de frecuencias y la base de Fourier de esa banda con la ventana de Hann ya aplicada.
+    Si la banda es ancha (más de L/4 bins) no se genera la base y se usa la FFT completa.
+    El resultado se guarda en caché, por lo que sólo se calcula una vez por configuración.
+    
+    Parámetros:
+        sr (int): Frecuencia de muestreo del audio.
+        L (int): Cantidad de muestras por ventana (n_fft y hop_length de la STFT).
+        freq_range (tuple): Rango de frecuencias a considerar (min_freq, max_freq).
+        dtype (np.dtype): Tipo de dato del cálculo (float32 o float64).
     
-    # Generar el espectrograma usando Short-Time Fourier Transform (STFT)
-    S = librosa.stft(audio, n_fft=L, hop_length=L)
-    S_magnitude = np.abs(S)
+    Retorna:
+        plan (PlanEspectrograma): bins y freqs de la banda, ventana y base real/imaginaria de (L, bins).
+    """
+    min_freq, max_freq = freq_range
     
-    # Obtener las frecuencias correspondientes a los índices
-    freqs = librosa.fft_frequencies(sr=sr, n_fft=L)
+    # Obtener las frecuencias correspondientes a los índices (igual que librosa.fft_frequencies)
+    freqs = np.fft.rfftfreq(L, d=1.0 / sr)
     
     # Obtener los índices que corresponden a las frecuencias requeridas
     min_index = np.argmax(freqs >= min_freq)
     max_index = np.argmax(freqs > max_freq) - 1
+    bins = np.arange(len(freqs))[min_index:max_index]
+    
+    # Ventana de Hann periódica, la que usa librosa.stft por omisión
+    n = np.arange(L)
+    ventana = 0.5 - 0.5 * np.cos(2 * np.pi * n / L)
+    
+    if len(bins) * 4 > L:
+        return PlanEspectrograma(sr, L, np.dtype(dtype), bins, freqs[bins], ventana.astype(dtype), None, None)
+    
+    # Base de Fourier sólo de la banda: X[k] = sum_n w[n] x[n] exp(-2 pi i k n / L)
+    fase = 2 * np.pi * np.outer(n, bins) / L
+    base_real = np.ascontiguousarray(ventana[:, np.newaxis] * np.cos(fase), dtype=dtype)
+    base_imag = np.ascontiguousarray(-ventana[:, np.newaxis] * np.sin(fase), dtype=dtype)
     
-    # Filtrar el espectrograma por el rango de frecuencias
-    S_filtered = S_magnitude[min_index:max_index, :]
-    freqs_filtered = freqs[min_index:max_index]
+    return PlanEspectrograma(sr, L, np.dtype(dtype), bins, freqs[bins], None, base_real, base_imag)
 
-    # Convertir el espectrograma a decibelios
-    S_filtered_db = librosa.amplitude_to_db(S_filtered, ref=np.max)
+
+def espectrograma_lote(audios, plan, top_db=80.0):
+    """
+    Calcula en una sola operación el espectrograma en decibelios de un lote de audios
+    de la misma longitud. Equivale a `librosa.stft` (n_fft = hop_length = L, center=True),
+    `np.abs`, el filtrado de la banda y `librosa.amplitude_to_db(ref=np.max)` por audio,
+    pero sólo se calculan los bins de la banda de frecuencias del plan.
+    
+    Parámetros:
+        audios (np.ndarray): Array de (audios, muestras).
+        plan (PlanEspectrograma): Plan de análisis de `plan_espectrograma`.
+        top_db (float): Rango dinámico máximo en decibelios debajo del máximo de cada audio.
     
-    return S_filtered_db, freqs_filtered
+    Retorna:
+        S_db (np.ndarray): Espectrogramas de (audios, bins de la banda, ventanas).
+    """
+    L = plan.L
+    
+    # Ventanas centradas: relleno de L//2 ceros en ambos extremos
+    audios = np.asarray(audios, dtype=plan.dtype)
+    relleno = np.pad(audios, ((0, 0), (L // 2, L // 2)))
+    n_ventanas = 1 + (relleno.shape[1] - L) // L
+    ventanas = np.lib.stride_tricks.sliding_window_view(relleno, L, axis=1)[:, ::L][:, :n_ventanas]
+    potencia = potencia_banda(ventanas, plan)
+    
+    # amplitude_to_db(ref=np.max) sobre |X| equivale a power_to_db sobre |X|^2
+    amin = 1e-10
+    np.maximum(potencia, amin, out=potencia)
+    S_db = np.log10(potencia, out=potencia)
+    S_db *= 10.0
+    ref = S_db.max(axis=(1, 2), keepdims=True)
+    S_db -= ref
+    np.maximum(S_db, -top_db, out=S_db)
+    
+    return S_db.transpose(0, 2, 1)
 
 
+def potencia_banda(ventanas, plan):
+    """
+    Calcula |X|^2 de la banda del plan para ventanas de L muestras (sin aplicar la ventana de Hann).
+    
+    Parámetros:
+        ventanas (np.ndarray): Array de (..., L).
+        plan (PlanEspectrograma): Plan de análisis de `plan_espectrograma`.
+    
+    Retorna:
+        potencia (np.ndarray): Array de (..., bins de la banda).
+    """
+    # Potencia de la banda: |X|^2 = real^2 + imag^2
+    if plan.base_real is None:
+        S = np.fft.rfft(ventanas * plan.ventana, axis=-1)[..., plan.bins]
+        return (S.real * S.real + S.imag * S.imag).astype(plan.dtype, copy=False)
+    
+    potencia = ventanas @ plan.base_real
+    potencia *= potencia
+    imag = ventanas @ plan.base_imag
+    imag *= imag
+    potencia += imag
+    return potencia
 
 
 ##### 4 
 # Función para extraer los onsets del archivo de audio
 def extract_audio_onsets(audio_path):
     # Cargar el archivo de audio
-    y, sr = librosa.load(audio_path)
+    y, sr = cargar_audio(audio_path)
     
     # Detección de onsets
     onset_times = librosa.onset.onset_detect(y=y, sr=sr, backtrack=False, units='time')
@@ -108,6 +222,7 @@ def extract_audio_onsets(audio_path):
 ##################################
 ########### DEPRECATED ###########
 def process_audio_files(folder_path, L):
+    from . import graficas
 
     sample_rate = 22050
     n_fft = int((L * sample_rate) / 1000)
@@ -117,7 +232,7 @@ def process_audio_files(folder_path, L):
     for filename in os.listdir(folder_path):
         if filename.endswith('.wav'):
             file_path = os.path.join(folder_path, filename)
-            y, sr = librosa.load(file_path, sr=sample_rate)
+            y, sr = cargar_audio(file_path, sr=sample_rate)
 
             # Calcular la STFT
             stft_result = librosa.stft(y, n_fft=n_fft, hop_length=hop_length)
@@ -126,49 +241,17 @@ def process_audio_files(folder_path, L):
             spectrogram_db = librosa.amplitude_to_db(np.abs(stft_result), ref=np.max)
 
             # Guardar el espectrograma como imagen
-            save_spectrogram(file_path, spectrogram_db, sr, hop_length)
+            graficas.save_spectrogram(file_path, spectrogram_db, sr, hop_length)
 
             spectrograms.append(stft_result)
         
     return spectrograms
 
-def save_spectrogram(file_path, spectrogram_db, sr, hop_length):
-
-    plt.figure(figsize=(10, 6))
-    librosa.display.specshow(spectrogram_db, sr=sr, hop_length=hop_length, x_axis='time', y_axis='log')
-    plt.colorbar(format='%+2.0f dB')
-    plt.title(f'Espectrograma de STFT de {os.path.basename(file_path)}')
-    
-    # Save the figure
-    output_filename = os.path.splitext(file_path)[0] + '_spectrogram.png'
-    plt.savefig(output_filename)
-    plt.close()
-
-# Función para ajustar el desfase entre audio y MIDI usando el onset
-## DEPRECATED
-def DEPRECATED_align_midi_to_audio(midi_path, audio_onsets, threshold=0.05):
-    import mido
-    midi = mido.MidiFile(midi_path)
-    midi_onsets = extract_midi_onsets(midi_path)
-    
-    # Calcular el desfase entre el primer onset del audio y del MIDI
-    onset_diff = audio_onsets[0] - midi_onsets[0]
-    
-    # Ajustar el tiempo de los mensajes MIDI
-    new_midi = mido.MidiFile()
-    for i, track in enumerate(midi.tracks):
-        new_track = mido.MidiTrack()
-        current_time = 0
-        for msg in track:
-            if not msg.is_meta:
-                current_time += msg.time
-                if msg.type == 'note_on' or msg.type == 'note_off':
-                    # Ajustar el tiempo
-                    new_time = max(0, msg.time - int(onset_diff * midi.ticks_per_beat))
-                    new_track.append(msg.copy(time=new_time))
-            else:
-                new_track.append(msg)
-        new_midi.tracks.append(new_track)
-    
-    # Guardar el archivo MIDI ajustado
-    new_midi.save('adjusted_' + midi_path)
\ No newline at end of file
+def __getattr__(name):
+    # save_spectrogram se movió a utils.graficas para no cargar matplotlib con este módulo
+    if name == 'save_spectrogram':
+        from .graficas import save_spectrogram
+        return save_spectrogram
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+# La alineación de MIDI con audio por onsets está en utils/alineacion.py
\ No newline at end of file